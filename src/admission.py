@@ -0,0 +1,216 @@
+import queue
+import socket
+import threading
+import time
+from collections import Counter, deque
+
+BACKLOG_ECOUTE = 1024   # File des connexions en attente d'accept (limitée par net.core.somaxconn)
+TAILLE_LOT = 64         # Connexions acceptées d'affilée avant de revenir à la boucle d'écoute
+DELAI_POIGNEE = 5.0     # Délai pour recevoir le pseudo d'une connexion acceptée (secondes)
+MAX_EN_ATTENTE = 512    # Connexions acceptées dont le pseudo n'a pas encore été lu
+NB_THREADS = 16         # Threads de lecture des pseudos
+DEBIT_IP = 20.0         # Nouvelles connexions par seconde et par adresse IP
+RAFALE_IP = 100         # Connexions simultanées tolérées d'une même adresse (bureau derrière un NAT)
+
+
+class LimiteurDebit:
+    """
+    @brief Limitation du nombre de connexions par adresse IP (seau à jetons).
+    """
+
+    MAX_ADRESSES = 10000  # Au-delà, les adresses dont le seau est plein sont oubliées
+
+    def __init__(self, debit=DEBIT_IP, rafale=RAFALE_IP, horloge=time.monotonic):
+        """
+        @brief Constructeur de LimiteurDebit.
+
+        @param debit Jetons regagnés par seconde
+        @param rafale Nombre maximal de jetons (connexions d'affilée)
+        @param horloge Horloge en secondes
+        """
+        self.debit = debit
+        self.rafale = rafale
+        self.horloge = horloge
+        self.seaux = {}  # ip -> [jetons, instant]
+
+    def autoriser(self, ip):
+        """
+        @brief Consomme un jeton pour une nouvelle connexion
+
+        @param ip Adresse de la connexion
+        @return True si la connexion est autorisée
+        """
+        maintenant = self.horloge()
+        seau = self.seaux.get(ip)
+        if seau is None:
+            if len(self.seaux) >= self.MAX_ADRESSES:
+                self.oublier(maintenant)
+            seau = self.seaux[ip] = [self.rafale, maintenant]
+        seau[0] = min(self.rafale, seau[0] + (maintenant - seau[1]) * self.debit)
+        seau[1] = maintenant
+        if seau[0] < 1:
+            return False
+        seau[0] -= 1
+        return True
+
+    def oublier(self, maintenant):
+        """
+        @brief Retire les adresses qui ont regagné tous leurs jetons
+        """
+        for ip, (jetons, instant) in list(self.seaux.items()):
+            if jetons + (maintenant - instant) * self.debit >= self.rafale:
+                del self.seaux[ip]
+
+
+class Admission:
+    """
+    @brief Accueil des connexions entrantes, prévu pour les afflux de joueurs.
+
+    - les connexions sont acceptées par lots, sans attendre entre deux accept
+    - chaque adresse IP est limitée en débit de connexions
+    - les connexions acceptées attendent la lecture de leur pseudo dans une file
+      bornée : au-delà, elles sont refusées immédiatement
+    - un nombre fixe de threads lit les pseudos, avec une échéance par connexion :
+      une connexion muette est fermée au lieu de bloquer un thread
+    """
+
+    def __init__(self, traiter, delai=DELAI_POIGNEE, max_en_attente=MAX_EN_ATTENTE, nb_threads=NB_THREADS,
+                 lot=TAILLE_LOT, debit_ip=DEBIT_IP, rafale_ip=RAFALE_IP):
+        """
+        @brief Constructeur de Admission.
+
+        @param traiter Fonction traiter(conn, message) appelée avec le message de connexion reçu
+        @param delai Délai de réception du message de connexion (secondes)
+        @param max_en_attente Taille de la file des connexions en attente
+        @param nb_threads Nombre de threads de lecture
+        @param lot Nombre maximal de connexions acceptées d'affilée
+        @param debit_ip Connexions par seconde et par adresse IP
+        @param rafale_ip Connexions d'affilée tolérées par adresse IP
+        """
+        self.traiter = traiter
+        self.delai = delai
+        self.lot = lot
+        self.nb_threads = nb_threads
+        self.file = queue.Queue(max_en_attente)
+        self.limiteur = LimiteurDebit(debit_ip, rafale_ip)
+        self.metriques = Counter()
+        self.durees = deque(maxlen=1000)  # Durées des dernières lectures de pseudo (secondes)
+        self.verrou = threading.Lock()
+        self.threads = []
+
+    def demarrer(self):
+        """
+        @brief Lance les threads de lecture des pseudos
+        """
+        for _ in range(self.nb_threads):
+            thread = threading.Thread(target=self.lire_connexions, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def accepter(self, server):
+        """
+        @brief Accepte un lot de connexions
+
+        Attend la première connexion selon le timeout du socket d'écoute, puis
+        accepte sans attendre celles déjà en file, dans la limite d'un lot.
+
+        @param server Socket d'écoute (lève socket.timeout si aucune connexion n'arrive)
+        """
+        timeout = server.gettimeout()
+        self.admettre(*server.accept())
+        server.settimeout(0)
+        try:
+            for _ in range(self.lot - 1):
+                self.admettre(*server.accept())
+        except (BlockingIOError, socket.timeout):
+            pass  # Plus de connexion en file
+        finally:
+            server.settimeout(timeout)
+
+    def admettre(self, conn, addr):
+        """
+        @brief Place une connexion acceptée en file de lecture, ou la refuse
+
+        @param conn Connexion acceptée
+        @param addr Adresse de la connexion
+        """
+        ip = addr[0] if isinstance(addr, tuple) else addr
+        with self.verrou:
+            self.metriques['acceptees'] += 1
+            if not self.limiteur.autoriser(ip):
+                self.metriques['refusees_debit'] += 1
+                conn.close()
+                return
+        try:
+            self.file.put_nowait((conn, time.monotonic()))
+        except queue.Full:
+            self.compter('refusees_file')
+            conn.close()
+            return
+        with self.verrou:
+            self.metriques['pic_en_attente'] = max(self.metriques['pic_en_attente'], self.file.qsize())
+
+    def lire_connexions(self):
+        """
+        @brief Boucle d'un thread de lecture : message de connexion reçu avant l'échéance, puis traitement
+        """
+        while True:
+            element = self.file.get()
+            if element is None:
+                return
+            conn, arrivee = element
+            # Échéance dépassée en file : le pseudo est lu seulement s'il est déjà arrivé
+            restant = max(arrivee + self.delai - time.monotonic(), 0)
+            try:
+                conn.settimeout(restant)
+                data = conn.recv(1024)
+                conn.settimeout(None)
+                if not data:
+                    raise ConnectionError("Connexion fermée avant l'envoi du pseudo")
+                message = data.decode()
+            except (socket.timeout, BlockingIOError):
+                self.compter('expirees')
+                conn.close()
+                continue
+            except (OSError, UnicodeDecodeError):
+                self.compter('erreurs')
+                conn.close()
+                continue
+            with self.verrou:
+                self.metriques['admises'] += 1
+                self.durees.append(time.monotonic() - arrivee)
+            try:
+                self.traiter(conn, message)
+            except Exception as e:
+                print(f"Erreur lors de l'accueil d'un joueur : {e}")
+
+    def compter(self, metrique):
+        """
+        @brief Incrémente une métrique
+        """
+        with self.verrou:
+            self.metriques[metrique] += 1
+
+    def statistiques(self):
+        """
+        @brief Métriques d'admission
+
+        @return Dictionnaire : connexions acceptées, admises, refusées (débit, file pleine), expirées,
+                en erreur, en attente, pic de la file et durée de lecture du pseudo (p50, p95, en secondes)
+        """
+        with self.verrou:
+            stats = {cle: self.metriques[cle] for cle in ('acceptees', 'admises', 'refusees_debit', 'refusees_file',
+                                                          'expirees', 'erreurs', 'pic_en_attente')}
+            durees = sorted(self.durees)
+        stats['en_attente'] = self.file.qsize()
+        stats['poignee_p50'] = durees[len(durees) // 2] if durees else 0.0
+        stats['poignee_p95'] = durees[int(len(durees) * 0.95)] if durees else 0.0
+        return stats
+
+    def arreter(self):
+        """
+        @brief Arrête les threads de lecture une fois la file vidée
+        """
+        for _ in self.threads:
+            self.file.put(None)
+        self.threads = []
@@ -0,0 +1,431 @@
+import argparse
+import json
+import selectors
+import threading
+import time
+from collections import Counter
+
+from consensus import CARTES, calculer_verdict
+from doublons import analyser_backlog
+from transport import TransportTCP
+
+PORT_ASYNCHRONE = 16387
+QUORUM = 3           # Votes nécessaires pour qu'une tâche soit décidée pendant la fenêtre
+TAILLE_LIGNE = 4096  # Longueur maximale d'une ligne reçue d'un votant (octets)
+DELAI_FIN = 2.0      # Délai d'envoi des dernières réponses à la fermeture de la fenêtre (secondes)
+
+
+class VotesTaches:
+    """
+    @brief Votes de la fenêtre asynchrone, indexés par tâche et par votant.
+
+    Chaque vote met à jour le décompte de sa tâche : l'accord d'une tâche est connu
+    sans reparcourir ses votes, et les tâches restant à voter pour un joueur qui se
+    reconnecte sont trouvées à partir de l'ensemble des tâches qu'il a déjà votées.
+    Un joueur peut changer son vote tant que la fenêtre est ouverte.
+    """
+
+    def __init__(self, cles):
+        """
+        @brief Constructeur de VotesTaches.
+
+        @param cles Clés des tâches soumises au vote, dans l'ordre du backlog
+        """
+        self.votes = {cle: {} for cle in cles}           # clé -> {pseudo: vote}
+        self.decomptes = {cle: Counter() for cle in cles}  # clé -> {vote: nombre}
+        self.par_votant = {}  # pseudo -> ensemble des clés votées
+        self.unanimes = set()  # Clés dont tous les votes sont identiques
+        self.total = 0
+
+    def voter(self, pseudo, cle, vote):
+        """
+        @brief Enregistre ou remplace le vote d'un joueur sur une tâche
+
+        @param pseudo Pseudo du joueur
+        @param cle Clé de la tâche
+        @param vote Vote (chaîne)
+        @return False si la tâche n'est pas soumise au vote
+        """
+        votes = self.votes.get(cle)
+        if votes is None:
+            return False
+        decompte = self.decomptes[cle]
+        ancien = votes.get(pseudo)
+        if ancien is None:
+            self.total += 1
+            self.par_votant.setdefault(pseudo, set()).add(cle)
+        else:
+            decompte[ancien] -= 1
+            if not decompte[ancien]:
+                del decompte[ancien]
+        votes[pseudo] = vote
+        decompte[vote] += 1
+        if len(decompte) == 1:
+            self.unanimes.add(cle)
+        else:
+            self.unanimes.discard(cle)
+        return True
+
+    def restantes(self, pseudo):
+        """
+        @brief Tâches que le joueur n'a pas encore votées, dans l'ordre du backlog
+        """
+        votees = self.par_votant.get(pseudo, ())
+        return [cle for cle in self.votes if cle not in votees]
+
+    def votes_de(self, pseudo):
+        """
+        @brief Votes déjà donnés par un joueur {clé: vote}
+        """
+        return {cle: self.votes[cle][pseudo] for cle in self.par_votant.get(pseudo, ())}
+
+    def en_accord(self, quorum=QUORUM):
+        """
+        @brief Nombre de tâches unanimes ayant atteint le quorum
+        """
+        return sum(1 for cle in self.unanimes if len(self.votes[cle]) >= quorum)
+
+    def bilan(self, mode, quorum=QUORUM):
+        """
+        @brief Décide les tâches à la fermeture de la fenêtre
+
+        Les votes de la fenêtre comptent comme le premier tour de chaque tâche :
+        ils sont jugés à la majorité absolue, quel que soit le mode.
+
+        @param mode Mode de jeu
+        @param quorum Nombre minimal de votes pour décider une tâche
+        @return BilanAsynchrone
+        """
+        estimations = {}
+        for cle in self.unanimes:
+            votes = self.votes[cle]
+            if len(votes) < quorum:
+                continue
+            estimation, message = calculer_verdict(mode, list(votes.values()), premier_tour=True)
+            if estimation is not None and estimation != -1:  # Unanimité sur « ? » : à discuter
+                estimations[cle] = estimation
+        a_discuter = [cle for cle in self.votes if cle not in estimations]
+        return BilanAsynchrone(estimations, {cle: dict(votes) for cle, votes in self.votes.items() if votes},
+                               a_discuter, self.total)
+
+
+class BilanAsynchrone:
+    """
+    @brief Résultat d'une fenêtre asynchrone, transmis au moteur de la partie synchrone qui suit.
+    """
+
+    def __init__(self, estimations, votes, a_discuter, total):
+        """
+        @brief Constructeur de BilanAsynchrone.
+
+        @param estimations Estimations décidées pendant la fenêtre {clé: estimation}
+        @param votes Votes reçus par tâche {clé: {pseudo: vote}}
+        @param a_discuter Clés des tâches à estimer pendant la partie, dans l'ordre du backlog
+        @param total Nombre de votes reçus
+        """
+        self.estimations = estimations
+        self.votes = votes
+        self.a_discuter = a_discuter
+        self.total = total
+
+    def rappel(self, cle):
+        """
+        @brief Répartition des votes d'une tâche sans accord, affichée sous la question
+
+        @return Texte '5 ×3, 8 ×1', ou None si la tâche n'a reçu aucun vote
+        """
+        votes = self.votes.get(cle)
+        if not votes:
+            return None
+        return ', '.join(f"{vote} ×{nombre}" for vote, nombre in Counter(votes.values()).most_common())
+
+    def resume(self):
+        """
+        @brief Résumé affiché à l'hôte
+        """
+        return (f"Fenêtre asynchrone : {self.total} votes, {len(self.estimations)} tâche(s) estimée(s), "
+                f"{len(self.a_discuter)} à discuter")
+
+
+class Votant:
+    """
+    @brief Connexion d'un votant et données en attente, côté hôte.
+    """
+
+    __slots__ = ('conn', 'pseudo', 'entree', 'sortie')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.pseudo = None  # Première ligne reçue
+        self.entree = b''   # Ligne incomplète
+        self.sortie = b''   # Réponses pas encore envoyées
+
+
+class FenetreAsynchrone:
+    """
+    @brief Fenêtre de vote asynchrone sur un backlog, avant la partie synchrone.
+
+    Pendant la durée de la fenêtre, les joueurs se connectent quand ils le veulent,
+    votent sur les tâches de leur choix et se déconnectent ; leurs votes sont
+    conservés et ils retrouvent à la reconnexion les tâches qu'il leur reste à voter.
+    Un seul thread sert toutes les connexions sans bloquer (selectors).
+
+    Protocole, en lignes UTF-8 :
+    - le joueur envoie son pseudo, puis une ligne 'clé;vote' par vote
+    - l'hôte répond au pseudo par {"echeance", "taches": [[clé, tâche]...], "votes": {clé: vote}},
+      à chaque vote par {"cle", "accepte"}, et à la fermeture par {"fin": true}
+
+    Seul le représentant de chaque groupe de doublons est soumis au vote.
+    """
+
+    INTERVALLE = 0.2  # Attente maximale d'un socket prêt, entre deux vérifications de l'échéance (secondes)
+
+    def __init__(self, backlog, duree, analyse=None, mode='Majorité absolue', quorum=QUORUM,
+                 hote='0.0.0.0', port=PORT_ASYNCHRONE, transport=None):
+        """
+        @brief Constructeur de FenetreAsynchrone : ouvre l'écoute.
+
+        @param backlog Backlog à estimer {clé: tâche}
+        @param duree Durée de la fenêtre (secondes)
+        @param analyse AnalyseBacklog des doublons (calculée si absente)
+        @param mode Mode de jeu
+        @param quorum Nombre minimal de votes pour décider une tâche pendant la fenêtre
+        @param hote Adresse d'écoute
+        @param port Port d'écoute (0 : port libre choisi par le système)
+        @param transport Transport à sockets (TCP par défaut)
+        """
+        analyse = analyse or analyser_backlog(backlog)
+        self.backlog = backlog
+        self.mode = mode
+        self.quorum = quorum
+        self.etat = VotesTaches([cle for cle in backlog if analyse.representant[cle] == cle])
+        self.echeance = time.time() + duree
+        self.ecoute = (transport or TransportTCP()).ecouter(hote, port)
+        self.ecoute.setblocking(False)
+        self.port = self.ecoute.getsockname()[1]
+        self.verrou = threading.Lock()
+        self.actif = True
+        self.bilan = None
+        self.selecteur = selectors.DefaultSelector()
+        self.votants = set()
+        self.thread = threading.Thread(target=self.servir, daemon=True)
+        self.thread.start()
+
+    def servir(self):
+        """
+        @brief Boucle du thread : connexions, votes et réponses jusqu'à l'échéance
+        """
+        self.selecteur.register(self.ecoute, selectors.EVENT_READ)
+        while self.actif and time.time() < self.echeance:
+            for cle, evenements in self.selecteur.select(self.INTERVALLE):
+                if cle.fileobj is self.ecoute:
+                    self.accepter()
+                    continue
+                votant = cle.data
+                if evenements & selectors.EVENT_READ:
+                    self.lire(votant)
+                if votant in self.votants:
+                    self.envoyer(votant)
+
+        with self.verrou:
+            self.actif = False
+            self.bilan = self.etat.bilan(self.mode, self.quorum)
+        # Dernières réponses et fin de fenêtre, sans attendre plus de DELAI_FIN un votant qui ne lit plus
+        self.selecteur.unregister(self.ecoute)
+        fin = json.dumps({'fin': True}).encode() + b'\n'
+        for votant in self.votants:
+            votant.sortie += fin
+        limite = time.monotonic() + DELAI_FIN
+        while self.votants and time.monotonic() < limite:
+            for votant in list(self.votants):
+                self.envoyer(votant)
+                if votant in self.votants and not votant.sortie:
+                    self.fermer_votant(votant)
+            if self.votants:
+                self.selecteur.select(min(self.INTERVALLE, max(limite - time.monotonic(), 0)))
+        for votant in list(self.votants):
+            self.fermer_votant(votant)
+        self.selecteur.close()
+        self.ecoute.close()
+
+    def accepter(self):
+        """
+        @brief Accepte les connexions en attente
+        """
+        while True:
+            try:
+                conn, addr = self.ecoute.accept()
+            except OSError:
+                return  # Plus de connexion en attente
+            conn.setblocking(False)
+            votant = Votant(conn)
+            self.votants.add(votant)
+            self.selecteur.register(conn, selectors.EVENT_READ, votant)
+
+    def lire(self, votant):
+        """
+        @brief Traite les lignes reçues d'un votant
+        """
+        try:
+            data = votant.conn.recv(TAILLE_LIGNE)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self.fermer_votant(votant)  # Joueur parti : ses votes restent acquis
+            return
+        votant.entree += data
+        *lignes, votant.entree = votant.entree.split(b'\n')
+        if len(votant.entree) > TAILLE_LIGNE:
+            self.fermer_votant(votant)
+            return
+        for ligne in lignes:
+            ligne = ligne.decode(errors='replace').strip()
+            if not ligne:
+                continue
+            if votant.pseudo is None:
+                votant.pseudo = ligne
+                reponse = {'echeance': self.echeance,
+                           'taches': [[cle, self.backlog[cle]] for cle in self.etat.restantes(ligne)],
+                           'votes': self.etat.votes_de(ligne)}
+            else:
+                cle, _, vote = ligne.rpartition(';')
+                reponse = {'cle': cle, 'accepte': self.voter(votant.pseudo, cle, vote)}
+            votant.sortie += json.dumps(reponse).encode() + b'\n'
+
+    def voter(self, pseudo, cle, vote):
+        """
+        @brief Enregistre un vote reçu ; seules les cartes du jeu sont acceptées (pas de pause café)
+        """
+        if vote not in CARTES:
+            return False
+        with self.verrou:
+            return self.etat.voter(pseudo, cle, vote)
+
+    def envoyer(self, votant):
+        """
+        @brief Envoie sans bloquer les réponses en attente d'un votant
+        """
+        try:
+            while votant.sortie:
+                envoye = votant.conn.send(votant.sortie)
+                votant.sortie = votant.sortie[envoye:]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.fermer_votant(votant)
+            return
+        self.selecteur.modify(votant.conn, selectors.EVENT_READ | (selectors.EVENT_WRITE if votant.sortie else 0), votant)
+
+    def fermer_votant(self, votant):
+        """
+        @brief Ferme la connexion d'un votant
+        """
+        self.votants.discard(votant)
+        try:
+            self.selecteur.unregister(votant.conn)
+            votant.conn.close()
+        except OSError:
+            pass
+
+    def progression(self):
+        """
+        @brief Avancement affiché à l'hôte pendant la fenêtre
+        """
+        with self.verrou:
+            restant = max(0, int(self.echeance - time.time()))
+            return (f"Fenêtre asynchrone : {self.etat.total} votes, {self.etat.en_accord(self.quorum)}/"
+                    f"{len(self.etat.votes)} tâches en accord, {restant // 60} min {restant % 60:02d} s restantes")
+
+    def fermer(self):
+        """
+        @brief Ferme la fenêtre (avant l'échéance si besoin) et décide les tâches
+
+        @return BilanAsynchrone
+        """
+        self.actif = False
+        self.thread.join()
+        return self.bilan
+
+
+class VotantAsynchrone:
+    """
+    @brief Client de la fenêtre asynchrone (ligne de commande, bots et tests).
+    """
+
+    def __init__(self, pseudo, hote='127.0.0.1', port=PORT_ASYNCHRONE, transport=None):
+        """
+        @brief Constructeur de VotantAsynchrone : se connecte et reçoit les tâches à voter.
+
+        @param pseudo Pseudo du joueur (le même à chaque connexion pour retrouver ses votes)
+        @param hote Adresse de l'hôte
+        @param port Port de la fenêtre
+        @param transport Transport utilisé (TCP par défaut)
+        """
+        self.conn = (transport or TransportTCP()).connecter(hote, port)
+        self.lecteur = self.conn.makefile('r', encoding='utf-8')
+        self.conn.sendall(f"{pseudo}\n".encode())
+        accueil = self.recevoir()
+        self.echeance = accueil['echeance']
+        self.taches = accueil['taches']  # [clé, tâche] restant à voter
+        self.votes = accueil['votes']    # Votes donnés lors des connexions précédentes
+
+    def recevoir(self):
+        """
+        @brief Prochaine réponse de l'hôte
+
+        @return Dictionnaire ; {'fin': True} si la fenêtre est fermée
+        """
+        ligne = self.lecteur.readline()
+        return json.loads(ligne) if ligne else {'fin': True}
+
+    def voter(self, cle, vote):
+        """
+        @brief Vote sur une tâche
+
+        @return True si le vote est enregistré, False s'il est refusé ou si la fenêtre est fermée
+        """
+        self.conn.sendall(f"{cle};{vote}\n".encode())
+        reponse = self.recevoir()
+        if reponse.get('accepte'):
+            self.votes[cle] = vote
+        return bool(reponse.get('accepte'))
+
+    def fermer(self):
+        """
+        @brief Se déconnecte ; les votes restent acquis jusqu'à la fermeture de la fenêtre
+        """
+        self.lecteur.close()
+        self.conn.close()
+
+
+def main():
+    """
+    @brief Vote en ligne de commande pendant une fenêtre asynchrone
+    """
+    parser = argparse.ArgumentParser(description="Vote asynchrone Planning Poker")
+    parser.add_argument('hote', help="adresse IP de l'hôte")
+    parser.add_argument('pseudo', help="votre pseudo (le même à chaque connexion)")
+    parser.add_argument('--port', type=int, default=PORT_ASYNCHRONE)
+    args = parser.parse_args()
+
+    votant = VotantAsynchrone(args.pseudo, args.hote, args.port)
+    restant = max(0, int(votant.echeance - time.time()))
+    print(f"{len(votant.taches)} tâche(s) à voter, fenêtre ouverte encore {restant // 60} min")
+    print("Entrée vide : passer la tâche, q : quitter (les votes sont conservés)")
+    try:
+        for cle, tache in votant.taches:
+            vote = input(f"\n{tache}\nVotre vote : ").strip()
+            if vote == 'q':
+                break
+            if vote and not votant.voter(cle, vote):
+                print("Vote refusé (carte numérique attendue, ou fenêtre fermée)")
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        votant.fermer()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+from consensus import MODES, calculer_verdict
+from protocole import collecter_votes, construire_feedback, lire_feedback
+from sauvegarde import sauvegarder_backlogs
+
+FICHIER_RESULTATS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_resultats.json')
+SEUIL_REGRESSION = 1.2  # Un benchmark 20 % plus lent que la version précédente est signalé
+CARTES = ['0', '1', '2', '3', '5', '8', '13', '20', '40', '100', '-1']
+
+
+class FauxClient:
+    """
+    @brief Connexion simulée pour les benchmarks
+
+    recv renvoie toujours le même message, sendall ne fait que compter les octets.
+    """
+
+    def __init__(self, message=b''):
+        """
+        @param message Message renvoyé à chaque appel de recv
+        """
+        self.message = message
+        self.envoye = 0
+
+    def recv(self, taille):
+        return self.message
+
+    def sendall(self, data):
+        self.envoye += len(data)
+
+
+def mesurer(fonction, repetitions=5, nombre=1):
+    """
+    @brief Mesure le temps d'exécution d'une fonction
+
+    @param fonction Fonction sans argument à mesurer
+    @param repetitions Nombre de mesures, la médiane est retenue
+    @param nombre Nombre d'appels par mesure
+    @return Temps médian d'un appel, en secondes
+    """
+    temps = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        for _ in range(nombre):
+            fonction()
+        temps.append((time.perf_counter() - debut) / nombre)
+    return statistics.median(temps)
+
+
+def votes_aleatoires(nb_joueurs):
+    """
+    @brief Génère une liste de [pseudo, vote] déterministe
+
+    @param nb_joueurs Nombre de joueurs
+    @return Liste de [pseudo, vote]
+    """
+    return [[f"Joueur{i}", CARTES[(i * 7) % len(CARTES)]] for i in range(nb_joueurs)]
+
+
+def bench_votes(nb_joueurs):
+    """
+    @brief Collecte d'un vote par joueur, comme collect_votes
+    """
+    clients = [FauxClient(f"Joueur{i};{CARTES[i % len(CARTES)]}".encode()) for i in range(nb_joueurs)]
+    return lambda: collecter_votes(clients)
+
+
+def bench_consensus(mode, nb_joueurs):
+    """
+    @brief Décision d'un tour pour un mode de jeu
+    """
+    votes = [vote for _, vote in votes_aleatoires(nb_joueurs)]
+    return lambda: calculer_verdict(mode, votes)
+
+
+def bench_feedback(nb_joueurs):
+    """
+    @brief Construction et envoi du retour d'un tour à tous les joueurs
+    """
+    full_list = votes_aleatoires(nb_joueurs)
+    clients = [FauxClient() for _ in range(nb_joueurs)]
+
+    def envoyer():
+        data = construire_feedback(False, full_list).encode()
+        for client in clients:
+            client.sendall(data)
+    return envoyer
+
+
+def bench_lecture_feedback(nb_joueurs):
+    """
+    @brief Décodage du retour d'un tour côté client
+    """
+    message = construire_feedback(False, votes_aleatoires(nb_joueurs))
+    return lambda: lire_feedback(message)
+
+
+def bench_sauvegarde(nb_taches, dossier):
+    """
+    @brief Écriture de backlog_output.json et backlog.json en fin de partie
+    """
+    backlog = {str(i + 1): f"Tâche numéro {i + 1} du backlog" for i in range(nb_taches)}
+    resultat = {key: int(CARTES[i % 10]) for i, key in enumerate(backlog) if i % 2 == 0}
+    return lambda: sauvegarder_backlogs(backlog, resultat, True, dossier)
+
+
+def bench_lobby(nb_joueurs):
+    """
+    @brief Diffusion de la salle d'attente à l'arrivée d'un joueur
+    """
+    from joueurs import DiffusionSalon, RegistreJoueurs
+
+    # Arrivée du dernier joueur : la liste complète est diffusée à tous
+    registre = RegistreJoueurs()
+    for i in range(nb_joueurs):
+        registre.ajouter(FauxClient(), f"Joueur{i}")
+    return DiffusionSalon(registre).envoyer
+
+
+def lister_benchmarks(dossier, rapide=False):
+    """
+    @brief Liste des benchmarks à exécuter
+
+    @param dossier Dossier temporaire pour les écritures de fichiers
+    @param rapide Limite les tailles pour une exécution courte
+    @return Liste de tuples (nom, fonction, repetitions, nombre)
+    """
+    joueurs = [10, 100, 1000] if rapide else [10, 100, 1000, 5000]
+    taches = [10, 10_000] if rapide else [10, 10_000, 1_000_000]
+
+    benchmarks = []
+    for n in joueurs:
+        benchmarks.append((f"votes/{n}", bench_votes(n), 5, 100))
+        for mode in MODES:
+            benchmarks.append((f"consensus/{mode}/{n}", bench_consensus(mode, n), 5, 100))
+        benchmarks.append((f"feedback/envoi/{n}", bench_feedback(n), 5, 10))
+        benchmarks.append((f"feedback/lecture/{n}", bench_lecture_feedback(n), 5, 100))
+        benchmarks.append((f"lobby/{n}", bench_lobby(n), 5, 10))
+    for n in taches:
+        benchmarks.append((f"sauvegarde/{n}", bench_sauvegarde(n, dossier), 1 if n >= 1_000_000 else 5, 1))
+    return benchmarks
+
+
+def version_courante():
+    """
+    @brief Identifie la version du code mesurée
+
+    @return Sortie de 'git describe', ou 'inconnue' hors d'un dépôt git
+    """
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'inconnue'
+
+
+def comparer(precedent, actuel):
+    """
+    @brief Compare deux séries de résultats
+
+    @param precedent Résultats de la version précédente {nom: secondes}
+    @param actuel Résultats de la version mesurée {nom: secondes}
+    @return Liste des noms de benchmarks en régression
+    """
+    regressions = []
+    for nom, temps in actuel.items():
+        if nom in precedent and precedent[nom] > 0:
+            ratio = temps / precedent[nom]
+            if ratio > SEUIL_REGRESSION:
+                regressions.append(nom)
+                print(f"RÉGRESSION {nom} : x{ratio:.2f}")
+    return regressions
+
+
+def main():
+    """
+    @brief Exécute les benchmarks, les compare à la version précédente puis les enregistre
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks des chemins critiques du Planning Poker")
+    parser.add_argument('--rapide', action='store_true', help="tailles réduites (sans 5000 joueurs ni 1M de tâches)")
+    parser.add_argument('--version', default=None, help="nom de la version mesurée (git describe par défaut)")
+    parser.add_argument('--strict', action='store_true', help="code de sortie 1 en cas de régression")
+    parser.add_argument('--sans-sauvegarde', action='store_true', help="ne pas enregistrer les résultats")
+    args = parser.parse_args()
+
+    resultats = {}
+    with tempfile.TemporaryDirectory() as dossier:
+        for nom, fonction, repetitions, nombre in lister_benchmarks(dossier, args.rapide):
+            resultats[nom] = mesurer(fonction, repetitions, nombre)
+            print(f"{nom:<45} {resultats[nom] * 1e6:>14.1f} µs")
+
+    historique = []
+    if os.path.exists(FICHIER_RESULTATS):
+        with open(FICHIER_RESULTATS, 'r', encoding='utf-8') as f:
+            historique = json.load(f)
+
+    regressions = comparer(historique[-1]['resultats'], resultats) if historique else []
+
+    if not args.sans_sauvegarde:
+        historique.append({
+            'version': args.version or version_courante(),
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'rapide': args.rapide,
+            'resultats': resultats,
+        })
+        with open(FICHIER_RESULTATS, 'w', encoding='utf-8') as f:
+            json.dump(historique, f, ensure_ascii=False, indent=4)
+
+    if args.strict and regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import re
+import threading
+import time
+from collections import deque
+
+from compression import lire_connexion
+from enregistrement import Enregistreur, meta_estimations
+from moteur import MoteurPartie
+from protocole import TAG_START, TAG_NEW, TAG_FEEDBACK, TAG_END, TAG_PRET, lire_feedback
+from degradation import ProxyDegrade
+from transport import TransportMemoire, TransportTCP
+
+# Tags du protocole : séparent les messages arrivés ensemble sur un réseau lent
+TAGS = re.compile('(' + '|'.join(re.escape(tag) for tag in (TAG_START, TAG_NEW, TAG_FEEDBACK, TAG_END)) + ')')
+
+
+class JoueurBot:
+    """
+    @brief Joueur automatique parlant le même protocole que ClientGame.
+
+    Sert aux simulations et aux tests : il se connecte, attend le lancement de la
+    partie puis répond à chaque question avec le vote donné par sa stratégie.
+    """
+
+    def __init__(self, pseudo, transport, hote='127.0.0.1', port=16383, strategie=None, pret=False, parties=1):
+        """
+        @brief Constructeur de JoueurBot.
+
+        @param pseudo Pseudo du joueur
+        @param transport Transport utilisé pour se connecter
+        @param hote Adresse de l'hôte
+        @param port Port de l'hôte
+        @param strategie Fonction strategie(question, numero_tour) -> vote (vote '5' par défaut)
+        @param pret Se déclare prêt dès le début de chaque discussion
+        @param parties Nombre de parties jouées sur la même connexion avant de la fermer
+        """
+        self.pseudo = pseudo
+        self.transport = transport
+        self.hote = hote
+        self.port = port
+        self.strategie = strategie or (lambda question, tour: '5')
+        self.pret = pret
+        self.parties = parties
+        self.conn = None
+        self.questions = []   # Questions reçues, dans l'ordre
+        self.feedbacks = []   # Retours (condition, votes) reçus
+        self.messages = deque()  # Messages reçus ensemble, pas encore traités
+        self.fin = threading.Event()
+
+    def connecter(self):
+        """
+        @brief Se connecte à l'hôte et envoie le pseudo
+        """
+        self.conn = self.transport.connecter(self.hote, self.port)
+        self.conn.sendall(self.pseudo.encode())
+
+    def demarrer(self):
+        """
+        @brief Se connecte puis joue les parties dans un thread dédié
+
+        @return Le thread du bot
+        """
+        self.connecter()
+        thread = threading.Thread(target=self.jouer, daemon=True)
+        thread.start()
+        return thread
+
+    def jouer(self):
+        """
+        @brief Suit les parties jusqu'au dernier tag @@END@@, sur la même connexion
+        """
+        for _ in range(self.parties):
+            if not self.jouer_partie():
+                break
+
+        self.conn.close()
+        self.fin.set()
+
+    def jouer_partie(self):
+        """
+        @brief Suit une partie, du salon d'attente au tag @@END@@
+
+        @return False si l'hôte a fermé la connexion
+        """
+        # Salle d'attente : listes de pseudos jusqu'au lancement
+        message = self.recevoir()
+        while message not in (TAG_START, ''):
+            message = self.recevoir()
+        if not message:
+            return False
+
+        self.recevoir()  # Temps de vote et de discussion
+
+        tour = 0
+        while True:
+            message = self.recevoir()
+            if message == TAG_END:
+                return True
+            elif not message:
+                return False
+            elif message == TAG_NEW:
+                continue
+            elif message == TAG_FEEDBACK:
+                condition, votes = lire_feedback(self.recevoir())
+                self.feedbacks.append((condition, votes))
+                tour = 0 if condition else tour + 1
+                if self.pret and not condition:
+                    self.conn.sendall(f"{TAG_PRET}\n".encode())
+            else:
+                self.questions.append(message)
+                self.conn.sendall(f"{self.pseudo};{self.strategie(message, tour)}".encode())
+
+    def recevoir(self):
+        """
+        @brief Prochain message de l'hôte
+
+        Les messages arrivés dans un même envoi (réseau lent, voir degradation.py)
+        sont séparés sur les tags du protocole.
+
+        @return Le message, '' si la connexion est fermée
+        """
+        while not self.messages:
+            data = self.conn.recv(65536)
+            if not data:
+                return ''
+            self.messages.extend(morceau for morceau in TAGS.split(data.decode()) if morceau)
+        return self.messages.popleft()
+
+
+def accepter_joueurs(ecoute, nb_joueurs):
+    """
+    @brief Accepte des joueurs comme le fait HostGame.handle_client
+
+    @param ecoute Point d'écoute du transport
+    @param nb_joueurs Nombre de joueurs attendus
+    @return Tuple (connexions, pseudos)
+    """
+    clients, pseudos = [], []
+    while len(clients) < nb_joueurs:
+        conn, addr = ecoute.accept()
+        pseudos.append(lire_connexion(conn.recv(1024).decode())[0])
+        clients.append(conn)
+    return clients, pseudos
+
+
+def simuler_partie(backlog, strategies, mode='Majorité absolue', transport=None, port=16383, historique=None,
+                   enregistrement=None, reseau=None, delai_votes=30, discussion_anticipee=False, asynchrone=None,
+                   index_rappel=None, rappel_auto=False, ingestion=None):
+    """
+    @brief Joue une partie complète dans le processus courant, sans attente
+
+    À travers un réseau simulé, l'hôte laisse entre deux étapes le temps au message
+    précédent d'arriver seul : les paramètres de la partie n'ont pas de tag qui les
+    sépare de la première question.
+
+    @param backlog Backlog à estimer {clé: tâche}
+    @param strategies Dictionnaire {pseudo: strategie} des bots
+    @param mode Mode de jeu
+    @param transport Transport utilisé (en mémoire par défaut, TCP avec reseau)
+    @param port Port de la partie (0 : port libre choisi par le système, en TCP)
+    @param historique HistoriqueStore optionnel
+    @param enregistrement Fichier où enregistrer les messages de la partie (optionnel)
+    @param reseau ProfilReseau : les bots passent par un ProxyDegrade, ce qui impose TransportTCP (optionnel)
+    @param delai_votes Délai maximal de collecte des votes d'un tour (secondes) : un bot bloqué n'immobilise pas la partie
+    @param discussion_anticipee Les bots se déclarent prêts : chaque discussion s'arrête dès qu'ils le sont tous
+    @param asynchrone BilanAsynchrone d'une fenêtre de vote ouverte avant la partie (optionnel)
+    @param index_rappel IndexSimilarite des tâches déjà estimées (optionnel)
+    @param rappel_auto Fait confirmer par un vote les estimations des tâches quasi identiques
+    @param ingestion IngestionBacklog : tâches ajoutées au backlog pendant la partie (optionnel)
+    @return Tuple (moteur, bots) une fois la partie terminée
+    """
+    proxy = None
+    pause = 0
+    if reseau:
+        if transport is not None and not isinstance(transport, TransportTCP):
+            raise ValueError(f"Le réseau simulé passe par un proxy TCP : transport {transport.nom} incompatible")
+        transport = transport or TransportTCP()
+        pause = reseau.gigue + reseau.duree_blocage + 0.1
+    transport = transport or TransportMemoire()
+    ecoute = transport.ecouter('127.0.0.1', port)
+    try:
+        if hasattr(ecoute, 'getsockname'):
+            port = ecoute.getsockname()[1]  # Port effectif si 0 a été demandé
+        if reseau:
+            proxy = ProxyDegrade(port, profil=reseau)
+        port_bots = proxy.port if proxy else port
+        bots = [JoueurBot(pseudo, transport, port=port_bots, strategie=strategie, pret=discussion_anticipee)
+                for pseudo, strategie in strategies.items()]
+        threads = [bot.demarrer() for bot in bots]
+        clients, pseudos = accepter_joueurs(ecoute, len(bots))
+    finally:
+        ecoute.close()
+
+    for client in clients:
+        client.sendall(TAG_START.encode())
+    time.sleep(pause)
+
+    enregistreur = None
+    if enregistrement:
+        meta = meta_estimations(index_rappel, rappel_auto, asynchrone, delai_votes, getattr(ingestion, 'source', None))
+        enregistreur = Enregistreur(enregistrement, {'backlog': backlog, 'mode': mode, 'pseudos': pseudos,
+                                                     'temps_vote': 30, 'temps_discussion': 60, **meta})
+        clients = enregistreur.envelopper(clients)
+        ingestion = enregistreur.envelopper_ingestion(ingestion)
+
+    moteur = MoteurPartie(clients, backlog, mode, 30, 60, historique=historique,
+                          afficher=lambda texte, couleur='white': None,
+                          attendre=None if discussion_anticipee else lambda secondes: None, pause=pause,
+                          delai_votes=delai_votes, discussion_anticipee=discussion_anticipee, asynchrone=asynchrone,
+                          index_rappel=index_rappel, rappel_auto=rappel_auto, ingestion=ingestion)
+    try:
+        moteur.executer()
+    finally:
+        if enregistreur:
+            enregistreur.fermer(moteur.resultat, moteur.paused)
+
+    for thread in threads:
+        thread.join(timeout=5)
+    for client in clients:
+        client.close()
+    if proxy:
+        proxy.fermer()
+    return moteur, bots
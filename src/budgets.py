@@ -0,0 +1,54 @@
+import math
+
+from historique import lire_durees
+
+QUANTILE = 0.95        # Les budgets couvrent 95 % des tours observés
+MARGE = 1.2            # Marge ajoutée au quantile
+MIN_ECHANTILLONS = 20  # En dessous, pas de proposition
+TEMPS_MINIMAL = 5      # Budget minimal proposé (secondes)
+
+
+def quantile(valeurs, q):
+    """
+    @brief Quantile d'une liste de valeurs (valeur observée, sans interpolation)
+
+    @param valeurs Liste non vide de valeurs
+    @param q Quantile entre 0 et 1
+    @return La valeur
+    """
+    valeurs = sorted(valeurs)
+    return valeurs[min(int(len(valeurs) * q), len(valeurs) - 1)]
+
+
+def proposer_temps(durees, actuel, q=QUANTILE, marge=MARGE, minimum=TEMPS_MINIMAL):
+    """
+    @brief Budget proposé à partir des durées observées
+
+    Le budget n'est jamais allongé : il est au plus égal au budget actuel.
+
+    @param durees Durées observées (secondes)
+    @param actuel Budget actuel (secondes)
+    @param q Quantile des durées à couvrir
+    @param marge Facteur appliqué au quantile
+    @param minimum Budget minimal
+    @return Budget proposé en secondes entières, ou None si les observations sont insuffisantes
+    """
+    if len(durees) < MIN_ECHANTILLONS:
+        return None
+    return max(minimum, min(int(actuel), math.ceil(quantile(durees, q) * marge)))
+
+
+def proposer_budgets(temps_vote, temps_discussion, chemin_historique='./historique.db'):
+    """
+    @brief Temps de vote et de discussion proposés d'après l'historique
+
+    Le temps de vote couvre le délai jusqu'au dernier vote d'un tour ; le temps de
+    discussion, les discussions terminées lorsque tous les joueurs étaient prêts.
+
+    @param temps_vote Temps de vote actuel (secondes)
+    @param temps_discussion Temps de discussion actuel (secondes)
+    @param chemin_historique Base SQLite de l'historique
+    @return Tuple (temps de vote, temps de discussion), None pour un temps sans proposition
+    """
+    return (proposer_temps(lire_durees('vote', chemin_historique), temps_vote),
+            proposer_temps(lire_durees('discussion', chemin_historique), temps_discussion))
@@ -0,0 +1,440 @@
+import argparse
+import curses
+import json
+import queue
+import threading
+import time
+
+from compression import ROLE_SPECTATEUR, Decompresseur, construire_connexion
+from multicast import TAG_REPAIR, RecepteurMulticast, LecteurTrames
+from protocole import TAG_START, TAG_NEW, TAG_FEEDBACK, TAG_END, TAG_PRET, lire_feedback
+from synthese import synthese_votes
+from transport import transport_par_defaut
+
+# Cartes dans l'ordre d'affichage, avec leur raccourci clavier
+CARTES = [('0', '0'), ('1', '1'), ('2', '2'), ('3', '3'), ('5', '5'), ('8', '8'), ('a', '13'), ('b', '20'),
+          ('c', '40'), ('d', '100'), ('?', '-1'), ('k', 'cafe')]
+RACCOURCIS = dict(CARTES)
+ATTENTE_REPARATIONS = 5  # Délai maximal de lecture des dernières réparations multicast en fin de partie (secondes)
+
+
+def lire_touche(touche):
+    """
+    @brief Carte associée à une touche
+
+    @param touche Code de la touche (curses)
+    @return Valeur de la carte, ou None si la touche n'est pas un raccourci
+    """
+    if 0 <= touche < 256:
+        return RACCOURCIS.get(chr(touche))
+    return None
+
+
+class SessionTerminal:
+    """
+    @brief Partie côté joueur, sans interface : même protocole que ClientGame.
+
+    Un thread lit les messages de l'hôte et les transforme en événements placés
+    dans une file, consommée par l'affichage :
+    ('lobby', pseudos), ('debut', temps_vote, temps_discussion), ('question', texte),
+    ('feedback', condition, votes), ('nouveau',), ('fin',), ('erreur', message).
+    Un spectateur reçoit à la place l'état de la partie : ('etat', dictionnaire).
+    """
+
+    def __init__(self, hote, pseudo, port=16383, transport=None, spectateur=False):
+        """
+        @brief Constructeur de SessionTerminal.
+
+        @param hote Adresse IP de l'hôte
+        @param pseudo Pseudo du joueur
+        @param port Port de l'hôte
+        @param transport Transport utilisé (TCP par défaut)
+        @param spectateur True pour suivre la partie sans voter
+        """
+        self.hote = hote
+        self.pseudo = pseudo
+        self.port = port
+        self.transport = transport or transport_par_defaut()
+        self.evenements = queue.Queue()
+        self.decompresseur = Decompresseur()
+        self.recepteur = None
+        self.thread_reparations = None
+        self.reste = b''
+        self.verrou_envoi = threading.Lock()
+        self.conn = None
+        self.spectateur = spectateur
+        self.parties = 0  # Parties commencées sur cette connexion
+
+    def demarrer(self):
+        """
+        @brief Se connecte à l'hôte et lance le thread de réception
+        """
+        self.conn = self.transport.connecter(self.hote, self.port)
+        role = ROLE_SPECTATEUR if self.spectateur else None
+        self.conn.sendall(construire_connexion(self.pseudo, role=role, references=not self.spectateur).encode())
+        threading.Thread(target=self.observer if self.spectateur else self.ecouter, daemon=True).start()
+
+    def ecouter(self):
+        """
+        @brief Suit les parties de l'hôte jusqu'à la fermeture de la connexion
+        """
+        try:
+            while self.suivre_partie():
+                self.preparer_partie_suivante()
+        except (OSError, ValueError, IndexError) as e:
+            self.evenements.put(('erreur', str(e)))
+        except KeyError as e:
+            # Question désignée par une position dont l'intitulé n'a pas été préchargé
+            self.evenements.put(('erreur', f"Intitulé de la tâche {e} non reçu de l'hôte"))
+
+    def suivre_partie(self):
+        """
+        @brief Suit une partie, du salon d'attente au tag @@END@@
+
+        @return True si la connexion reste ouverte pour la partie suivante
+        """
+        # Salle d'attente
+        while True:
+            data = self.conn.recv(1024).decode()
+            if data == TAG_START:
+                break
+            if not data:
+                if self.parties:
+                    return False  # Hôte fermé après une partie terminée
+                raise ConnectionError("Connexion fermée par l'hôte")
+            self.evenements.put(('lobby', data.split(';')))
+        self.parties += 1
+
+        parametres = self.conn.recv(1024).decode().partition('|')[0].split(':')
+        if len(parametres) == 4:
+            # Diffusion multicast : TCP ne sert plus qu'aux réparations
+            self.recepteur = RecepteurMulticast(parametres[2], int(parametres[3]), self.demander_reparation)
+            self.recepteur.demarrer()
+            self.thread_reparations = threading.Thread(target=self.lire_reparations, daemon=True)
+            self.thread_reparations.start()
+        self.evenements.put(('debut', int(parametres[0]), int(parametres[1])))
+
+        while True:
+            message = self.recevoir()
+            if message == TAG_END or not message:
+                break
+            elif message == TAG_NEW:
+                self.evenements.put(('nouveau',))
+            elif message == TAG_FEEDBACK:
+                condition, votes = lire_feedback(self.recevoir())
+                self.evenements.put(('feedback', condition, votes))
+            else:
+                self.evenements.put(('question', message))
+        self.evenements.put(('fin',))
+        return message == TAG_END
+
+    def preparer_partie_suivante(self):
+        """
+        @brief Oublie l'état propre à la partie terminée, en gardant la connexion à l'hôte
+        """
+        if self.recepteur:
+            # La fin de partie envoyée par TCP termine la lecture des réparations
+            self.thread_reparations.join(ATTENTE_REPARATIONS)
+            self.recepteur.fermer()
+            self.recepteur = None
+        self.decompresseur = Decompresseur()
+        self.reste = b''
+
+    def observer(self):
+        """
+        @brief Suit les parties en spectateur : une ligne JSON par état, seul le plus récent compte
+
+        L'hôte garde ses spectateurs d'une partie à l'autre : le suivi dure jusqu'à la fermeture de la connexion.
+        """
+        try:
+            tampon = b''
+            while True:
+                data = self.conn.recv(65536)
+                if not data:
+                    break
+                *lignes, tampon = (tampon + data).split(b'\n')
+                for ligne in lignes:
+                    self.evenements.put(('etat', json.loads(ligne)))
+            self.evenements.put(('fin',))
+        except (OSError, ValueError) as e:
+            self.evenements.put(('erreur', str(e)))
+
+    def recevoir(self):
+        """
+        @brief Prochain message de l'hôte (multicast, trame compressée ou message brut)
+
+        @return Le message
+        """
+        if self.recepteur:
+            return self.recepteur.lire()
+        if self.reste:
+            data, self.reste = self.reste, b''
+        else:
+            data = self.conn.recv(1024)
+        message, self.reste = self.decompresseur.decouper(data, self.conn.recv)
+        return self.recevoir() if message is None else self.decompresseur.resoudre(message)
+
+    def voter(self, vote):
+        """
+        @brief Envoie un vote à l'hôte
+
+        @param vote Valeur de la carte
+        """
+        with self.verrou_envoi:
+            self.conn.sendall(f"{self.pseudo};{vote}".encode())
+
+    def signaler_pret(self):
+        """
+        @brief Signale à l'hôte que le joueur est prêt à passer à la suite (pendant la discussion)
+        """
+        with self.verrou_envoi:
+            self.conn.sendall(f"{TAG_PRET}\n".encode())
+
+    def demander_reparation(self, seq):
+        """
+        @brief Demande à l'hôte de renvoyer les trames multicast manquantes
+        """
+        with self.verrou_envoi:
+            self.conn.sendall(f"{TAG_REPAIR}{seq}\n".encode())
+
+    def lire_reparations(self):
+        """
+        @brief Lit les trames renvoyées par l'hôte sur la connexion TCP
+        """
+        lecteur = LecteurTrames()
+        while True:
+            try:
+                data = self.conn.recv(65536)
+            except OSError:
+                break
+            if not data:
+                break
+            for seq, message in lecteur.ajouter(data):
+                self.recepteur.injecter(seq, message)
+                if message == TAG_END:
+                    self.recepteur.forcer(TAG_END)
+                    return  # Dernier message de la partie : la connexion sert ensuite au salon
+
+    def fermer(self):
+        """
+        @brief Ferme la connexion
+        """
+        if self.recepteur:
+            self.recepteur.fermer()
+        if self.conn:
+            self.conn.close()
+
+
+class ClientTerminal:
+    """
+    @brief Client Planning Poker en mode texte (curses), pour les joueurs connectés par SSH.
+    """
+
+    def __init__(self, session):
+        """
+        @brief Constructeur de ClientTerminal.
+
+        @param session SessionTerminal connectée
+        """
+        self.session = session
+        self.phase = 'lobby'
+        self.pseudos = []
+        self.temps_vote = 0
+        self.temps_discussion = 0
+        self.question = ''
+        self.votes = []
+        self.condition = True
+        self.echeance = None   # Fin du décompte en cours (horloge monotone)
+        self.selection = 0
+        self.message = ''
+        self.etat = None  # Dernier état reçu en spectateur
+        self.pret = False  # Prêt signalé pendant la discussion en cours
+        self.synthese = ([], [], 0)  # Répartition des votes du dernier tour et écarts
+
+    def executer(self, ecran):
+        """
+        @brief Boucle d'affichage et de saisie
+
+        @param ecran Fenêtre curses principale
+        """
+        curses.curs_set(0)
+        ecran.timeout(250)  # getch rend la main 4 fois par seconde pour les décomptes
+        while True:
+            self.traiter_evenements()
+            self.verifier_decompte()
+            self.dessiner(ecran)
+            touche = ecran.getch()
+            if touche == -1:
+                continue
+            if self.phase in ('fin', 'erreur'):
+                break
+            if self.phase == 'vote':
+                self.choisir(touche)
+            elif self.phase == 'discussion' and touche in (curses.KEY_ENTER, 10, 13) and not self.pret:
+                self.session.signaler_pret()
+                self.pret, self.message = True, "Prêt : en attente des autres joueurs"
+
+    def traiter_evenements(self):
+        """
+        @brief Applique les événements reçus de l'hôte
+        """
+        while True:
+            try:
+                evenement = self.session.evenements.get_nowait()
+            except queue.Empty:
+                return
+            match evenement:
+                case ('lobby', pseudos):
+                    self.pseudos = pseudos
+                case ('etat', etat):
+                    self.etat, self.phase = etat, 'spectateur'
+                case ('debut', temps_vote, temps_discussion):
+                    self.temps_vote, self.temps_discussion = temps_vote, temps_discussion
+                    self.question, self.votes, self.message = '', [], ''
+                    self.phase = 'attente'
+                case ('question', texte):
+                    self.question, self.votes = texte, []
+                    self.phase = 'vote'
+                    self.echeance = time.monotonic() + self.temps_vote
+                case ('feedback', condition, votes):
+                    self.condition, self.votes = condition, votes
+                    self.synthese = synthese_votes(votes)
+                    self.phase = 'resultat' if condition else 'discussion'
+                    self.pret = False
+                    self.echeance = None if condition else time.monotonic() + self.temps_discussion
+                case ('nouveau',):
+                    self.phase, self.echeance = 'attente', None
+                case ('fin',):
+                    self.phase, self.message = 'fin', "Fin de la partie : toutes les tâches ont été enregistrées sur le serveur"
+                case ('erreur', texte):
+                    self.phase, self.message = 'erreur', f"Erreur : {texte}"
+
+    def verifier_decompte(self):
+        """
+        @brief Envoie un vote nul lorsque le temps de vote est écoulé, comme ClientGame
+        """
+        if self.phase == 'vote' and time.monotonic() >= self.echeance:
+            self.envoyer('0')
+
+    def choisir(self, touche):
+        """
+        @brief Sélection d'une carte au clavier (flèches + Entrée, ou raccourci)
+
+        @param touche Code de la touche
+        """
+        if touche == curses.KEY_LEFT:
+            self.selection = (self.selection - 1) % len(CARTES)
+        elif touche == curses.KEY_RIGHT:
+            self.selection = (self.selection + 1) % len(CARTES)
+        elif touche in (curses.KEY_ENTER, 10, 13):
+            self.envoyer(CARTES[self.selection][1])
+        else:
+            vote = lire_touche(touche)
+            if vote is not None:
+                self.envoyer(vote)
+
+    def envoyer(self, vote):
+        """
+        @brief Envoie le vote et passe en attente des autres joueurs
+        """
+        try:
+            self.session.voter(vote)
+            self.phase, self.echeance = 'attente', None
+            self.message = f"Vote envoyé : {vote}"
+        except OSError as e:
+            self.phase, self.message = 'erreur', f"Erreur lors de l'envoi du vote : {e}"
+
+    def dessiner(self, ecran):
+        """
+        @brief Redessine l'écran
+        """
+        ecran.erase()
+        hauteur, largeur = ecran.getmaxyx()
+        lignes = [f"Planning Poker - {self.session.pseudo}", '']
+
+        if self.session.spectateur and self.phase in ('lobby', 'spectateur'):
+            lignes += self.lignes_spectateur()
+        elif self.phase == 'lobby':
+            lignes += ["En attente du démarrage de la partie...", '', "Joueurs :"]
+            lignes += [f"  {pseudo}" for pseudo in self.pseudos]
+        else:
+            if self.question:
+                lignes += ["Question :"] + [f"  {ligne}" for ligne in self.question.splitlines()] + ['']
+            restant = max(0, int(self.echeance - time.monotonic()) + 1) if self.echeance else None
+            if self.phase == 'vote':
+                lignes.append(f"Temps restant : {restant}")
+                lignes.append(' '.join(f"[{valeur}]" if i == self.selection else f" {valeur} "
+                                       for i, (touche, valeur) in enumerate(CARTES)))
+                lignes.append("Raccourcis : " + ' '.join(f"{touche}={valeur}" for touche, valeur in CARTES))
+            elif self.phase == 'attente':
+                lignes.append("En attente des autres votes...")
+            elif self.phase == 'discussion':
+                lignes.append(f"Pas de consensus - temps de discussion : {restant}")
+                if not self.pret:
+                    lignes.append("Entrée : je suis prêt à passer à la suite")
+            if self.votes and self.phase in ('resultat', 'discussion'):
+                histogramme, ecarts, nb_ecarts = self.synthese
+                lignes += ['', "Votes : " + "  ".join(f"{carte} x{nombre}" for carte, nombre in histogramme)]
+                if ecarts:
+                    lignes.append("Écarts : " + ", ".join(f"{pseudo} ({vote})" for pseudo, vote in ecarts))
+                # Tableau limité à la hauteur du terminal
+                lignes += ['', f"{'Joueur':<20} Vote"] + [f"{pseudo:<20} {vote}" for pseudo, vote in self.votes[:hauteur]]
+
+        lignes += ['', self.message]
+        if self.phase in ('fin', 'erreur'):
+            lignes.append("Appuyez sur une touche pour quitter")
+            if self.phase == 'fin' and not self.session.spectateur:
+                lignes.append("La partie suivante commencera dès que l'hôte la lancera")
+
+        for y, ligne in enumerate(lignes[:hauteur]):
+            try:
+                ecran.addnstr(y, 0, ligne, largeur - 1)
+            except curses.error:
+                pass  # Terminal trop petit
+        ecran.refresh()
+
+    def lignes_spectateur(self):
+        """
+        @brief Lignes affichées à un spectateur : état courant de la partie
+        """
+        etat = self.etat
+        if not etat or etat['phase'] == 'attente':
+            return ["Spectateur - en attente du démarrage de la partie..."]
+        lignes = [f"Spectateur - {etat['joueurs']} joueurs, mode {etat['mode']}",
+                  f"Tâches estimées : {etat['estimees']}/{etat['total']}", '']
+        if etat['question']:
+            lignes += [f"Tâche {etat['tache']} (tour {etat['tours'] + (etat['phase'] == 'vote')}) :"]
+            lignes += [f"  {ligne}" for ligne in etat['question'].splitlines()] + ['']
+        restant = max(0, int(etat['echeance'] - time.time()) + 1) if etat['echeance'] else None
+        if etat['phase'] == 'vote':
+            lignes.append(f"Vote en cours - temps restant : {restant}")
+        elif etat['phase'] == 'discussion':
+            lignes.append(f"Pas de consensus - temps de discussion : {restant}")
+        if etat['feedback'] and etat['phase'] in ('resultat', 'discussion'):
+            lignes += ['', f"{'Joueur':<20} Vote"] + [f"{pseudo:<20} {vote}" for pseudo, vote in etat['feedback']]
+        if etat['phase'] == 'fin':
+            lignes.append("Partie terminée - en attente de la partie suivante...")
+        return lignes
+
+
+def main():
+    """
+    @brief Lance le client terminal
+    """
+    parser = argparse.ArgumentParser(description="Client Planning Poker en mode texte")
+    parser.add_argument('hote', help="adresse IP de l'hôte")
+    parser.add_argument('pseudo', help="votre pseudo")
+    parser.add_argument('--port', type=int, default=16383)
+    parser.add_argument('--spectateur', action='store_true', help="suivre la partie sans voter")
+    args = parser.parse_args()
+
+    session = SessionTerminal(args.hote, args.pseudo, args.port, spectateur=args.spectateur)
+    session.demarrer()
+    try:
+        curses.wrapper(ClientTerminal(session).executer)
+    finally:
+        session.fermer()
+
+
+if __name__ == "__main__":
+    main()
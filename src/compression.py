@@ -0,0 +1,281 @@
+import json
+import struct
+import zlib
+
+from protocole import TAG_TACHE
+
+try:
+    import zstandard
+except ImportError:  # zstd est facultatif : zlib est toujours disponible
+    zstandard = None
+
+MARQUEUR = b'@@Z@@'
+ENTETE = struct.Struct('!BBI')  # codec, genre, longueur de la charge utile
+SEPARATEUR_CAPACITES = '\n'  # Le pseudo ne peut pas contenir de saut de ligne
+PREFIXE_CAPACITES = 'COMP='
+PREFIXE_ROLE = 'ROLE='
+PREFIXE_REFERENCES = 'REF='
+ROLE_SPECTATEUR = 'spectateur'
+
+SEUIL = 256  # Taille en octets à partir de laquelle un message est compressé
+TAILLE_DICTIONNAIRE = 32768  # Fenêtre de zlib : au-delà, le dictionnaire n'est pas utilisé
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODECS = {'zlib': CODEC_ZLIB, 'zstd': CODEC_ZSTD}
+PREFERENCES = ['zstd', 'zlib'] if zstandard else ['zlib']  # Codecs disponibles, du meilleur au moins bon
+
+GENRE_MESSAGE = 0
+GENRE_DICTIONNAIRE = 1
+GENRE_TACHES = 2  # Fenêtre d'intitulés de tâches {position: intitulé}, en JSON
+
+
+def construire_connexion(pseudo, codecs=PREFERENCES, role=None, references=False):
+    """
+    @brief Message de connexion d'un joueur : pseudo suivi des codecs qu'il sait décompresser
+
+    @param pseudo Pseudo du joueur
+    @param codecs Codecs proposés
+    @param role Rôle demandé (ROLE_SPECTATEUR), joueur par défaut
+    @param references True si le joueur accepte les questions désignées par position (prechargement.py)
+    @return Message 'pseudo\\nCOMP=zstd,zlib' (suivi de '\\nROLE=spectateur', '\\nREF=1')
+    """
+    message = f"{pseudo}{SEPARATEUR_CAPACITES}{PREFIXE_CAPACITES}{','.join(codecs)}"
+    if role:
+        message += f"{SEPARATEUR_CAPACITES}{PREFIXE_ROLE}{role}"
+    if references:
+        message += f"{SEPARATEUR_CAPACITES}{PREFIXE_REFERENCES}1"
+    return message
+
+
+def lire_connexion(message):
+    """
+    @brief Sépare le pseudo et les codecs proposés par un joueur
+
+    Un joueur qui n'envoie que son pseudo ne propose aucun codec.
+
+    @param message Message de connexion
+    @return Tuple (pseudo, liste des codecs)
+    """
+    pseudo, *capacites = message.split(SEPARATEUR_CAPACITES)
+    for capacite in capacites:
+        if capacite.startswith(PREFIXE_CAPACITES):
+            return pseudo, [codec for codec in capacite[len(PREFIXE_CAPACITES):].split(',') if codec]
+    return pseudo, []
+
+
+def lire_option(message, prefixe):
+    """
+    @brief Valeur d'une capacité annoncée dans un message de connexion
+
+    @param message Message de connexion
+    @param prefixe Préfixe de la capacité ('ROLE=', 'REF='...)
+    @return La valeur, ou None si elle n'est pas annoncée
+    """
+    for capacite in message.split(SEPARATEUR_CAPACITES)[1:]:
+        if capacite.startswith(prefixe):
+            return capacite[len(prefixe):]
+    return None
+
+
+def lire_role(message):
+    """
+    @brief Rôle demandé dans un message de connexion
+
+    @param message Message de connexion
+    @return Le rôle (ROLE_SPECTATEUR), ou None pour un joueur
+    """
+    return lire_option(message, PREFIXE_ROLE)
+
+
+def lire_references(message):
+    """
+    @brief Indique si le joueur accepte les questions désignées par position
+
+    @param message Message de connexion
+    @return True si le joueur précharge les intitulés des tâches
+    """
+    return lire_option(message, PREFIXE_REFERENCES) == '1'
+
+
+def negocier(codecs):
+    """
+    @brief Choisit le meilleur codec commun à l'hôte et au joueur
+
+    @param codecs Codecs proposés par le joueur
+    @return Nom du codec, ou None si le joueur ne compresse pas
+    """
+    for codec in PREFERENCES:
+        if codec in codecs:
+            return codec
+    return None
+
+
+def construire_dictionnaire(backlog):
+    """
+    @brief Dictionnaire partagé, amorcé par les textes du backlog et les tags du protocole
+
+    @param backlog Backlog {clé: tâche}
+    @return Dictionnaire brut (32 Ko au plus)
+    """
+    texte = '@@NEW@@@@FEEDBACK@@@@END@@' + ''.join(str(tache) for tache in backlog.values())
+    return texte.encode()[-TAILLE_DICTIONNAIRE:]
+
+
+def encoder_trame(codec, genre, charge):
+    """
+    @brief Trame compressée : marqueur, codec, genre, longueur puis charge utile
+    """
+    return MARQUEUR + ENTETE.pack(codec, genre, len(charge)) + charge
+
+
+class Compression:
+    """
+    @brief Compression des messages de l'hôte, par joueur selon le codec négocié.
+
+    Les messages plus longs que le seuil sont compressés avec un dictionnaire
+    amorcé par le backlog, envoyé une fois à chaque joueur en début de partie.
+    Le dernier message encodé est conservé pour ne le compresser qu'une fois par
+    codec lors d'une diffusion.
+    """
+
+    def __init__(self, backlog, seuil=SEUIL):
+        """
+        @brief Constructeur de Compression.
+
+        @param backlog Backlog de la partie
+        @param seuil Taille en octets à partir de laquelle un message est compressé
+        """
+        self.dictionnaire = construire_dictionnaire(backlog)
+        self.seuil = seuil
+        self.codecs = {}   # connexion -> codec
+        self.cache = {}    # codec -> (message, trame)
+        self.zstd = None
+        if zstandard:
+            dictionnaire = zstandard.ZstdCompressionDict(self.dictionnaire, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+            self.zstd = zstandard.ZstdCompressor(dict_data=dictionnaire)
+
+    def inscrire(self, conn, codec):
+        """
+        @brief Associe le codec négocié à une connexion
+
+        @param conn Connexion du joueur
+        @param codec Nom du codec, ou None
+        """
+        if codec in CODECS:
+            self.codecs[conn] = codec
+
+    def envoyer_dictionnaires(self, clients):
+        """
+        @brief Envoie le dictionnaire aux joueurs qui compressent
+
+        @param clients Connexions des joueurs
+        """
+        trame = encoder_trame(CODEC_ZLIB, GENRE_DICTIONNAIRE, zlib.compress(self.dictionnaire))
+        for client in clients:
+            if client in self.codecs:
+                client.sendall(trame)
+
+    def encoder(self, conn, message):
+        """
+        @brief Octets à envoyer à un joueur pour un message
+
+        @param conn Connexion du joueur
+        @param message Message texte
+        @return Message brut, ou trame compressée s'il dépasse le seuil et que le joueur compresse
+        """
+        data = message.encode()
+        codec = self.codecs.get(conn)
+        if codec is None or len(data) < self.seuil:
+            return data
+
+        dernier = self.cache.get(codec)
+        if dernier and dernier[0] == message:
+            return dernier[1]
+
+        if codec == 'zstd':
+            charge = self.zstd.compress(data)
+        else:
+            compresseur = zlib.compressobj(9, zdict=self.dictionnaire)
+            charge = compresseur.compress(data) + compresseur.flush()
+        trame = encoder_trame(CODECS[codec], GENRE_MESSAGE, charge)
+        if len(trame) >= len(data):
+            trame = data  # Incompressible : envoyé tel quel
+        self.cache[codec] = (message, trame)
+        return trame
+
+
+class Decompresseur:
+    """
+    @brief Décompression côté joueur des trames envoyées par l'hôte.
+    """
+
+    def __init__(self):
+        self.dictionnaire = b''
+        self.zstd = None
+        self.taches = {}  # Intitulés préchargés {position: intitulé}
+
+    def decouper(self, data, recv):
+        """
+        @brief Sépare le prochain message des octets reçus
+
+        Un message texte et la trame compressée qui le suit peuvent arriver dans la même
+        lecture : le texte est décodé seul, la trame est gardée pour la lecture suivante.
+
+        @param data Octets reçus
+        @param recv Fonction recv(taille) pour lire la suite d'une trame
+        @return Tuple (message, reste) ; message vaut None pour une trame de dictionnaire ou de tâches
+        """
+        if data.startswith(MARQUEUR):
+            return self.lire(data, recv)
+        texte, marqueur, reste = data.partition(MARQUEUR)
+        return texte.decode(), marqueur + reste
+
+    def lire(self, data, recv):
+        """
+        @brief Décode une trame compressée reçue
+
+        @param data Octets reçus, commençant par le marqueur
+        @param recv Fonction recv(taille) pour lire la suite de la trame
+        @return Tuple (message, reste) ; message vaut None pour une trame de dictionnaire ou de tâches
+        """
+        while len(data) < len(MARQUEUR) + ENTETE.size:
+            suite = recv(1024)
+            if not suite:
+                raise ConnectionError("Entête de trame compressée incomplet")
+            data += suite
+        codec, genre, longueur = ENTETE.unpack_from(data, len(MARQUEUR))
+        fin = len(MARQUEUR) + ENTETE.size + longueur
+        while len(data) < fin:
+            suite = recv(65536)
+            if not suite:
+                raise ConnectionError("Trame compressée incomplète")
+            data += suite
+        charge, reste = data[len(MARQUEUR) + ENTETE.size:fin], data[fin:]
+
+        if genre == GENRE_DICTIONNAIRE:
+            self.dictionnaire = zlib.decompress(charge)
+            if zstandard:
+                dictionnaire = zstandard.ZstdCompressionDict(self.dictionnaire, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+                self.zstd = zstandard.ZstdDecompressor(dict_data=dictionnaire)
+            return None, reste
+        if genre == GENRE_TACHES:
+            self.taches.update((int(position), texte) for position, texte in json.loads(zlib.decompress(charge)).items())
+            return None, reste
+
+        if codec == CODEC_ZSTD:
+            return self.zstd.decompress(charge).decode(), reste
+        decompresseur = zlib.decompressobj(zdict=self.dictionnaire)
+        return (decompresseur.decompress(charge) + decompresseur.flush()).decode(), reste
+
+    def resoudre(self, message):
+        """
+        @brief Remplace une question désignée par position par son intitulé préchargé
+
+        @param message Message reçu
+        @return Le message, avec l'intitulé de la tâche s'il s'agit d'une référence
+        """
+        if not message.startswith(TAG_TACHE):
+            return message
+        position, separateur, rappel = message[len(TAG_TACHE):].partition('\n')
+        return self.taches[int(position)] + separateur + rappel
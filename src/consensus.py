@@ -0,0 +1,55 @@
+from collections import Counter
+
+MODES = ['Majorité absolue', 'Majorité relative', 'Moyenne', 'Médiane']
+CARTES = ('0', '1', '2', '3', '5', '8', '13', '20', '40', '100', '-1')  # Cartes d'estimation (pas de pause café)
+
+
+def calculer_verdict(mode, votes, premier_tour=False):
+    """
+    @brief Applique la règle de décision du mode de jeu à un tour de votes
+
+    Le premier tour est toujours jugé à la majorité absolue.
+
+    @param mode Mode de jeu choisi par l'hôte
+    @param votes Liste des votes reçus (chaînes)
+    @param premier_tour True s'il s'agit du premier tour de la tâche
+    @return Tuple (estimation, message) ; estimation vaut None si aucune décision n'est prise
+    """
+    if premier_tour:
+        mode = 'Majorité absolue'
+
+    match mode:
+        case 'Moyenne':
+
+            lst = [0 if int(x) == -1 else int(x) for x in votes]
+            avg = sum(lst) / len(lst) if lst else 0
+            return avg, f"Moyenne : {avg}"
+
+        case 'Médiane' | 'Mediane':
+
+            lst = sorted(map(float, votes))  # Convertir en nombres et trier
+            n = len(lst)
+            milieu = n // 2
+
+            if n % 2 == 0:
+                med = (lst[milieu - 1] + lst[milieu]) / 2
+            else:
+                med = lst[milieu]
+            return med, f"Mediane : {med}"
+
+        case 'Majorité absolue':
+
+            if len(set(votes)) == 1:
+                return int(votes[0]), f"Majorité absolue ! : {votes[0]}"
+            return None, "Pas de majorité absolue.."
+
+        case 'Majorité relative':
+
+            most_common = Counter(votes).most_common(1)
+            if most_common:
+                value, freq = most_common[0]
+                if freq > len(votes) / 2:
+                    return int(value), f"Majorité relative ! : {value}"
+            return None, "Pas de majorité relative.."
+
+    return None, f"Mode inconnu : {mode}"
@@ -0,0 +1,320 @@
+import argparse
+import queue
+import random
+import socket
+import threading
+import time
+
+TAILLE_SEGMENT = 1460  # Octets envoyés d'un bloc lorsque le débit est limité (MSS Ethernet)
+EN_VOL_MIN = 16384     # Octets en transit au minimum sur un lien à débit limité, même sans latence
+
+
+class ProfilReseau:
+    """
+    @brief Conditions réseau simulées pour une connexion, dans chaque sens.
+    """
+
+    def __init__(self, latence=0.0, gigue=0.0, debit=None, blocage=0.0, duree_blocage=0.0, deconnexion=None):
+        """
+        @brief Constructeur de ProfilReseau.
+
+        @param latence Délai ajouté à chaque envoi (secondes, dans chaque sens)
+        @param gigue Délai supplémentaire aléatoire, entre 0 et gigue (secondes)
+        @param debit Débit maximal en octets par seconde (None : illimité)
+        @param blocage Probabilité qu'un envoi reste bloqué (Wi-Fi qui décroche)
+        @param duree_blocage Durée d'un blocage (secondes)
+        @param deconnexion Durée après laquelle la connexion est coupée (None : jamais)
+        """
+        self.latence = latence
+        self.gigue = gigue
+        self.debit = debit
+        self.blocage = blocage
+        self.duree_blocage = duree_blocage
+        self.deconnexion = deconnexion
+
+    def __repr__(self):
+        return (f"ProfilReseau(latence={self.latence}, gigue={self.gigue}, debit={self.debit}, "
+                f"blocage={self.blocage}, duree_blocage={self.duree_blocage}, deconnexion={self.deconnexion})")
+
+
+class Sens:
+    """
+    @brief Un sens d'une connexion relayée : lecture immédiate, livraison retardée.
+
+    Un thread lit la source et date chaque bloc reçu de son instant de livraison
+    (latence, gigue, blocages) ; un second thread le livre à cet instant, au débit
+    du profil. L'ordre des octets est toujours conservé, comme en TCP.
+
+    À débit limité, les octets en transit sont bornés au produit débit × latence :
+    la source n'est plus lue tant que le lien est plein, ses tampons se remplissent
+    et l'émetteur est freiné comme par un joueur lent.
+    """
+
+    def __init__(self, source, destination, profil, hasard):
+        self.source = source
+        self.destination = destination
+        self.profil = profil
+        self.hasard = hasard
+        self.file = queue.Queue()
+        self.derniere_livraison = 0.0
+        self.octets = 0
+        self.blocages = 0
+        self.capacite = None  # Octets en transit au plus (None : illimité)
+        self.en_vol = 0
+        self.place = threading.Condition()
+        if profil.debit:
+            self.capacite = max(int(profil.debit * (profil.latence + profil.gigue)), EN_VOL_MIN)
+            try:
+                self.source.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.capacite)
+            except OSError:
+                pass
+
+    def demarrer(self):
+        threading.Thread(target=self.lire, daemon=True).start()
+        threading.Thread(target=self.livrer, daemon=True).start()
+
+    def lire(self):
+        """
+        @brief Lit la source et planifie la livraison de chaque bloc
+        """
+        profil = self.profil
+        while True:
+            taille = 65536
+            if self.capacite:
+                with self.place:
+                    while self.en_vol >= self.capacite:
+                        self.place.wait()
+                    taille = min(taille, self.capacite - self.en_vol)
+            try:
+                data = self.source.recv(taille)
+            except OSError:
+                data = b''
+            if not data:
+                self.file.put(None)
+                return
+            instant = time.monotonic() + profil.latence + (self.hasard.uniform(0, profil.gigue) if profil.gigue else 0)
+            if profil.blocage and self.hasard.random() < profil.blocage:
+                instant += profil.duree_blocage
+                self.blocages += 1
+            # Jamais avant le bloc précédent : l'ordre du flux est conservé
+            self.derniere_livraison = max(instant, self.derniere_livraison)
+            if self.capacite:
+                with self.place:
+                    self.en_vol += len(data)
+            self.file.put((self.derniere_livraison, data))
+
+    def livrer(self):
+        """
+        @brief Livre les blocs à leur instant, par segments au débit du profil
+        """
+        libre = 0.0  # Instant où le lien a fini d'envoyer le segment précédent
+        while True:
+            element = self.file.get()
+            if element is None:
+                try:
+                    self.destination.shutdown(socket.SHUT_WR)
+                except OSError:
+                    pass
+                return
+            instant, data = element
+            try:
+                if not self.profil.debit:
+                    attendre_jusqu_a(instant)
+                    self.destination.sendall(data)
+                    self.octets += len(data)
+                    continue
+                for debut in range(0, len(data), TAILLE_SEGMENT):
+                    segment = data[debut:debut + TAILLE_SEGMENT]
+                    libre = max(instant, libre) + len(segment) / self.profil.debit
+                    attendre_jusqu_a(libre)
+                    self.destination.sendall(segment)
+                    self.octets += len(segment)
+                    with self.place:
+                        self.en_vol -= len(segment)
+                        self.place.notify()
+            except OSError:
+                return
+
+
+def attendre_jusqu_a(instant):
+    """
+    @brief Attend un instant de l'horloge monotone
+    """
+    restant = instant - time.monotonic()
+    if restant > 0:
+        time.sleep(restant)
+
+
+class ConnexionDegradee:
+    """
+    @brief Connexion relayée par le proxy : joueur d'un côté, hôte de l'autre.
+    """
+
+    def __init__(self, numero, client, serveur, profil, graine):
+        """
+        @brief Constructeur de ConnexionDegradee.
+
+        @param numero Numéro de la connexion (ordre d'arrivée, à partir de 0)
+        @param client Socket du joueur
+        @param serveur Socket vers l'hôte
+        @param profil ProfilReseau appliqué
+        @param graine Graine du hasard (tirages reproductibles pour une même graine)
+        """
+        self.numero = numero
+        self.client = client
+        self.serveur = serveur
+        self.profil = profil
+        self.montant = Sens(client, serveur, profil, random.Random(f"{graine}:{numero}:montant"))
+        self.descendant = Sens(serveur, client, profil, random.Random(f"{graine}:{numero}:descendant"))
+        self.coupee = False
+
+    def demarrer(self):
+        self.montant.demarrer()
+        self.descendant.demarrer()
+        if self.profil.deconnexion is not None:
+            minuteur = threading.Timer(self.profil.deconnexion, self.couper)
+            minuteur.daemon = True
+            minuteur.start()
+
+    def couper(self):
+        """
+        @brief Coupe brutalement la connexion des deux côtés
+        """
+        self.coupee = True
+        for conn in (self.client, self.serveur):
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conn.close()
+
+
+class ProxyDegrade:
+    """
+    @brief Proxy TCP local qui dégrade le réseau entre les joueurs et l'hôte.
+
+    Les joueurs se connectent au port du proxy, qui relaie vers l'hôte en
+    appliquant un ProfilReseau à chaque connexion. Le profil peut être choisi par
+    connexion (ordre d'arrivée) avant qu'elle n'arrive, et une connexion peut être
+    coupée à tout moment : un même scénario rejoue les mêmes conditions.
+    """
+
+    def __init__(self, cible_port, cible_hote='127.0.0.1', port=0, hote='127.0.0.1', profil=None, graine=0):
+        """
+        @brief Constructeur de ProxyDegrade : démarre l'écoute.
+
+        @param cible_port Port de l'hôte
+        @param cible_hote Adresse de l'hôte
+        @param port Port d'écoute du proxy (0 : port libre choisi par le système)
+        @param hote Adresse d'écoute du proxy
+        @param profil ProfilReseau par défaut
+        @param graine Graine des tirages aléatoires (gigue, blocages)
+        """
+        self.cible = (cible_hote, cible_port)
+        self.profil = profil or ProfilReseau()
+        self.profils = {}  # numéro de connexion -> ProfilReseau particulier
+        self.graine = graine
+        self.connexions = []
+        self.verrou = threading.Lock()
+        self.ecoute = socket.create_server((hote, port))
+        self.port = self.ecoute.getsockname()[1]
+        self.actif = True
+        threading.Thread(target=self.accepter, daemon=True).start()
+
+    def definir_profil(self, numero, profil):
+        """
+        @brief Profil particulier pour la connexion d'un numéro donné
+
+        @param numero Numéro de la connexion (0 pour la première)
+        @param profil ProfilReseau à appliquer
+        """
+        self.profils[numero] = profil
+
+    def accepter(self):
+        """
+        @brief Boucle d'accueil : chaque joueur est relayé vers l'hôte
+        """
+        while self.actif:
+            try:
+                client, addr = self.ecoute.accept()
+            except OSError:
+                return  # Proxy fermé
+            try:
+                serveur = socket.create_connection(self.cible)
+            except OSError as e:
+                print(f"Proxy : hôte injoignable ({e})")
+                client.close()
+                continue
+            with self.verrou:
+                numero = len(self.connexions)
+                connexion = ConnexionDegradee(numero, client, serveur, self.profils.get(numero, self.profil), self.graine)
+                self.connexions.append(connexion)
+            connexion.demarrer()
+
+    def couper(self, numero=None):
+        """
+        @brief Coupe une connexion, ou toutes
+
+        @param numero Numéro de la connexion (None : toutes)
+        """
+        with self.verrou:
+            connexions = list(self.connexions) if numero is None else [self.connexions[numero]]
+        for connexion in connexions:
+            connexion.couper()
+
+    def statistiques(self):
+        """
+        @brief Octets relayés et blocages, par connexion
+
+        @return Liste de dictionnaires {numero, montant, descendant, blocages, coupee}
+        """
+        with self.verrou:
+            connexions = list(self.connexions)
+        return [{'numero': c.numero, 'montant': c.montant.octets, 'descendant': c.descendant.octets,
+                 'blocages': c.montant.blocages + c.descendant.blocages, 'coupee': c.coupee} for c in connexions]
+
+    def fermer(self):
+        """
+        @brief Arrête le proxy et coupe toutes les connexions
+        """
+        self.actif = False
+        try:
+            self.ecoute.shutdown(socket.SHUT_RDWR)  # Réveille accept()
+        except OSError:
+            pass
+        self.ecoute.close()
+        self.couper()
+
+
+def main():
+    """
+    @brief Lance le proxy entre les joueurs et un hôte
+    """
+    parser = argparse.ArgumentParser(description="Proxy TCP simulant un réseau dégradé (latence, débit, coupures)")
+    parser.add_argument('--cible', default='127.0.0.1:16383', help="adresse de l'hôte (ip:port)")
+    parser.add_argument('--port', type=int, default=16384, help="port d'écoute du proxy, à donner aux joueurs")
+    parser.add_argument('--latence', type=float, default=0, help="latence dans chaque sens (ms)")
+    parser.add_argument('--gigue', type=float, default=0, help="gigue maximale (ms)")
+    parser.add_argument('--debit', type=float, default=None, help="débit maximal (Ko/s)")
+    parser.add_argument('--blocage', type=float, default=0, help="probabilité de blocage par envoi (0 à 1)")
+    parser.add_argument('--duree-blocage', type=float, default=0, help="durée d'un blocage (ms)")
+    parser.add_argument('--deconnexion', type=float, default=None, help="coupe chaque connexion après N secondes")
+    parser.add_argument('--graine', type=int, default=0)
+    args = parser.parse_args()
+
+    hote, port = args.cible.rsplit(':', 1)
+    profil = ProfilReseau(args.latence / 1000, args.gigue / 1000, args.debit * 1024 if args.debit else None,
+                          args.blocage, args.duree_blocage / 1000, args.deconnexion)
+    proxy = ProxyDegrade(int(port), hote, args.port, '0.0.0.0', profil, args.graine)
+    print(f"Proxy en écoute sur le port {proxy.port} vers {args.cible} : {profil}")
+    try:
+        while True:
+            time.sleep(5)
+            for stats in proxy.statistiques():
+                print(stats)
+    except KeyboardInterrupt:
+        proxy.fermer()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import random
+import zlib
+
+from rappel import normaliser
+
+
+class AnalyseBacklog:
+    """
+    @brief Regroupement des tâches identiques ou quasi identiques d'un backlog.
+
+    Le backlog est parcouru une seule fois. Chaque tâche est rattachée au groupe
+    d'une tâche précédente :
+    - si son intitulé normalisé est identique (doublon exact)
+    - sinon si une signature MinHash la rapproche d'une tâche déjà vue (LSH),
+      et que la similarité de Jaccard de leurs mots atteint le seuil (quasi-doublon)
+    """
+
+    BANDES = 8
+    LIGNES = 2
+    MIN_MOTS = 3  # En dessous, seuls les doublons exacts sont regroupés
+
+    def __init__(self, seuil=0.8, graine=16383):
+        """
+        @brief Constructeur de AnalyseBacklog.
+
+        @param seuil Similarité de Jaccard minimale pour un quasi-doublon
+        @param graine Graine des permutations MinHash (résultats reproductibles)
+        """
+        self.seuil = seuil
+        generateur = random.Random(graine)
+        self.permutations = [(generateur.randrange(1, 1 << 32, 2), generateur.randrange(1 << 32))
+                             for _ in range(self.BANDES * self.LIGNES)]
+
+        self.clusters = {}      # clé représentante -> liste des clés du groupe (représentante incluse)
+        self.representant = {}  # clé -> clé représentante
+        self.nb_exacts = 0
+        self.nb_proches = 0
+
+        self._par_texte = {}    # intitulé normalisé -> clé représentante
+        self._buckets = {}      # (bande, signature) -> clé
+        self._mots = {}         # clé -> ensemble des mots
+        self._hashes = {}       # mot -> valeurs du mot pour chaque permutation
+
+    def signature(self, mots):
+        """
+        @brief Calcule la signature MinHash d'un ensemble de mots
+
+        @param mots Ensemble des mots d'une tâche
+        @return Liste de BANDES * LIGNES minima
+        """
+        colonnes = []
+        for mot in mots:
+            valeurs = self._hashes.get(mot)
+            if valeurs is None:
+                h = zlib.crc32(mot.encode())
+                valeurs = self._hashes[mot] = tuple((a * h + b) & 0xFFFFFFFF for a, b in self.permutations)
+            colonnes.append(valeurs)
+        return list(map(min, zip(*colonnes)))
+
+    def ajouter(self, cle, texte):
+        """
+        @brief Rattache une tâche à un groupe existant ou en crée un nouveau
+
+        @param cle Clé de la tâche dans le backlog
+        @param texte Intitulé de la tâche
+        @return La clé représentante du groupe
+        """
+        normal = normaliser(texte)
+        if normal in self._par_texte:
+            self.nb_exacts += 1
+            return self._rattacher(cle, self._par_texte[normal])
+
+        mots = {mot for mot in normal.split() if len(mot) > 1}
+
+        if len(mots) >= self.MIN_MOTS:
+            sig = self.signature(mots)
+            bandes = [(i, tuple(sig[i * self.LIGNES:(i + 1) * self.LIGNES])) for i in range(self.BANDES)]
+
+            for bande in bandes:
+                candidat = self._buckets.get(bande)
+                if candidat is not None:
+                    autres = self._mots[candidat]
+                    if len(mots & autres) / len(mots | autres) >= self.seuil:
+                        self.nb_proches += 1
+                        self._par_texte[normal] = self.representant[candidat]
+                        return self._rattacher(cle, self.representant[candidat])
+
+            self._mots[cle] = mots
+            for bande in bandes:
+                self._buckets.setdefault(bande, cle)
+
+        self._par_texte[normal] = cle
+        self.representant[cle] = cle
+        self.clusters[cle] = [cle]
+        return cle
+
+    def _rattacher(self, cle, representant):
+        """
+        @brief Ajoute une tâche au groupe d'un représentant
+
+        @param cle Clé de la tâche
+        @param representant Clé représentante du groupe
+        @return La clé représentante
+        """
+        self.representant[cle] = representant
+        self.clusters[representant].append(cle)
+        return representant
+
+    def tours_economises(self):
+        """
+        @brief Nombre de tâches qui n'auront pas besoin d'être votées
+
+        @return Nombre de tâches rattachées à un autre représentant
+        """
+        return self.nb_exacts + self.nb_proches
+
+    def resume(self):
+        """
+        @brief Résumé de l'analyse à destination de l'hôte
+
+        @return Texte décrivant les doublons trouvés
+        """
+        return (f"{self.nb_exacts} doublon(s), {self.nb_proches} quasi-doublon(s) : "
+                f"{len(self.clusters)} tâche(s) à estimer, {self.tours_economises()} économisée(s)")
+
+
+def analyser_backlog(backlog, seuil=0.8):
+    """
+    @brief Analyse un backlog chargé avant la partie
+
+    @param backlog Dictionnaire {clé: intitulé}
+    @param seuil Similarité de Jaccard minimale pour un quasi-doublon
+    @return Une AnalyseBacklog
+    """
+    analyse = AnalyseBacklog(seuil)
+    for cle, texte in backlog.items():
+        analyse.ajouter(cle, texte)
+    return analyse
@@ -0,0 +1,401 @@
+import argparse
+import json
+import struct
+import sys
+import threading
+import time
+
+from asynchrone import BilanAsynchrone
+from compression import Compression
+from prechargement import PrechargementTaches
+from moteur import MoteurPartie
+from protocole import lire_vote
+from rappel import IndexSimilarite
+
+MAGIC = b'PPRC\x01'
+ENREGISTREMENT = struct.Struct('!BHQI')  # type, joueur, instant (ns depuis le début), longueur
+
+TYPE_META = 0      # Paramètres de la partie (JSON)
+TYPE_SORTANT = 1   # Message de l'hôte vers un joueur
+TYPE_ENTRANT = 2   # Message d'un joueur vers l'hôte
+TYPE_FIN = 3       # Résultat de la partie (JSON)
+TYPE_INGESTION = 4  # Tâches ajoutées au backlog pendant la partie (JSON)
+
+
+def meta_estimations(index_rappel=None, rappel_auto=False, asynchrone=None, delai_votes=None, ingestion=None):
+    """
+    @brief Paramètres de la partie qui modifient les questions ou les décisions, à ajouter aux paramètres enregistrés
+
+    @param index_rappel IndexSimilarite au début de la partie (optionnel)
+    @param rappel_auto Confirmation des estimations des tâches quasi identiques
+    @param asynchrone BilanAsynchrone de la fenêtre de vote (optionnel)
+    @param delai_votes Délai maximal de collecte des votes d'un tour en secondes (None : sans limite)
+    @param ingestion Fichier ou dossier de backlog surveillé pendant la partie (optionnel)
+    @return Dictionnaire {'rappel', 'rappel_auto', 'asynchrone', 'delai_votes', 'ingestion'}
+    """
+    return {'rappel': index_rappel.entrees() if index_rappel is not None else None, 'rappel_auto': rappel_auto,
+            'asynchrone': vars(asynchrone) if asynchrone else None, 'delai_votes': delai_votes, 'ingestion': ingestion}
+
+
+def reglages_rejeu(meta, messages=()):
+    """
+    @brief Paramètres du moteur rejoué correspondant à meta_estimations
+
+    @param meta Paramètres de la partie enregistrée
+    @param messages Messages enregistrés, dont les tâches ajoutées pendant la partie
+    @return Dictionnaire {'index_rappel', 'rappel_auto', 'asynchrone', 'delai_votes', 'ingestion'}
+    """
+    index_rappel = None
+    if meta.get('rappel') is not None:
+        index_rappel = IndexSimilarite()
+        for texte, estimation in meta['rappel']:
+            index_rappel.ajouter(texte, estimation)
+    asynchrone = BilanAsynchrone(**meta['asynchrone']) if meta.get('asynchrone') else None
+    ingestion = None
+    if meta.get('ingestion'):
+        ingestion = IngestionRejouee(meta['ingestion'], [json.loads(data) for type, joueur, instant, data in messages
+                                                         if type == TYPE_INGESTION])
+    return {'index_rappel': index_rappel, 'rappel_auto': meta.get('rappel_auto', False), 'asynchrone': asynchrone,
+            'delai_votes': meta.get('delai_votes'), 'ingestion': ingestion}
+
+
+class Enregistreur:
+    """
+    @brief Enregistre les messages échangés par l'hôte dans un journal binaire compact.
+
+    Chaque message est précédé de son type, de l'indice du joueur, de l'instant
+    (horloge monotone, en nanosecondes depuis le début) et de sa longueur.
+    """
+
+    def __init__(self, chemin, meta):
+        """
+        @brief Constructeur de Enregistreur.
+
+        @param chemin Fichier du journal
+        @param meta Paramètres de la partie (backlog, mode, temps, pseudos...)
+        """
+        self.fichier = open(chemin, 'wb')
+        self.fichier.write(MAGIC)
+        self.verrou = threading.Lock()
+        self.debut = time.monotonic_ns()
+        self.ecrire(TYPE_META, 0, json.dumps(meta).encode())
+
+    def ecrire(self, type, joueur, data):
+        """
+        @brief Ajoute un message au journal
+
+        @param type Type d'enregistrement
+        @param joueur Indice du joueur
+        @param data Contenu binaire
+        """
+        with self.verrou:
+            self.fichier.write(ENREGISTREMENT.pack(type, joueur, time.monotonic_ns() - self.debut, len(data)))
+            self.fichier.write(data)
+
+    def envelopper(self, clients):
+        """
+        @brief Enveloppe les connexions des joueurs pour enregistrer leurs messages
+
+        @param clients Connexions des joueurs
+        @return Connexions enveloppées, dans le même ordre
+        """
+        return [ConnexionEnregistree(conn, self, indice) for indice, conn in enumerate(clients)]
+
+    def envelopper_ingestion(self, ingestion):
+        """
+        @brief Enveloppe la surveillance du backlog pour enregistrer les tâches ajoutées pendant la partie
+
+        @param ingestion IngestionBacklog (optionnel)
+        @return IngestionEnregistree, ou None sans surveillance
+        """
+        return IngestionEnregistree(ingestion, self) if ingestion else None
+
+    def fermer(self, resultat, paused):
+        """
+        @brief Enregistre le résultat de la partie et ferme le journal
+
+        @param resultat Estimations {clé: estimation}
+        @param paused True si la partie a été interrompue
+        """
+        self.ecrire(TYPE_FIN, 0, json.dumps({'resultat': resultat, 'paused': paused}).encode())
+        with self.verrou:
+            self.fichier.close()
+
+
+class ConnexionEnregistree:
+    """
+    @brief Connexion d'un joueur dont les messages sont enregistrés.
+
+    Se compare et se hache comme la connexion enveloppée (recherche dans le registre des joueurs).
+    """
+
+    def __init__(self, conn, enregistreur, indice):
+        self.conn = conn
+        self.enregistreur = enregistreur
+        self.indice = indice
+
+    def sendall(self, data):
+        self.enregistreur.ecrire(TYPE_SORTANT, self.indice, data)
+        self.conn.sendall(data)
+
+    def recv(self, taille):
+        data = self.conn.recv(taille)
+        if data:
+            self.enregistreur.ecrire(TYPE_ENTRANT, self.indice, data)
+        return data
+
+    def __getattr__(self, nom):
+        return getattr(self.conn, nom)  # settimeout, close...
+
+    def __eq__(self, autre):
+        return self.conn == (autre.conn if isinstance(autre, ConnexionEnregistree) else autre)
+
+    def __hash__(self):
+        return hash(self.conn)
+
+
+class IngestionEnregistree:
+    """
+    @brief Surveillance du backlog dont les tâches remises au moteur sont enregistrées.
+
+    Chaque lot est enregistré avec le numéro de l'appel du moteur qui l'a reçu : le
+    rejeu intègre les mêmes tâches entre les mêmes tâches estimées, sans relire la source.
+    """
+
+    def __init__(self, ingestion, enregistreur):
+        self.ingestion = ingestion
+        self.enregistreur = enregistreur
+        self.appels = 0
+
+    def recuperer(self):
+        taches = self.ingestion.recuperer()
+        if taches:
+            lot = {'appel': self.appels, 'taches': taches}
+            self.enregistreur.ecrire(TYPE_INGESTION, 0, json.dumps(lot, ensure_ascii=False).encode())
+        self.appels += 1
+        return taches
+
+    def __getattr__(self, nom):
+        return getattr(self.ingestion, nom)  # source, demarrer, arreter...
+
+
+def lire_enregistrement(chemin):
+    """
+    @brief Lit un journal de session
+
+    @param chemin Fichier du journal
+    @return Tuple (meta, messages, fin) ; messages est la liste des (type, joueur, instant_ns, data)
+    """
+    with open(chemin, 'rb') as f:
+        contenu = f.read()
+    if not contenu.startswith(MAGIC):
+        raise ValueError(f"{chemin} n'est pas un enregistrement de partie")
+
+    meta, fin, messages = None, None, []
+    position = len(MAGIC)
+    while position < len(contenu):
+        type, joueur, instant, longueur = ENREGISTREMENT.unpack_from(contenu, position)
+        position += ENREGISTREMENT.size
+        data = contenu[position:position + longueur]
+        position += longueur
+        if type == TYPE_META:
+            meta = json.loads(data)
+        elif type == TYPE_FIN:
+            fin = json.loads(data)
+        else:
+            messages.append((type, joueur, instant, data))
+    return meta, messages, fin
+
+
+class ConnexionRejouee:
+    """
+    @brief Joueur rejoué : renvoie ses messages enregistrés sans attendre et collecte les messages de l'hôte.
+    """
+
+    def __init__(self, pseudo, entrants):
+        """
+        @brief Constructeur de ConnexionRejouee.
+
+        @param pseudo Pseudo du joueur
+        @param entrants Messages envoyés par le joueur pendant la partie enregistrée
+        """
+        self.pseudo = pseudo
+        self.entrants = list(reversed(entrants))
+        self.sortants = []
+        self.epuise = False
+
+    def sendall(self, data):
+        self.sortants.append(bytes(data))
+
+    def recv(self, taille):
+        if self.entrants:
+            return self.entrants.pop()
+        # Plus aucun message enregistré : la partie rejouée a divergé, on l'arrête par la carte café
+        self.epuise = True
+        return f"{self.pseudo};cafe".encode()
+
+    def settimeout(self, timeout):
+        pass
+
+    def close(self):
+        pass
+
+
+class IngestionRejouee:
+    """
+    @brief Surveillance rejouée : remet au moteur les tâches enregistrées, au même appel que dans la partie.
+    """
+
+    def __init__(self, source, lots):
+        """
+        @brief Constructeur de IngestionRejouee.
+
+        @param source Source surveillée pendant la partie enregistrée
+        @param lots Lots enregistrés {'appel', 'taches'}
+        """
+        self.source = source
+        self.lots = {lot['appel']: lot['taches'] for lot in lots}
+        self.appels = 0
+
+    def recuperer(self):
+        taches = self.lots.get(self.appels, {})
+        self.appels += 1
+        return taches
+
+    def demarrer(self):
+        pass
+
+    def arreter(self):
+        pass
+
+
+def comparer(attendus, obtenus, etiquette, divergences):
+    """
+    @brief Compare deux suites de messages et note la première différence
+
+    @param attendus Messages de la partie enregistrée
+    @param obtenus Messages de la partie rejouée
+    @param etiquette Nom de la suite (joueur)
+    @param divergences Liste des divergences à compléter
+    """
+    for numero, (attendu, obtenu) in enumerate(zip(attendus, obtenus)):
+        if attendu != obtenu:
+            divergences.append(f"{etiquette}, message {numero} : attendu {attendu!r}, obtenu {obtenu!r}")
+            return
+    if len(attendus) != len(obtenus):
+        divergences.append(f"{etiquette} : {len(attendus)} messages enregistrés, {len(obtenus)} rejoués")
+
+
+def comparer_resultats(fin, resultat, paused, divergences):
+    """
+    @brief Compare les verdicts de la partie enregistrée et de la partie rejouée
+    """
+    for cle in sorted(set(fin['resultat']) | set(resultat)):
+        if fin['resultat'].get(cle) != resultat.get(cle):
+            divergences.append(f"Tâche {cle} : estimation enregistrée {fin['resultat'].get(cle)}, rejouée {resultat.get(cle)}")
+    if fin['paused'] != paused:
+        divergences.append(f"Partie interrompue : enregistrée {fin['paused']}, rejouée {paused}")
+
+
+def rejouer(chemin):
+    """
+    @brief Rejoue une partie enregistrée dans le moteur de l'hôte, sans aucun temps d'attente
+
+    Les votes enregistrés de chaque joueur sont renvoyés au moteur dans l'ordre ; les
+    messages produits par le moteur et les estimations sont comparés à l'enregistrement.
+
+    @param chemin Fichier du journal
+    @return Tuple (moteur, divergences)
+    """
+    meta, messages, fin = lire_enregistrement(chemin)
+    joueurs = [ConnexionRejouee(pseudo, [data for type, joueur, instant, data in messages
+                                         if type == TYPE_ENTRANT and joueur == indice])
+               for indice, pseudo in enumerate(meta['pseudos'])]
+
+    # Mêmes codecs que dans la partie enregistrée, pour retrouver les mêmes trames
+    compression = None
+    if any(meta.get('compression', [])):
+        compression = Compression(meta['backlog'])
+        for joueur, codec in zip(joueurs, meta['compression']):
+            compression.inscrire(joueur, codec)
+
+    # Mêmes joueurs en préchargement, pour retrouver les mêmes questions désignées par position
+    prechargement = None
+    if any(meta.get('references', [])):
+        prechargement = PrechargementTaches(meta['backlog'])
+        for joueur, references in zip(joueurs, meta['references']):
+            if references:
+                prechargement.inscrire(joueur)
+
+    moteur = MoteurPartie(joueurs, meta['backlog'], meta['mode'], meta['temps_vote'], meta['temps_discussion'],
+                          afficher=lambda texte, couleur='white': None, attendre=lambda secondes: None, pause=0,
+                          compression=compression, prechargement=prechargement, **reglages_rejeu(meta, messages))
+    moteur.executer()
+
+    divergences = []
+    if not meta.get('multicast'):  # Les messages diffusés en multicast ne sont pas enregistrés
+        for indice, joueur in enumerate(joueurs):
+            sortants = [data for type, numero, instant, data in messages if type == TYPE_SORTANT and numero == indice]
+            comparer(sortants, joueur.sortants, f"Joueur {joueur.pseudo}", divergences)
+    for joueur in joueurs:
+        if joueur.epuise:
+            divergences.append(f"Joueur {joueur.pseudo} : plus de vote enregistré, partie rejouée arrêtée")
+    if fin:
+        comparer_resultats(fin, moteur.resultat, moteur.paused, divergences)
+    return moteur, divergences
+
+
+def rejouer_bots(chemin, port=16390):
+    """
+    @brief Rejoue une partie enregistrée avec des bots connectés à un hôte complet (transport en mémoire)
+
+    Chaque bot renvoie les votes enregistrés de son joueur ; seules les estimations sont comparées.
+
+    @param chemin Fichier du journal
+    @param port Port de la partie simulée
+    @return Tuple (moteur, divergences)
+    """
+    from bots import simuler_partie
+
+    meta, messages, fin = lire_enregistrement(chemin)
+    strategies = {}
+    for indice, pseudo in enumerate(meta['pseudos']):
+        votes = iter([lire_vote(data.decode())[-1] for type, joueur, instant, data in messages
+                      if type == TYPE_ENTRANT and joueur == indice and b';' in data])
+        strategies[pseudo] = lambda question, tour, votes=votes: next(votes, 'cafe')
+
+    moteur, bots = simuler_partie(meta['backlog'], strategies, meta['mode'], port=port,
+                                  **reglages_rejeu(meta, messages))
+    divergences = []
+    if fin:
+        comparer_resultats(fin, moteur.resultat, moteur.paused, divergences)
+    return moteur, divergences
+
+
+def main():
+    """
+    @brief Rejoue une partie enregistrée et affiche les divergences
+    """
+    parser = argparse.ArgumentParser(description="Rejeu accéléré d'une partie enregistrée")
+    parser.add_argument('enregistrement', help="fichier .ppr enregistré par l'hôte")
+    parser.add_argument('--bots', action='store_true', help="rejouer avec des bots connectés à un hôte complet")
+    args = parser.parse_args()
+
+    meta, messages, fin = lire_enregistrement(args.enregistrement)
+    duree = messages[-1][2] / 1e9 if messages else 0
+
+    debut = time.perf_counter()
+    moteur, divergences = (rejouer_bots if args.bots else rejouer)(args.enregistrement)
+    print(f"Partie de {duree:.0f} s ({len(messages)} messages) rejouée en {time.perf_counter() - debut:.2f} s")
+    if meta.get('multicast') or args.bots:
+        print("Seules les estimations sont comparées")
+
+    for divergence in divergences:
+        print(f"Divergence : {divergence}")
+    if not divergences:
+        print("Aucune divergence")
+    sys.exit(1 if divergences else 0)
+
+
+if __name__ == "__main__":
+    main()
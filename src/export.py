@@ -0,0 +1,181 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sqlite3
+
+FORMATS = ('csv', 'jsonl', 'tracker')
+EXTENSIONS = {'csv': 'csv', 'jsonl': 'jsonl', 'tracker': 'tracker.json'}
+COLONNES_CSV = ['cle', 'tache', 'estimation', 'tour', 'pseudo', 'vote']
+
+
+class ExportResultats:
+    """
+    @brief Export en continu des estimations, au fil des décisions.
+
+    Chaque tâche estimée est écrite dès sa décision, avec le détail des votes de
+    chaque tour, dans un ou plusieurs formats :
+    - csv : une ligne par vote (cle, tache, estimation, tour, pseudo, vote)
+    - jsonl : une ligne JSON par tâche, tours imbriqués
+    - tracker : document d'import en masse {"issueUpdates": [...]}, un ticket par tâche
+
+    Seuls les tours de la tâche en cours sont gardés en mémoire. Les fichiers sont
+    écrits sous un nom temporaire (.part) et renommés à la fermeture : un export
+    interrompu ne laisse jamais de fichier tronqué sous le nom final.
+    """
+
+    def __init__(self, dossier='exports', formats=FORMATS, nom='resultats'):
+        """
+        @brief Constructeur de ExportResultats : ouvre les fichiers d'export.
+
+        @param dossier Dossier de destination
+        @param formats Formats à écrire (parmi FORMATS)
+        @param nom Nom des fichiers, sans extension
+        """
+        os.makedirs(dossier, exist_ok=True)
+        self.chemins = {}
+        self.fichiers = {}
+        for format in formats:
+            if format not in FORMATS:
+                raise ValueError(f"Format d'export inconnu : {format}")
+            chemin = os.path.join(dossier, f"{nom}.{EXTENSIONS[format]}")
+            self.chemins[format] = chemin
+            self.fichiers[format] = open(chemin + '.part', 'w', encoding='utf-8', newline='')
+
+        self.csv = None
+        if 'csv' in self.fichiers:
+            self.csv = csv.writer(self.fichiers['csv'])
+            self.csv.writerow(COLONNES_CSV)
+        if 'tracker' in self.fichiers:
+            self.fichiers['tracker'].write('{"issueUpdates": [')
+        self.nb_taches = 0
+
+        # Tâche en cours (événements du moteur)
+        self.question = None
+        self.tours = []
+
+    def publier(self, type, **donnees):
+        """
+        @brief Événement de la partie (observateur du moteur)
+        """
+        match type:
+            case 'tache':
+                self.question, self.tours = donnees['question'], []
+            case 'tour':
+                self.tours.append([list(vote) for vote in donnees['votes']])
+            case 'decision':
+                for cle in donnees['cles']:
+                    self.ecrire(cle, self.question, donnees['estimation'], self.tours)
+                self.flush()
+            case 'fin':
+                self.fermer()
+
+    def ecrire(self, cle, tache, estimation, tours):
+        """
+        @brief Écrit une tâche estimée dans chaque format
+
+        @param cle Clé de la tâche
+        @param tache Intitulé de la tâche
+        @param estimation Estimation retenue
+        @param tours Votes de chaque tour : [[(pseudo, vote), ...], ...]
+        """
+        if self.csv:
+            for numero, votes in enumerate(tours):
+                for pseudo, vote in votes:
+                    self.csv.writerow([cle, tache, estimation, numero + 1, pseudo, vote])
+            if not tours:  # Estimation reprise de l'historique, sans vote
+                self.csv.writerow([cle, tache, estimation, '', '', ''])
+        if 'jsonl' in self.fichiers:
+            ligne = {'cle': cle, 'tache': tache, 'estimation': estimation, 'tours': tours}
+            self.fichiers['jsonl'].write(json.dumps(ligne, ensure_ascii=False) + '\n')
+        if 'tracker' in self.fichiers:
+            ticket = {'fields': {'summary': tache, 'story_points': estimation},
+                      'properties': [{'key': 'planning_poker', 'value': {'cle': cle, 'tours': len(tours)}}]}
+            separateur = ',\n' if self.nb_taches else '\n'
+            self.fichiers['tracker'].write(separateur + json.dumps(ticket, ensure_ascii=False))
+        self.nb_taches += 1
+
+    def flush(self):
+        """
+        @brief Transmet au système les lignes écrites
+        """
+        for fichier in self.fichiers.values():
+            fichier.flush()
+
+    def fermer(self):
+        """
+        @brief Termine les fichiers et leur donne leur nom définitif
+        """
+        fichiers, self.fichiers = self.fichiers, {}
+        self.csv = None
+        for format, fichier in fichiers.items():
+            if format == 'tracker':
+                fichier.write('\n]}\n')
+            fichier.flush()
+            os.fsync(fichier.fileno())
+            fichier.close()
+            os.replace(self.chemins[format] + '.part', self.chemins[format])
+
+    def abandonner(self):
+        """
+        @brief Ferme et supprime les fichiers d'un export interrompu (sans effet après fermer())
+        """
+        fichiers, self.fichiers = self.fichiers, {}
+        self.csv = None
+        for format, fichier in fichiers.items():
+            fichier.close()
+            os.remove(self.chemins[format] + '.part')
+
+
+def exporter_historique(chemin_historique='./historique.db', dossier='exports', formats=FORMATS):
+    """
+    @brief Exporte toutes les tâches estimées de l'historique, en mémoire constante
+
+    Les votes sont lus par un curseur SQLite, triés par tâche puis par tour, et
+    écrits au fur et à mesure : seuls les votes d'une tâche sont en mémoire.
+
+    @param chemin_historique Base SQLite de l'historique
+    @param dossier Dossier de destination
+    @param formats Formats à écrire
+    @return Nombre de tâches exportées
+    """
+    conn = sqlite3.connect(f"file:{chemin_historique}?mode=ro", uri=True)
+    export = ExportResultats(dossier, formats, 'historique')
+    try:
+        lignes = conn.execute("""
+            SELECT t.session_id, t.position, t.texte, t.estimation, v.numero, v.pseudo, v.vote
+            FROM taches t JOIN sessions s ON s.id = t.session_id
+            LEFT JOIN votes v ON v.session_id = t.session_id AND v.position = t.position
+            WHERE t.estimation IS NOT NULL
+            ORDER BY s.debut, t.session_id, t.position, v.numero, v.rowid
+        """)
+        for (session_id, position, texte, estimation), votes in itertools.groupby(lignes, key=lambda ligne: ligne[:4]):
+            tours = []
+            for numero, votes_tour in itertools.groupby(votes, key=lambda ligne: ligne[4]):
+                if numero is not None:
+                    tours.append([[pseudo, vote] for *_, pseudo, vote in votes_tour])
+            export.ecrire(f"{session_id}:{position}", texte, estimation, tours)
+        export.fermer()
+    finally:
+        export.abandonner()
+        conn.close()
+    return export.nb_taches
+
+
+def main():
+    """
+    @brief Exporte l'historique des parties
+    """
+    parser = argparse.ArgumentParser(description="Export de l'historique des estimations")
+    parser.add_argument('historique', nargs='?', default='./historique.db', help="base SQLite de l'historique")
+    parser.add_argument('--dossier', default='exports')
+    parser.add_argument('--formats', default=','.join(FORMATS), help="formats séparés par des virgules (csv, jsonl, tracker)")
+    args = parser.parse_args()
+
+    nb_taches = exporter_historique(args.historique, args.dossier, args.formats.split(','))
+    print(f"{nb_taches} tâches exportées dans {args.dossier}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+import sqlite3
+import os
+import threading
+import queue
+import time
+import uuid
+
+
+class HistoriqueStore:
+    """
+    @brief Historique persistant des parties de Planning Poker.
+
+    Enregistre les sessions, les tâches, les tours et chaque vote individuel
+    dans une base SQLite (mode WAL). Les écritures sont envoyées dans une file
+    et insérées par lots par un thread dédié, afin de ne jamais bloquer la
+    boucle de jeu.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            debut REAL NOT NULL,
+            fin REAL,
+            mode TEXT,
+            nb_joueurs INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS taches (
+            session_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            texte TEXT NOT NULL,
+            estimation REAL,
+            nb_tours INTEGER,
+            PRIMARY KEY (session_id, position)
+        );
+        CREATE TABLE IF NOT EXISTS tours (
+            session_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            numero INTEGER NOT NULL,
+            consensus INTEGER NOT NULL,
+            horodatage REAL NOT NULL,
+            PRIMARY KEY (session_id, position, numero)
+        );
+        CREATE TABLE IF NOT EXISTS votes (
+            session_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            numero INTEGER NOT NULL,
+            pseudo TEXT NOT NULL,
+            vote TEXT NOT NULL,
+            valeur REAL
+        );
+        CREATE TABLE IF NOT EXISTS durees (
+            session_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            numero INTEGER NOT NULL,
+            phase TEXT NOT NULL,
+            duree REAL NOT NULL,
+            horodatage REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_durees_phase ON durees (phase, horodatage);
+        CREATE INDEX IF NOT EXISTS idx_votes_pseudo ON votes (pseudo);
+        CREATE INDEX IF NOT EXISTS idx_votes_tache ON votes (session_id, position);
+        CREATE INDEX IF NOT EXISTS idx_taches_texte ON taches (texte);
+        CREATE INDEX IF NOT EXISTS idx_taches_tours ON taches (nb_tours);
+        CREATE INDEX IF NOT EXISTS idx_taches_estimation ON taches (estimation);
+    """
+
+    TAILLE_LOT = 500
+
+    def __init__(self, chemin='./historique.db'):
+        """
+        @brief Constructeur de HistoriqueStore.
+
+        Crée le schéma si nécessaire et démarre le thread d'écriture.
+
+        @param chemin Chemin du fichier SQLite
+        """
+        self.chemin = chemin
+        self.file = queue.Queue()
+
+        with sqlite3.connect(self.chemin) as init:
+            init.execute("PRAGMA journal_mode=WAL")
+            init.executescript(self.SCHEMA)
+
+        # Connexion de lecture partagée, protégée par un verrou
+        self.lecture = sqlite3.connect(self.chemin, check_same_thread=False)
+        self.verrou_lecture = threading.Lock()
+
+        self.writer = threading.Thread(target=self._ecrire, daemon=True)
+        self.writer.start()
+
+    def _ecrire(self):
+        """
+        @brief Boucle du thread d'écriture
+
+        Attend une première opération puis vide la file par lots de TAILLE_LOT,
+        regroupe les requêtes identiques (executemany) et valide une seule transaction par lot.
+        """
+        conn = sqlite3.connect(self.chemin)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        fin = False
+
+        while not fin:
+            lot = [self.file.get()]
+            while len(lot) < self.TAILLE_LOT:
+                try:
+                    lot.append(self.file.get_nowait())
+                except queue.Empty:
+                    break
+
+            requetes = {}
+            evenements = []
+            for op in lot:
+                if op is None:
+                    fin = True
+                elif isinstance(op, threading.Event):
+                    evenements.append(op)
+                else:
+                    sql, params = op
+                    requetes.setdefault(sql, []).extend(params)
+
+            try:
+                with conn:
+                    for sql, params in requetes.items():
+                        conn.executemany(sql, params)
+            except sqlite3.Error as e:
+                print(f"Erreur de l'historique : {e}")
+
+            for evenement in evenements:
+                evenement.set()
+
+        conn.close()
+
+    @staticmethod
+    def valeur_numerique(vote):
+        """
+        @brief Convertit un vote en valeur numérique
+
+        @param vote Vote brut tel que reçu ('5', '-1', 'cafe'...)
+        @return La valeur, ou None pour les cartes '?' et café
+        """
+        try:
+            valeur = float(vote)
+        except ValueError:
+            return None
+        return None if valeur < 0 else valeur
+
+    def ouvrir_session(self, mode, nb_joueurs):
+        """
+        @brief Déclare une nouvelle session
+
+        @param mode Mode de jeu choisi par l'hôte
+        @param nb_joueurs Nombre de joueurs connectés
+        @return L'identifiant de la session
+        """
+        session_id = uuid.uuid4().hex
+        self.file.put(("INSERT INTO sessions (id, debut, mode, nb_joueurs) VALUES (?, ?, ?, ?)",
+                       [(session_id, time.time(), mode, nb_joueurs)]))
+        return session_id
+
+    def fermer_session(self, session_id):
+        """
+        @brief Horodate la fin d'une session
+
+        @param session_id Identifiant de la session
+        """
+        self.file.put(("UPDATE sessions SET fin = ? WHERE id = ?", [(time.time(), session_id)]))
+
+    def enregistrer_tour(self, session_id, position, numero, full_list, consensus):
+        """
+        @brief Enregistre un tour de vote et tous les votes individuels
+
+        @param session_id Identifiant de la session
+        @param position Position de la tâche dans le backlog
+        @param numero Numéro du tour pour cette tâche
+        @param full_list Liste des [pseudo, vote] reçus
+        @param consensus True si le tour a abouti à une estimation
+        """
+        self.file.put(("INSERT OR REPLACE INTO tours (session_id, position, numero, consensus, horodatage) VALUES (?, ?, ?, ?, ?)",
+                       [(session_id, position, numero, int(consensus), time.time())]))
+        self.file.put(("INSERT INTO votes (session_id, position, numero, pseudo, vote, valeur) VALUES (?, ?, ?, ?, ?, ?)",
+                       [(session_id, position, numero, pseudo, vote, self.valeur_numerique(vote))
+                        for pseudo, vote in full_list]))
+
+    def enregistrer_tache(self, session_id, position, texte, estimation, nb_tours):
+        """
+        @brief Enregistre l'estimation finale d'une tâche
+
+        @param session_id Identifiant de la session
+        @param position Position de la tâche dans le backlog
+        @param texte Intitulé de la tâche
+        @param estimation Estimation retenue
+        @param nb_tours Nombre de tours nécessaires pour l'obtenir
+        """
+        self.file.put(("INSERT OR REPLACE INTO taches (session_id, position, texte, estimation, nb_tours) VALUES (?, ?, ?, ?, ?)",
+                       [(session_id, position, texte, estimation, nb_tours)]))
+
+    def enregistrer_duree(self, session_id, position, numero, phase, duree):
+        """
+        @brief Enregistre la durée d'une phase d'un tour
+
+        @param session_id Identifiant de la session
+        @param position Position de la tâche dans le backlog
+        @param numero Numéro du tour pour cette tâche
+        @param phase 'vote' (jusqu'au dernier vote reçu) ou 'discussion' (jusqu'à ce que tous soient prêts)
+        @param duree Durée en secondes
+        """
+        self.file.put(("INSERT INTO durees (session_id, position, numero, phase, duree, horodatage) VALUES (?, ?, ?, ?, ?, ?)",
+                       [(session_id, position, numero, phase, duree, time.time())]))
+
+    def flush(self, timeout=None):
+        """
+        @brief Attend que toutes les écritures en attente soient validées
+
+        @param timeout Délai maximal d'attente en secondes
+        @return True si les écritures ont été validées
+        """
+        evenement = threading.Event()
+        self.file.put(evenement)
+        return evenement.wait(timeout)
+
+    def fermer(self):
+        """
+        @brief Valide les écritures en attente et ferme la base
+        """
+        self.file.put(None)
+        self.writer.join()
+        with self.verrou_lecture:
+            self.lecture.close()
+
+    def _requete(self, sql, params=()):
+        """
+        @brief Exécute une requête de lecture
+
+        @param sql Requête SQL
+        @param params Paramètres de la requête
+        @return Liste des lignes
+        """
+        with self.verrou_lecture:
+            return self.lecture.execute(sql, params).fetchall()
+
+    def biais_par_joueur(self, pseudo=None):
+        """
+        @brief Calcule le biais moyen de chaque joueur
+
+        Le biais est l'écart moyen entre les votes du joueur et l'estimation finale retenue pour la tâche.
+
+        @param pseudo Restreint le calcul à un joueur (optionnel)
+        @return Dictionnaire {pseudo: (biais moyen, nombre de votes)}
+        """
+        sql = """
+            SELECT v.pseudo, AVG(v.valeur - t.estimation), COUNT(*)
+            FROM votes v JOIN taches t ON t.session_id = v.session_id AND t.position = v.position
+            WHERE v.valeur IS NOT NULL AND t.estimation IS NOT NULL
+        """
+        params = ()
+        if pseudo is not None:
+            sql += " AND v.pseudo = ?"
+            params = (pseudo,)
+        sql += " GROUP BY v.pseudo"
+        return {p: (biais, nb) for p, biais, nb in self._requete(sql, params)}
+
+    def tours_avant_consensus(self):
+        """
+        @brief Répartition du nombre de tours nécessaires pour estimer une tâche
+
+        @return Dictionnaire {nombre de tours: nombre de tâches}
+        """
+        lignes = self._requete("SELECT nb_tours, COUNT(*) FROM taches WHERE estimation IS NOT NULL GROUP BY nb_tours")
+        return dict(lignes)
+
+    def distribution_estimations(self, texte=None):
+        """
+        @brief Distribution des estimations finales
+
+        @param texte Restreint la distribution à un intitulé de tâche (optionnel)
+        @return Dictionnaire {estimation: nombre de tâches}
+        """
+        if texte is None:
+            lignes = self._requete("SELECT estimation, COUNT(*) FROM taches WHERE estimation IS NOT NULL GROUP BY estimation")
+        else:
+            lignes = self._requete("SELECT estimation, COUNT(*) FROM taches WHERE texte = ? AND estimation IS NOT NULL GROUP BY estimation", (texte,))
+        return dict(lignes)
+
+
+def lire_taches_estimees(chemin='./historique.db'):
+    """
+    @brief Parcourt les tâches estimées de l'historique, de la plus ancienne à la plus récente
+
+    La base est ouverte en lecture seule, sans démarrer de thread d'écriture.
+
+    @param chemin Chemin du fichier SQLite
+    @return Générateur de tuples (intitulé, estimation)
+    """
+    if not os.path.exists(chemin):
+        return
+    conn = sqlite3.connect(f"file:{chemin}?mode=ro", uri=True)
+    try:
+        yield from conn.execute("""
+            SELECT t.texte, t.estimation
+            FROM taches t JOIN sessions s ON s.id = t.session_id
+            WHERE t.estimation IS NOT NULL
+            ORDER BY s.debut, t.position
+        """)
+    finally:
+        conn.close()
+
+
+def lire_durees(phase, chemin='./historique.db', limite=500):
+    """
+    @brief Dernières durées enregistrées pour une phase des tours
+
+    @param phase 'vote' ou 'discussion'
+    @param chemin Chemin du fichier SQLite
+    @param limite Nombre maximal de durées, les plus récentes
+    @return Liste des durées en secondes
+    """
+    if not os.path.exists(chemin):
+        return []
+    conn = sqlite3.connect(f"file:{chemin}?mode=ro", uri=True)
+    try:
+        return [duree for duree, in conn.execute(
+            "SELECT duree FROM durees WHERE phase = ? ORDER BY horodatage DESC LIMIT ?", (phase, limite))]
+    except sqlite3.OperationalError:
+        return []  # Base antérieure aux durées
+    finally:
+        conn.close()
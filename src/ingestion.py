@@ -0,0 +1,132 @@
+import json
+import os
+import queue
+import threading
+
+INTERVALLE_SCRUTATION = 1.0  # Délai entre deux vérifications de la source (secondes)
+
+
+def lire_taches(chemin):
+    """
+    @brief Lit les tâches d'un fichier de backlog
+
+    @param chemin Fichier JSON : dictionnaire {clé: tâche} ou liste de tâches (numérotées à partir de 1)
+    @return Dictionnaire {clé: tâche}
+    """
+    with open(chemin, 'r', encoding='utf-8') as f:
+        donnees = json.load(f)
+    if isinstance(donnees, list):
+        donnees = {str(i + 1): tache for i, tache in enumerate(donnees)}
+    if not isinstance(donnees, dict):
+        raise ValueError("Backlog attendu : dictionnaire {clé: tâche} ou liste de tâches")
+    return {str(cle): str(tache) for cle, tache in donnees.items()}
+
+
+class IngestionBacklog:
+    """
+    @brief Surveillance d'un backlog pendant la partie.
+
+    La source est soit le fichier de backlog chargé par l'hôte, soit un dossier de
+    dépôt dont chaque fichier JSON est un backlog. Un thread vérifie la date de
+    modification des fichiers et relit ceux qui ont changé ; les tâches nouvelles
+    ou modifiées sont placées dans une file que le moteur vide entre deux tâches.
+    Le thread de jeu ne lit donc jamais de fichier.
+
+    Les clés des tâches d'un dossier de dépôt sont préfixées du nom de leur fichier.
+    """
+
+    def __init__(self, source, connues=None, intervalle=INTERVALLE_SCRUTATION):
+        """
+        @brief Constructeur de IngestionBacklog.
+
+        @param source Fichier de backlog ou dossier de dépôt
+        @param connues Tâches déjà chargées {clé: tâche}, qui ne sont pas renvoyées
+        @param intervalle Délai entre deux vérifications (secondes)
+        """
+        self.source = source
+        self.intervalle = intervalle
+        self.connues = dict(connues or {})  # clé -> dernier intitulé vu
+        self.dates = {}  # fichier -> (date de modification, taille) à la dernière lecture
+        self.file = queue.Queue()
+        self.arret = threading.Event()
+        self.thread = None
+        if connues is not None and os.path.isfile(source):
+            self.dates[source] = self.signature(source)  # Déjà chargé par l'hôte
+
+    def signature(self, chemin):
+        """
+        @brief Date de modification et taille d'un fichier, pour détecter un changement
+        """
+        stat = os.stat(chemin)
+        return stat.st_mtime_ns, stat.st_size
+
+    def demarrer(self):
+        """
+        @brief Lance la surveillance dans un thread dédié
+        """
+        self.thread = threading.Thread(target=self.surveiller, daemon=True)
+        self.thread.start()
+
+    def surveiller(self):
+        """
+        @brief Boucle du thread : vérifie la source à intervalle régulier
+        """
+        while not self.arret.wait(self.intervalle):
+            self.verifier()
+
+    def fichiers(self):
+        """
+        @brief Fichiers de la source, dans l'ordre de leur nom
+
+        @return Liste de tuples (chemin, préfixe des clés)
+        """
+        if not os.path.isdir(self.source):
+            return [(self.source, '')]
+        noms = sorted(nom for nom in os.listdir(self.source) if nom.endswith('.json') and not nom.startswith('.'))
+        return [(os.path.join(self.source, nom), nom[:-len('.json')] + ':') for nom in noms]
+
+    def verifier(self):
+        """
+        @brief Relit les fichiers modifiés et met en file les tâches nouvelles ou modifiées
+
+        @return Nombre de tâches mises en file
+        """
+        nouvelles = {}
+        for chemin, prefixe in self.fichiers():
+            try:
+                signature = self.signature(chemin)
+                if self.dates.get(chemin) == signature:
+                    continue
+                taches = lire_taches(chemin)
+            except (OSError, ValueError) as e:
+                # Fichier absent ou en cours d'écriture : il sera relu à la vérification suivante
+                print(f"Backlog illisible ({chemin}) : {e}")
+                continue
+            self.dates[chemin] = signature
+            for cle, tache in taches.items():
+                cle = prefixe + cle
+                if self.connues.get(cle) != tache:
+                    self.connues[cle] = tache
+                    nouvelles[cle] = tache
+        if nouvelles:
+            self.file.put(nouvelles)
+        return len(nouvelles)
+
+    def recuperer(self):
+        """
+        @brief Tâches arrivées depuis le dernier appel (ne bloque pas)
+
+        @return Dictionnaire {clé: tâche}, dans l'ordre d'arrivée
+        """
+        taches = {}
+        while True:
+            try:
+                taches.update(self.file.get_nowait())
+            except queue.Empty:
+                return taches
+
+    def arreter(self):
+        """
+        @brief Arrête la surveillance
+        """
+        self.arret.set()
@@ -1,21 +1,46 @@
 import tkinter as tk
 from tkinter import ttk, filedialog
 from tkinter import font as tkfont
+import re
+import select
 import socket
 import threading
 import json
-from collections import Counter
 import time
 import os
 import sys
 
-class Exit(Exception):
-    """
-    @brief Exception personnalisée pour signaler une sortie anticipée du jeu.
-    
-    Cette exception est utilisée pour terminer prématurément la session de jeu Planning Poker.
-    """
-    pass
+from historique import HistoriqueStore
+from rappel import IndexSimilarite, construire_index
+from doublons import analyser_backlog
+from consensus import MODES
+from moteur import Exit, MoteurPartie
+from protocole import (TAG_START, TAG_NEW, TAG_FEEDBACK, TAG_END, TAG_PRET, TAG_TACHE, collecter_votes, lire_feedback,
+                       purger_connexions)
+from transport import transport_par_defaut
+from multicast import TAG_REPAIR, DiffuseurMulticast, RecepteurMulticast, LecteurTrames
+from sauvegarde import sauvegarder_backlogs
+from export import ExportResultats
+from admission import BACKLOG_ECOUTE, Admission
+from replication import JournalReplication
+from joueurs import DiffusionSalon, RegistreJoueurs
+from profilage import PROFILEUR
+from enregistrement import Enregistreur, meta_estimations
+from tableau import PORT_TABLEAU, EtatPartie, ServeurEtat
+from spectateurs import DiffusionSpectateurs
+from compression import (MARQUEUR, ROLE_SPECTATEUR, Compression, Decompresseur, construire_connexion, lire_connexion,
+                         lire_references, lire_role, negocier)
+from prechargement import PrechargementTaches
+from ingestion import IngestionBacklog
+from budgets import proposer_budgets
+from synthese import PagesVotes, synthese_votes
+from processus import ProcessusMoteur
+from asynchrone import PORT_ASYNCHRONE, FenetreAsynchrone
+
+ATTENTE_REPARATIONS = 5  # Délai maximal de lecture des dernières réparations multicast en fin de partie (secondes)
+# Début d'un message de l'hôte (tag ou trame compressée) : sépare les messages reçus ensemble
+DEBUT_MESSAGE = re.compile(b'|'.join(re.escape(tag.encode()) for tag in (TAG_NEW, TAG_FEEDBACK, TAG_END, TAG_TACHE))
+                           + b'|' + re.escape(MARQUEUR))
 
 # Classe pour gérer l'interface
 class PlanningPokerApp:
@@ -88,7 +113,7 @@ class HostGame:
     déroulement de la partie côté serveur.
     """
 
-    def __init__(self, parent_window):
+    def __init__(self, parent_window, transport=None):
         """
         @brief Constructeur de HostGame.
         
@@ -96,17 +121,26 @@ class HostGame:
         et configure l'interface d'hébergement.
         
         @param parent_window La fenêtre parente Tkinter
+        @param transport Transport des connexions (TCP par défaut, voir transport.py)
         """
 
         self.parent = parent_window
         self.parent.withdraw()
+        self.transport = transport or transport_par_defaut()
 
         self.PORT = 16383
-        self.clients = []
-        self.pseudo_list = []
+        self.joueurs = RegistreJoueurs()
+        self.salon = DiffusionSalon(self.joueurs)  # Liste des joueurs envoyée au salon par un seul thread
+        self.spectateurs = DiffusionSpectateurs()  # Hors quorum : ne votent pas et ne ralentissent pas les joueurs
         self.started = False
         self.server_socket = None
+        self.admission = None  # Accueil des connexions (admission.py)
         self.stop_server = threading.Event()
+        self.index_rappel = IndexSimilarite()
+        self.journal = None  # Journal de réplication vers l'hôte de secours
+        self.moteur_distant = None  # ProcessusMoteur de la partie jouée dans un processus séparé
+        self.fenetre_asynchrone = None  # FenetreAsynchrone ouverte sur le backlog avant la partie
+        self.bilan_asynchrone = None    # Estimations décidées pendant la fenêtre asynchrone
 
         self.IP = self.get_ip_address()
         self.window = tk.Toplevel(parent_window)
@@ -115,6 +149,29 @@ class HostGame:
         self.start_server_thread()
         self.setup_host_interface()
 
+    @property
+    def clients(self):
+        """
+        @brief Instantané des connexions des joueurs (à ne pas modifier)
+        """
+        return self.joueurs.connexions()
+
+    @clients.setter
+    def clients(self, connexions):
+        """
+        @brief Remplace les joueurs par des connexions dont le pseudo est inconnu
+        """
+        self.joueurs.vider()
+        for conn in connexions:
+            self.joueurs.ajouter(conn, '')
+
+    @property
+    def pseudo_list(self):
+        """
+        @brief Instantané des pseudos des joueurs (à ne pas modifier)
+        """
+        return self.joueurs.pseudos()
+
     def on_window_close(self):
         """
         @brief Gère la fermeture de la fenêtre d'hébergement.
@@ -122,11 +179,15 @@ class HostGame:
         Arrête le serveur et ferme le socket en cours.
         """
         self.stop_server.set()
+        self.salon.arreter()
         if self.server_socket:
             try:
                 self.server_socket.close()
             except:
                 pass
+        if self.fenetre_asynchrone:
+            self.fenetre_asynchrone.fermer()
+            self.fenetre_asynchrone = None
         self.window.destroy()
 
     # Recuperer l'ip de l'hôte
@@ -199,15 +260,14 @@ class HostGame:
         self.table.column("Pseudos", anchor=tk.CENTER)
         self.table.heading("Pseudos", text="Joueurs")
         self.table.pack(pady=5)
+        self.update_table()  # Joueurs restés connectés depuis la partie précédente
 
         # Game mode options
         self.mode_banner = tk.PhotoImage(file='assets/mode_banner.png')
         tk.Label(self.window, image=self.mode_banner).pack()
-        options = ['Majorité absolue', 'Majorité relative', 'Moyenne', 'Médiane']
-
         self.choix_var = tk.StringVar(self.window)
-        self.choix_var.set(options[0])
-        self.choix = tk.OptionMenu(self.window, self.choix_var, *options)
+        self.choix_var.set(MODES[0])
+        self.choix = tk.OptionMenu(self.window, self.choix_var, *MODES)
         self.choix.pack(pady=20)
 
         # Backlog button
@@ -227,9 +287,74 @@ class HostGame:
         self.time_vote_entry = tk.Entry(self.window, textvariable=self.time_vote_var)
         self.time_vote_entry.pack(pady=2)
 
+        # Durée de la fenêtre de vote asynchrone, ouverte une fois le backlog chargé
+        tk.Label(self.window, text="Fenêtre asynchrone (minutes) :", bg="#0c5219", fg='white', font=self.police).pack(pady=2)
+        self.duree_asynchrone_var = tk.StringVar(self.window, value="1440")
+        tk.Entry(self.window, textvariable=self.duree_asynchrone_var).pack(pady=2)
+
+        # Reprise des estimations passées pour les tâches quasi identiques
+        self.rappel_auto_var = tk.BooleanVar(self.window, value=False)
+        tk.Checkbutton(self.window, text="Faire confirmer les tâches déjà estimées", variable=self.rappel_auto_var,
+                       bg="#0c5219", fg='white', selectcolor="#061d0a", font=self.police).pack(pady=2)
+
+        # Diffusion multicast pour les grandes salles sur un même réseau local
+        self.multicast_var = tk.BooleanVar(self.window, value=False)
+        tk.Checkbutton(self.window, text="Diffusion multicast (réseau local)", variable=self.multicast_var,
+                       bg="#0c5219", fg='white', selectcolor="#061d0a", font=self.police).pack(pady=2)
+
+        # Enregistrement des messages de la partie, pour la rejouer avec enregistrement.py
+        self.enregistrement_var = tk.BooleanVar(self.window, value=False)
+        tk.Checkbutton(self.window, text="Enregistrer la session", variable=self.enregistrement_var,
+                       bg="#0c5219", fg='white', selectcolor="#061d0a", font=self.police).pack(pady=2)
+
+        # État de la partie en JSON pour les tableaux de bord (http://<IP>:16386/etat)
+        self.tableau_var = tk.BooleanVar(self.window, value=False)
+        tk.Checkbutton(self.window, text=f"Tableau de bord HTTP (port {PORT_TABLEAU})", variable=self.tableau_var,
+                       bg="#0c5219", fg='white', selectcolor="#061d0a", font=self.police).pack(pady=2)
+
+        # Export des estimations au fil de la partie (CSV, JSONL et import en masse du tracker)
+        self.export_var = tk.BooleanVar(self.window, value=False)
+        tk.Checkbutton(self.window, text="Exporter les résultats (exports/)", variable=self.export_var,
+                       bg="#0c5219", fg='white', selectcolor="#061d0a", font=self.police).pack(pady=2)
+
+        # Discussion écourtée lorsque tous les joueurs ont cliqué sur « Prêt »
+        self.discussion_anticipee_var = tk.BooleanVar(self.window, value=False)
+        tk.Checkbutton(self.window, text="Finir la discussion quand tous sont prêts", variable=self.discussion_anticipee_var,
+                       bg="#0c5219", fg='white', selectcolor="#061d0a", font=self.police).pack(pady=2)
+
+        # Tâches ajoutées au fichier de backlog pendant la partie, posées après les autres
+        self.ingestion_var = tk.BooleanVar(self.window, value=False)
+        tk.Checkbutton(self.window, text="Suivre les ajouts au backlog", variable=self.ingestion_var,
+                       bg="#0c5219", fg='white', selectcolor="#061d0a", font=self.police).pack(pady=2)
+
+        # Moteur de la partie dans son propre processus : l'interface ne ralentit pas la collecte des votes
+        self.processus_var = tk.BooleanVar(self.window, value=False)
+        tk.Checkbutton(self.window, text="Moteur réseau dans un processus séparé", variable=self.processus_var,
+                       bg="#0c5219", fg='white', selectcolor="#061d0a", font=self.police).pack(pady=2)
+
+        # Réplication vers un hôte de secours (replication.py), qui reprend la partie si cet hôte tombe
+        self.secours_var = tk.BooleanVar(self.window, value=False)
+        tk.Checkbutton(self.window, text="Autoriser un hôte de secours", variable=self.secours_var, command=self.activer_secours,
+                       bg="#0c5219", fg='white', selectcolor="#061d0a", font=self.police).pack(pady=2)
+
         self.window.mainloop()
 
 
+    def activer_secours(self):
+        """
+        @brief Ouvre ou ferme le journal de réplication auquel l'hôte de secours s'abonne
+        """
+        if self.secours_var.get() and not self.journal:
+            try:
+                self.journal = JournalReplication(self.IP)
+                self.journal.publier('joueurs', pseudos=self.pseudo_list)
+            except OSError as e:
+                print(f"Erreur de réplication : {e}")
+                self.secours_var.set(False)
+        elif not self.secours_var.get() and self.journal:
+            self.journal.fermer()
+            self.journal = None
+
     def parcourir(self):
         """
         @brief Ouvre un explorateur de fichier
@@ -246,8 +371,22 @@ class HostGame:
             with open(path, "r", encoding="utf-8") as file:
                 print('Fichier chargé')
                 self.backlog = json.load(file)
+                self.chemin_backlog = path
+                self.index_rappel = construire_index()
+                print(f"Index de rappel : {len(self.index_rappel)} tâches déjà estimées")
+
+                # Regroupement des doublons : une seule estimation par groupe
+                self.analyse = analyser_backlog(self.backlog)
+                print(self.analyse.resume())
+                tk.Label(self.window, text=self.analyse.resume(), bg="#0c5219", fg='white', font=self.police).pack()
+                self.proposer_temps()
                 start_button = tk.PhotoImage(file='assets/start_button.png')
                 tk.Button(self.window, image=start_button, command=self.start_game).pack(pady=10)
+                self.asynchrone_button = tk.Button(self.window, text="Ouvrir la fenêtre asynchrone",
+                                                   command=self.basculer_asynchrone, font=self.police)
+                self.asynchrone_button.pack(pady=2)
+                self.asynchrone_label = tk.Label(self.window, text="", bg="#0c5219", fg='white', font=self.police)
+                self.asynchrone_label.pack()
                 result = tk.Label(self.window, text="Fichier chargé avec succès", bg="#0c5219", fg='lightgreen', font=self.police)
                 self.window.lift()
         else:
@@ -256,17 +395,91 @@ class HostGame:
 
         self.window.mainloop()
 
-    def start_server_thread(self):
+    def proposer_temps(self):
+        """
+        @brief Propose des temps de vote et de discussion d'après les durées des parties précédentes
+        """
+        try:
+            temps_vote, temps_discussion = int(self.time_vote_var.get()), int(self.time_discussion_var.get())
+        except ValueError:
+            return
+        vote, discussion = proposer_budgets(temps_vote, temps_discussion)
+        if vote is None and discussion is None:
+            return
+        vote, discussion = vote or temps_vote, discussion or temps_discussion
+        if (vote, discussion) == (temps_vote, temps_discussion):
+            return
+
+        def appliquer():
+            self.time_vote_var.set(str(vote))
+            self.time_discussion_var.set(str(discussion))
+
+        tk.Label(self.window, text=f"Temps proposés (95 % des tours passés) : vote {vote} s, discussion {discussion} s",
+                 bg="#0c5219", fg='white', font=self.police).pack()
+        tk.Button(self.window, text="Appliquer les temps proposés", command=appliquer, font=self.police).pack(pady=2)
+
+    def basculer_asynchrone(self):
+        """
+        @brief Ouvre la fenêtre de vote asynchrone sur le backlog, ou la ferme avant son échéance
+
+        Les joueurs votent avec `python3 asynchrone.py <IP> <pseudo>` ; seules les tâches
+        sans accord sont posées pendant la partie.
+        """
+        if self.fenetre_asynchrone:
+            self.fermer_asynchrone()
+            return
+        try:
+            duree = float(self.duree_asynchrone_var.get()) * 60
+        except ValueError:
+            print("Durée de la fenêtre asynchrone invalide")
+            return
+        try:
+            self.fenetre_asynchrone = FenetreAsynchrone(self.backlog, duree, analyse=self.analyse,
+                                                        mode=self.choix_var.get(), hote=self.IP)
+        except OSError as e:
+            print(f"Erreur de la fenêtre asynchrone : {e}")
+            return
+        print(f"Fenêtre asynchrone ouverte : python3 asynchrone.py {self.IP} <pseudo> (port {PORT_ASYNCHRONE})")
+        self.asynchrone_button.config(text="Fermer la fenêtre asynchrone")
+        self.suivre_asynchrone()
+
+    def suivre_asynchrone(self):
+        """
+        @brief Affiche l'avancement de la fenêtre asynchrone jusqu'à sa fermeture
+        """
+        fenetre = self.fenetre_asynchrone
+        if not fenetre or not self.asynchrone_label.winfo_exists():
+            return
+        if not fenetre.thread.is_alive():
+            self.fermer_asynchrone()  # Échéance atteinte
+            return
+        self.asynchrone_label.config(text=fenetre.progression())
+        self.window.after(1000, self.suivre_asynchrone)
+
+    def fermer_asynchrone(self):
+        """
+        @brief Ferme la fenêtre asynchrone et garde ses estimations pour la partie
+        """
+        self.bilan_asynchrone = self.fenetre_asynchrone.fermer()
+        self.fenetre_asynchrone = None
+        print(self.bilan_asynchrone.resume())
+        if self.asynchrone_label.winfo_exists():
+            self.asynchrone_label.config(text=self.bilan_asynchrone.resume())
+            self.asynchrone_button.config(state=tk.DISABLED)
+
+    def start_server_thread(self, garder_joueurs=False):
         """
         @brief Lance une écoute sur la méthode d'écoute de connexions entrantes
 
+        @param garder_joueurs Garde les joueurs déjà inscrits (partie suivante)
         """
 
         # Réinitialisez les événements et les états
         self.stop_server.clear()
         self.started = False
-        self.clients = []
-        self.pseudo_list = []
+        if not garder_joueurs:
+            self.joueurs.vider()
+        self.salon.demarrer()
 
         # Créez un nouveau thread pour écouter les clients
         self.server_thread = threading.Thread(target=self.listen_for_clients, daemon=True)
@@ -282,44 +495,35 @@ class HostGame:
         """
 
         try:
-            # Créez un nouveau socket à chaque fois
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
-                # Activation de SO_REUSEADDR
-                server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                server.settimeout(1.0)  # Timeout pour vérifier régulièrement stop_server
-                
-                # Stockez le serveur comme attribut de l'instance
-                self.server_socket = server
-                
-                server.bind((self.IP, 16383))
-                server.listen()
-                print(f"Serveur en écoute sur {self.IP}:{16383}")
+            # Créez un nouveau socket à chaque fois, stocké comme attribut de l'instance
+            server = self.server_socket = self.transport.ecouter(self.IP, self.PORT, BACKLOG_ECOUTE)
+            server.settimeout(1.0)  # Timeout pour vérifier régulièrement stop_server
+            print(f"Serveur en écoute sur {self.IP}:{self.PORT} ({self.transport.nom})")
+
+            # Pseudos lus par un nombre fixe de threads, avec une échéance par connexion
+            self.admission = Admission(self.handle_client)
+            self.admission.demarrer()
+            
+            while not self.stop_server.is_set() and not self.started:
+                try:
+                    # Utilisez accept() avec timeout pour vérifier régulièrement stop_server
+                    server.settimeout(1.0)
+                    self.admission.accepter(server)
                 
-                while not self.stop_server.is_set() and not self.started:
-                    try:
-                        # Utilisez accept() avec timeout pour vérifier régulièrement stop_server
-                        server.settimeout(1.0)
-                        conn, addr = server.accept()
-                        
-                        # Créez un thread pour chaque client
-                        client_thread = threading.Thread(
-                            target=self.handle_client, 
-                            args=(conn,), 
-                            daemon=True
-                        )
-                        client_thread.start()
-                    
-                    except socket.timeout:
-                        # Vérifiez si on doit s'arrêter
-                        if self.stop_server.is_set():
-                            break
-                    except Exception as e:
-                        print(f"Erreur de connexion : {e}")
+                except socket.timeout:
+                    # Vérifiez si on doit s'arrêter
+                    if self.stop_server.is_set():
                         break
+                except Exception as e:
+                    print(f"Erreur de connexion : {e}")
+                    break
         
         except Exception as e:
             print(f"Erreur du serveur : {e}")
         finally:
+            if getattr(self, 'admission', None):
+                print(f"Admission : {self.admission.statistiques()}")
+                self.admission.arreter()
             # Assurez-vous que le socket est bien fermé
             if hasattr(self, 'server_socket'):
                 try:
@@ -328,18 +532,28 @@ class HostGame:
                     pass
 
     # Ajout du client
-    def handle_client(self, conn):
+    def handle_client(self, conn, message=None):
         """
         @brief Inscrit les clients dans une liste
 
         @param conn : La connexion lancée par le server au début de l'écoute
+        @param message : Message de connexion déjà lu par l'admission (lu sur conn sinon)
         """
 
-        pseudo = conn.recv(1024).decode()
-        self.clients.append(conn)
-        self.pseudo_list.append(pseudo)
-        self.update_table()
+        with PROFILEUR.span('accueil'):
+            if message is None:
+                message = conn.recv(1024).decode()
+            pseudo, codecs = lire_connexion(message)
+            if lire_role(message) == ROLE_SPECTATEUR:
+                self.spectateurs.ajouter(conn, pseudo)
+                print(f"Spectateur connecté : {pseudo} ({len(self.spectateurs)} spectateur(s))")
+                return
+            self.joueurs.ajouter(conn, pseudo, negocier(codecs), lire_references(message))
+        with PROFILEUR.span('affichage_tk'):
+            self.update_table()
         self.broadcast_pseudos()
+        if self.journal:
+            self.journal.publier('joueurs', pseudos=self.pseudo_list)
 
     # Mettre à jour la table du client
     def update_table(self):
@@ -357,11 +571,10 @@ class HostGame:
         """
         @brief Envoi les pseudos à tous les clients
 
-        Envoie des pseudos, processus nécessaire à l'actualisation de l'interface chez chaque utilisateurs
+        Envoie des pseudos, processus nécessaire à l'actualisation de l'interface chez chaque utilisateurs.
+        Ne bloque jamais : l'envoi est fait, regroupé avec les arrivées proches, par le thread du salon.
         """
-        data = ';'.join(self.pseudo_list)
-        for client in self.clients:
-            client.sendall(data.encode())
+        self.salon.signaler()
 
     # Lancer la partie
     def start_game(self):
@@ -370,12 +583,19 @@ class HostGame:
 
         Envoi à chaque utilisateurs le tag de lancement de partie
         """
+        if not getattr(self, 'backlog', None):
+            print("Chargez un backlog avant de lancer la partie")
+            return
+        if self.fenetre_asynchrone:
+            self.fermer_asynchrone()
+        self.purger_joueurs()
         self.started = True
         self.stop_server.set()  # Arrêtez l'écoute des nouveaux clients
-        
+        self.salon.arreter()  # Plus aucun message du salon : les connexions servent à la partie
+
         # Envoi du signal à tous les joueurs
         for client in self.clients:
-            client.sendall("@@START@@".encode())
+            client.sendall(TAG_START.encode())
         print("Partie lancée!")
         self.window.destroy()
         self.start_game_loop()
@@ -387,9 +607,13 @@ class HostGame:
         """
         self.paused = False
         self.mode = self.choix_var.get()
-        self.resultat = []
+        if not hasattr(self, 'analyse'):
+            self.analyse = analyser_backlog(self.backlog)
+
+        if self.journal:
+            self.journal.publier('partie', backlog=self.backlog, mode=self.mode,
+                                 temps_vote=self.time_vote_var.get(), temps_discussion=self.time_discussion_var.get())
 
-        
         game_window = tk.Toplevel()
         game_window.resizable(False, False) 
         game_window.title("Planning Poker - Partie en cours")
@@ -403,170 +627,219 @@ class HostGame:
             icon = tk.PhotoImage('assets/icon.png')
             game_window.tk.call('wm', 'iconphoto', game_window._w, icon)
 
-        
+        def afficher(texte, couleur='white'):
+            with PROFILEUR.span('affichage_tk'):
+                tk.Label(game_window, text=texte, bg="black", fg=couleur, font=self.police).pack(side="top")
+                game_window.update()
 
-        for client in self.clients:
-            client.sendall(str(self.time_vote_var.get()+':'+self.time_discussion_var.get()).encode()) # On transmet à tous les utilisateurs le temps des votes
-        time.sleep(1)
-
-        n=1
-        # On parcourt toutes les questions dans le backlog
-        try:
-            for key, value in self.backlog.items():
-            
-                question = value
-                for client in self.clients:
-                    client.sendall(question.encode())
-                # Interface principale pour la partie
-
-                condition = False
-                nb_rounds = 0
-                while not condition:
-                    tk.Label(game_window, text=f"Estimez la tâche suivante : {question}", bg="black", fg='white', font=self.police).pack(side="top")       
-                    tk.Label(game_window, text=f"En attente des votes... ", bg="black", fg='white', font=self.police).pack(side="top")
+        def attendre(countdown_time, fin=None):
+            countdown_label = tk.Label(game_window, text=f"Temps restant: {countdown_time}", bg="black", fg='white', font=self.police)
+            countdown_label.pack(side="top")
 
+            while countdown_time > 0:
+                countdown_label.config(text=f"Temps restant: {countdown_time}")
+                game_window.update()  # Met à jour l'interface pour afficher le nouveau temps
+                if fin and fin():
+                    countdown_label.config(text="Tous les joueurs sont prêts")
                     game_window.update()
+                    return
+                time.sleep(1)  # Attendre 1 seconde
+                countdown_time -= 1  # Décrémenter le temps restant
 
-                    # Démarre la collecte des votes
-                    self.collect_votes(game_window)
-
-                    for vote in self.votes:
-                        if "cafe" in vote:
-                            raise Exit
-                            
-
-                    if nb_rounds > 0:
-                        match self.mode:
-                            case 'Moyenne':
-
-                                lst = [0 if int(x) == -1 else int(x) for x in self.votes]
-                                avg = sum(lst) / len(lst) if lst else 0
-                                self.resultat.append(avg)
-                                tk.Label(game_window, text=f"Moyenne : {avg}", bg="black", fg='white', font=self.police).pack(side="top")
-
-                                condition = True
-
-                            case 'Mediane':
-
-                                lst = sorted(map(float, self.votes))  # Convertir en nombres et trier
-                                n = len(lst)
-                                milieu = n // 2
-
-                                if n % 2 == 0:
-                                    med = (lst[milieu - 1] + lst[milieu]) / 2
-                                else:
-                                    med = lst[milieu]
-
-                                self.resultat.append(med)
-                
-                                tk.Label(game_window, text=f"Mediane : {med}", bg="black", fg='white', font=self.police).pack(side="top")
-                                condition = True
-
-                            case 'Majorité absolue':
-
-                                if len(set(self.votes)) == 1:
-                                    self.resultat.append(int(self.votes[0]))
-                                    tk.Label(game_window, text=f"Majorité absolue ! : {self.votes[0]}", bg="black", fg='white', font=self.police).pack(side="top")   
-                                    condition = True
-                                else:
-                                    tk.Label(game_window, text=f"Pas de majorité absolue..", bg="black", fg='white', font=self.police).pack(side="top")   
-
-                            case 'Majorité relative':
-
-                                count = Counter(self.votes)
-                                most_common = count.most_common(1)
-                                if most_common:
-                                    value, freq = most_common[0]
-                                    if freq > len(self.votes) / 2:
-                                        self.resultat.append(int(value))
-                                        tk.Label(game_window, text=f"Majorité relative ! : {value}", bg="black", fg='white', font=self.police).pack(side="top")
-                                        condition = True
-
-                                tk.Label(game_window, text=f"Pas de majorité relative..", bg="black", fg='white', font=self.police).pack(side="top")
-
-                    else:
-                        if len(set(self.votes)) == 1:
-                            self.resultat.append(int(self.votes[0]))
-                            tk.Label(game_window, text=f"Majorité absolue ! : {self.votes[0]}", bg="black", fg='white', font=self.police).pack(side="top")   
-                            condition = True
-                        else:
-                            tk.Label(game_window, text=f"Pas de majorité absolue..", bg="black", fg='white', font=self.police).pack(side="top")
-
-
-                    for client in self.clients: ## On fait un feedback à tous les clients
-                        tag = '@@FEEDBACK@@'
-                        client.sendall(tag.encode())
-
-                        full_char = []
-                        for el in self.full_list:
-                            full_char.append(':'.join(el))
-
-                        full_char = str(int(condition)) + ';'.join(full_char) # On transmet l'état de la condition de la question ainsi que la liste de tous les votes
-                        client.sendall(full_char.encode())
-                    
-
-                    if not condition:   # Temps de disccussion
-
-                        countdown_time = int(self.time_discussion_var.get()) # On récupere les paramètres de la partie
-                        countdown_label = tk.Label(game_window, text=f"Temps restant: {countdown_time}", bg="black", fg='white', font=self.police)
-                        countdown_label.pack(side="top")
-
-                        while countdown_time > 0:
-                            countdown_label.config(text=f"Temps restant: {countdown_time}")
-                            game_window.update()  # Met à jour l'interface pour afficher le nouveau temps
-                            time.sleep(1)  # Attendre 1 seconde
-                            countdown_time -= 1  # Décrémenter le temps restant
-
-                        countdown_label.config(text="Temps écoulé !") 
+            countdown_label.config(text="Temps écoulé !") 
+            game_window.update()
 
-                    game_window.update()
+        # Moteur dans un processus séparé : il fait lui-même toutes les entrées-sorties de la partie
+        if self.processus_var.get() and self.moteur_separable():
+            self.executer_processus(game_window, afficher)
+            self.afficher_fin(game_window)
+            return
 
-                    for client in self.clients: ## On prévient les clients qu'on passe à l'étape suivante
-                        tag = '@@NEW@@'
-                        client.sendall(tag.encode())
+        # Historique des votes et des estimations
+        self.historique = HistoriqueStore()
 
-                    time.sleep(1)
+        # Diffusion multicast : chaque message n'est envoyé qu'une fois pour toute la salle
+        self.diffuseur = DiffuseurMulticast(interface=self.IP) if self.multicast_var.get() else None
 
-                    if not condition:
-                        for client in self.clients:
-                            client.sendall(question.encode())
+        # Tableau de bord : l'état est servi jusqu'à la fermeture de la partie
+        self.etat = None
+        self.serveur_etat = None
+        if self.tableau_var.get():
+            try:
+                self.etat = EtatPartie()
+                self.serveur_etat = ServeurEtat(self.etat, self.IP)
+                print(f"Tableau de bord : http://{self.IP}:{PORT_TABLEAU}/etat")
+            except OSError as e:
+                print(f"Erreur du tableau de bord : {e}")
+                self.etat = None
+
+        # Compression des longs messages pour les joueurs qui l'ont négociée
+        self.compression = None
+        if any(joueur.compression for joueur in self.joueurs.joueurs()):
+            self.compression = Compression(self.backlog)
+            for joueur in self.joueurs.joueurs():
+                self.compression.inscrire(joueur.conn, joueur.compression)
+
+        # Intitulés des tâches envoyés d'avance : les questions ne sont ensuite désignées que par leur position
+        self.prechargement = None
+        if not self.diffuseur and any(joueur.references for joueur in self.joueurs.joueurs()):
+            self.prechargement = PrechargementTaches(self.backlog)
+            for joueur in self.joueurs.joueurs():
+                if joueur.references:
+                    self.prechargement.inscrire(joueur.conn)
+
+        # Surveillance du fichier de backlog : les nouvelles tâches sont lues hors du thread de jeu
+        ingestion = None
+        if self.ingestion_var.get() and getattr(self, 'chemin_backlog', None):
+            ingestion = IngestionBacklog(self.chemin_backlog, self.backlog)
+
+        clients = self.clients
+        self.enregistreur = None
+        if self.enregistrement_var.get():
+            os.makedirs('enregistrements', exist_ok=True)
+            chemin = os.path.join('enregistrements', time.strftime('session_%Y%m%d_%H%M%S.ppr'))
+            self.enregistreur = Enregistreur(chemin, {
+                'backlog': self.backlog, 'mode': self.mode, 'pseudos': self.pseudo_list,
+                'temps_vote': self.time_vote_var.get(), 'temps_discussion': self.time_discussion_var.get(),
+                'multicast': self.diffuseur is not None, 'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'compression': [joueur.compression for joueur in self.joueurs.joueurs()],
+                'references': [self.prechargement is not None and joueur.references for joueur in self.joueurs.joueurs()],
+                **meta_estimations(self.index_rappel, self.rappel_auto_var.get(), self.bilan_asynchrone,
+                                   ingestion=ingestion.source if ingestion else None)})
+            clients = self.enregistreur.envelopper(clients)
+            ingestion = self.enregistreur.envelopper_ingestion(ingestion)
+        if ingestion:
+            ingestion.demarrer()
+
+        export = None
+        if self.export_var.get():
+            export = ExportResultats('exports', nom=time.strftime('resultats_%Y%m%d_%H%M%S'))
+
+        self.moteur = MoteurPartie(clients, self.backlog, self.mode,
+                                   self.time_vote_var.get(), self.time_discussion_var.get(),
+                                   analyse=self.analyse, index_rappel=self.index_rappel,
+                                   rappel_auto=self.rappel_auto_var.get(), historique=self.historique,
+                                   afficher=afficher, attendre=attendre, diffuseur=self.diffuseur, replication=self.journal,
+                                   registre=self.joueurs, compression=self.compression, etat=self.etat,
+                                   spectateurs=self.spectateurs, export=export, prechargement=self.prechargement,
+                                   ingestion=ingestion, discussion_anticipee=self.discussion_anticipee_var.get(),
+                                   asynchrone=self.bilan_asynchrone)
+        try:
+            with PROFILEUR.span('partie'):
+                self.resultat = self.moteur.executer()
+        finally:
+            if ingestion:
+                ingestion.arreter()
+            # Journal complet (TYPE_FIN) même si la partie s'est arrêtée sur une erreur
+            if self.enregistreur:
+                self.enregistreur.fermer(self.moteur.resultat, self.moteur.paused)
+        self.paused = self.moteur.paused
 
-                    nb_rounds += 1
+        # fin de la partie enregistrement des tâches   
 
-            n += 1 # Incrémente le nb de questions 
-        except Exit:
-            self.paused = True
+        # Si la partie a été interrompue on enregistre aussi un sous-backlog à la place de l'ancien
+        with PROFILEUR.span('sauvegarde'):
+            sauvegarder_backlogs(self.backlog, self.resultat, self.paused, atomique=True)
 
-        for client in self.clients:
-            tag = '@@END@@'
-            print('Fin de la partie')
-            client.sendall(tag.encode())
-
-        # fin de la partie enregistrement des tâches   
+        print('Fichier sauvegardé')
 
-        if self.paused: # Si la partie s'est terminée correctement on enregistre un sousback log à la place de l'ancien
+        self.historique.fermer()
+        if self.diffuseur:
+            self.diffuseur.fermer()
+        if self.journal:
+            self.journal.fermer()
+            self.journal = None
+            self.secours_var.set(False)
 
-            new_backlog = {task: self.resultat[i] for i, task in enumerate(list(self.backlog.values())[:n])}
-            sub_backlog = dict(list(self.backlog.items())[n:])  # Créer un sous-backlog à partir de n
-            sub_backlog_indice = {i + 1: value for i, (key, value) in enumerate(sub_backlog.items())}
+        self.afficher_fin(game_window)
 
-            with open('./backlog_output.json', 'w', encoding='utf-8') as f:
-                json.dump(new_backlog, f, ensure_ascii=False, indent=4)
+    def moteur_separable(self):
+        """
+        @brief Indique si la partie peut être jouée dans un processus séparé
 
-            
-            with open('./backlog.json', 'w', encoding='utf-8') as f:
-                json.dump(sub_backlog_indice, f, ensure_ascii=False, indent=4)
+        Les connexions doivent être des sockets pour être transmises à un autre processus.
+        Le journal de réplication, ouvert avant la partie, reste attaché à ce processus.
 
-        else: 
-            new_backlog = {task: self.resultat[i] for i, task in enumerate(self.backlog.values())}
+        @return True si la partie peut être confiée à un ProcessusMoteur
+        """
+        if self.journal:
+            print("Hôte de secours actif : la partie est jouée dans le processus de l'interface")
+            return False
+        if not all(isinstance(conn, socket.socket) for conn in self.clients):
+            print(f"Transport {self.transport.nom} : la partie est jouée dans le processus de l'interface")
+            return False
+        return True
+
+    def executer_processus(self, game_window, afficher):
+        """
+        @brief Joue la partie dans un processus séparé (processus.py)
 
-            with open('./backlog_output.json', 'w', encoding='utf-8') as f:
-                json.dump(new_backlog, f, ensure_ascii=False, indent=4)
+        La console affiche les lignes et l'état transmis par le moteur, qui enregistre
+        lui-même les résultats. Le tableau de bord et les spectateurs sont servis par
+        le processus du moteur.
 
+        @param game_window Fenêtre de jeu
+        @param afficher Fonction afficher(texte, couleur) de la console
+        """
+        joueurs = [(joueur.conn, joueur.pseudo, joueur.compression, joueur.references) for joueur in self.joueurs.joueurs()]
+        multicast = self.multicast_var.get()
+        ingestion = getattr(self, 'chemin_backlog', None) if self.ingestion_var.get() else None
+
+        enregistrement = None
+        if self.enregistrement_var.get():
+            os.makedirs('enregistrements', exist_ok=True)
+            chemin = os.path.join('enregistrements', time.strftime('session_%Y%m%d_%H%M%S.ppr'))
+            enregistrement = (chemin, {
+                'backlog': self.backlog, 'mode': self.mode, 'pseudos': self.pseudo_list,
+                'temps_vote': self.time_vote_var.get(), 'temps_discussion': self.time_discussion_var.get(),
+                'multicast': multicast, 'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'compression': [joueur.compression for joueur in self.joueurs.joueurs()],
+                'references': [not multicast and joueur.references for joueur in self.joueurs.joueurs()],
+                **meta_estimations(self.index_rappel, self.rappel_auto_var.get(), self.bilan_asynchrone,
+                                   ingestion=ingestion)})
+
+        statut = tk.Label(game_window, text="", bg="black", fg='grey', font=self.police)
+        statut.pack(side="bottom")
+
+        def rafraichir():
+            with PROFILEUR.span('affichage_tk'):
+                statut.config(text=self.moteur_distant.resume())
+                game_window.update()
+
+        self.moteur_distant = ProcessusMoteur(
+            joueurs, self.backlog, self.mode, self.time_vote_var.get(), self.time_discussion_var.get(),
+            spectateurs=self.spectateurs.detacher(), ip=self.IP, analyse=self.analyse, index_rappel=self.index_rappel,
+            rappel_auto=self.rappel_auto_var.get(), multicast=multicast, tableau=self.tableau_var.get(),
+            enregistrement=enregistrement, ingestion=ingestion,
+            export=time.strftime('resultats_%Y%m%d_%H%M%S') if self.export_var.get() else None,
+            discussion_anticipee=self.discussion_anticipee_var.get(), asynchrone=self.bilan_asynchrone)
+        with PROFILEUR.span('partie'):
+            fin = self.moteur_distant.attendre(afficher, rafraichir)
+
+        if fin is None:
+            afficher("Le moteur de la partie s'est arrêté sans résultat", 'red')
+            self.resultat, self.paused = {}, True
+            return
+        self.resultat, self.paused, self.backlog = fin['resultat'], fin['paused'], fin['backlog']
+        # Tâches estimées et ajoutées par le processus du moteur, connues de la partie suivante comme en mode intégré
+        self.analyse = fin['analyse']
+        for texte, estimation in fin['rappel'] or ():
+            self.index_rappel.ajouter(texte, estimation)
+        statut.config(text=self.moteur_distant.resume())
         print('Fichier sauvegardé')
 
+    def afficher_fin(self, game_window):
+        """
+        @brief Affiche la fin de la partie et attend que l'hôte la ferme
+
+        @param game_window Fenêtre de jeu
+        """
         tk.Label(game_window, text="Fin de la partie", bg="black", fg='white', font=self.police).pack(side="top")
 
+        # Les joueurs restent connectés pour estimer un autre backlog
+        tk.Button(game_window, text="PARTIE SUIVANTE", command=lambda : self.partie_suivante(game_window),
+                  bg="white", fg='black', font=self.police).pack(padx=20, pady=5)
+
         quit_button = tk.PhotoImage(file='assets/quit_button.png')
         tk.Button(game_window, image=quit_button, command=lambda : self.fin_partie(game_window)).pack(padx=20, pady=20)
 
@@ -585,6 +858,15 @@ class HostGame:
         """
 
         game_window.destroy()
+
+        self.fermer_partie()
+        self.spectateurs.fermer()
+        self.spectateurs = DiffusionSpectateurs()
+
+        # Mode profilage : profil de la partie et résumé par phase
+        if PROFILEUR.actif:
+            print(PROFILEUR.ecrire())
+            print("Profil écrit dans le dossier 'profil' (profil.folded, resume.txt)")
         
         # Fermeture de tous les clients
         for client in self.clients:
@@ -596,11 +878,60 @@ class HostGame:
         # Réinitialisez pour une nouvelle partie
         self.stop_server.clear()
         self.started = False
-        self.clients = []
-        self.pseudo_list = []
+        self.joueurs.vider()
 
         self.parent.deiconify() # On réaffiche la fenetre principale
 
+    def fermer_partie(self):
+        """
+        @brief Libère ce qui est propre à la partie terminée ; joueurs et spectateurs restent connectés
+        """
+        if self.moteur_distant:
+            # Spectateurs rendus par le processus du moteur
+            for conn, pseudo in self.moteur_distant.fermer():
+                self.spectateurs.ajouter(conn, pseudo)
+            self.moteur_distant = None
+        if getattr(self, 'serveur_etat', None):
+            self.serveur_etat.fermer()
+            self.serveur_etat = None
+
+    def partie_suivante(self, game_window):
+        """
+        @brief Revient au salon sans fermer les connexions, pour estimer un autre backlog
+
+        @param game_window : Fenetre de jeu
+
+        - Garde les joueurs et les spectateurs connectés
+        - Oublie le backlog de la partie terminée (à recharger), son analyse et l'index de rappel
+        - Rouvre l'écoute : de nouveaux joueurs peuvent rejoindre le salon
+        """
+        game_window.destroy()
+        self.fermer_partie()
+        for attribut in ('backlog', 'analyse', 'chemin_backlog', 'resultat'):
+            if hasattr(self, attribut):
+                delattr(self, attribut)
+        self.index_rappel = IndexSimilarite()
+        self.bilan_asynchrone = None
+        self.purger_joueurs()
+
+        self.window = tk.Toplevel(self.parent)
+        self.window.title("Hôte - Planning Poker")
+        self.window.protocol("WM_DELETE_WINDOW", self.on_window_close)
+        self.start_server_thread(garder_joueurs=True)
+        self.broadcast_pseudos()
+        self.setup_host_interface()
+
+    def purger_joueurs(self):
+        """
+        @brief Retire les joueurs partis et vide les messages restés en attente sur les connexions
+        """
+        for conn in purger_connexions(self.clients):
+            self.joueurs.retirer(conn)
+            try:
+                conn.close()
+            except OSError:
+                pass
+
 
     def collect_votes(self, game_window):
         """
@@ -611,20 +942,7 @@ class HostGame:
         - Analyse continuelement un retour des clients
         - Une fois que tous les retours sont fais affichage des retours 
         """
-        self.full_list = []
-        self.votes = []  # Liste pour stocker les votes
-        
-        while len(self.votes) < len(self.clients):  
-            # On essaie de recevoir les votes de chaque client
-            for client in self.clients:
-                try:
-                    vote = client.recv(1024).decode()  # Recevoir un vote
-                    info = vote.split(';')
-                    self.full_list.append(info) # Stocke le pseudo + le vote
-                    self.votes.append(info[1]) # Stocke uniquement le vote pour les traitements
-                
-                except:
-                    continue
+        self.full_list, self.votes = collecter_votes(self.clients, registre=self.joueurs)
 
         # Si tous les votes sont reçus, afficher les résultats
         tk.Label(game_window, text=f"Votes reçus : {', '.join(self.votes)}", bg="black", fg='white', font=self.police).pack()
@@ -646,17 +964,19 @@ class ClientGame:
     Gère la connexion au serveur, l'interface de connexion et de vote.
     """
 
-    def __init__(self, parent_window):
+    def __init__(self, parent_window, transport=None):
         """
         @brief Constructeur de ClientGame.
         
         Initialise les paramètres de connexion, et l'interface
         
         @param parent_window La fenêtre parente Tkinter
+        @param transport Transport des connexions (TCP par défaut, voir transport.py)
         """
 
         self.parent = parent_window
         self.parent.withdraw()
+        self.transport = transport or transport_par_defaut()
 
         self.window = tk.Toplevel(parent_window)
         self.window.resizable(False, False) 
@@ -673,6 +993,12 @@ class ClientGame:
 
         self.conn = None
         self.pseudo = ''
+        self.recepteur = None
+        self.thread_reparations = None
+        self.secours = None
+        self.decompresseur = Decompresseur()
+        self.reste = b''  # Octets reçus après une trame compressée
+        self.verrou_envoi = threading.Lock()
         self.setup_client_interface()
 
     # Interface du client pour se connecter
@@ -714,9 +1040,9 @@ class ClientGame:
         server_ip = self.entry_ip.get()
         self.pseudo = self.entry_pseudo.get()
         try:
-            self.conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.conn.connect((server_ip, 16383))
-            self.conn.sendall(self.pseudo.encode())
+            self.conn = self.transport.connecter(server_ip, 16383)
+            # Le pseudo est suivi des codecs de compression acceptés
+            self.conn.sendall(construire_connexion(self.pseudo, references=True).encode())
             self.setup_waiting_interface()
             threading.Thread(target=self.listen_to_server, daemon=True).start()
         except Exception as e:
@@ -778,8 +1104,14 @@ class ClientGame:
         Ecoute constamment sur la connexion jusqu'a recevoir un signal @@START@@ signifiant le lancement de la partie
         """
         while True:
-            data = self.conn.recv(1024).decode()
-            if data == "@@START@@": 
+            try:
+                data = self.conn.recv(1024).decode()
+            except OSError:
+                break  # Connexion fermée en quittant le salon
+            if not data:
+                print("Connexion fermée par l'hôte")
+                break
+            if data == TAG_START: 
                 print("Partie lancée!")
                 self.window.destroy()
                 self.start_game_loop()
@@ -815,11 +1147,22 @@ class ClientGame:
 
         game_window.config(bg='#0c5219')
 
-        # Initialisation des paramètres de jeu
-        data = str(self.conn.recv(1024).decode()).split(':')
+        # Initialisation des paramètres de jeu (suivis de l'adresse de l'hôte de secours s'il y en a un)
+        parametres, _, secours = self.conn.recv(1024).decode().partition('|')
+        data = parametres.split(':')
+        if secours:
+            self.secours = secours
+            self.surveiller_connexion()
         self.server_time_vote = int(data[0])
         self.time_discussion_var = int(data[1]) # Temps de discussion par défaut
 
+        # L'hôte diffuse en multicast : on rejoint le groupe, TCP ne sert plus qu'aux réparations
+        if len(data) == 4:
+            self.recepteur = RecepteurMulticast(data[2], int(data[3]), self.demander_reparation)
+            self.recepteur.demarrer()
+            self.thread_reparations = threading.Thread(target=self.lire_reparations, daemon=True)
+            self.thread_reparations.start()
+
         # Création des widgets
         self.label_info = tk.Label(game_window, text="En attente des autres votes...", bg="#0c5219", fg='white', font=self.police)
         self.label_question = tk.Label(game_window, text="Question : ", bg="#0c5219", fg='white', font=self.police)
@@ -860,6 +1203,13 @@ class ClientGame:
         self.time_vote_label = tk.Label(game_window, text="", font=("Helvetica", 16))
         self.countdown_label = tk.Label(game_window, text="", font=("Helvetica", 16))
 
+        def signaler_pret():
+            self.envoyer(TAG_PRET + '\n')
+            self.ready_button.pack_forget()
+
+        # Pendant la discussion : l'hôte peut passer à la suite dès que tout le monde est prêt
+        self.ready_button = tk.Button(game_window, text="Prêt", command=signaler_pret, bg="white", fg='black', font=self.police)
+
         style = ttk.Style()
         style.theme_use("clam")
         style.configure('Treeview.Heading',
@@ -879,6 +1229,29 @@ class ClientGame:
         self.feedback_table.heading("Pseudo", text="Joueur")
         self.feedback_table.heading("Vote", text="Vote")
 
+        # Synthèse affichée en premier, puis le tableau des votes page par page
+        self.label_histogramme = tk.Label(game_window, text="", bg="#0c5219", fg='white', font=self.police)
+        self.label_ecarts = tk.Label(game_window, text="", bg="#0c5219", fg='white', font=self.police)
+        self.pages_votes = PagesVotes([])
+        self.frame_pages = tk.Frame(game_window, bg="#0c5219")
+        self.label_page = tk.Label(self.frame_pages, text="", bg="#0c5219", fg='white', font=self.police)
+
+        def afficher_page(numero):
+            """
+            @brief Affiche une page du tableau des votes (seules ses lignes sont insérées)
+            """
+            lignes = self.pages_votes.page(numero)
+            self.feedback_table.delete(*self.feedback_table.get_children())
+            for pseudo, vote in lignes:
+                self.feedback_table.insert('', 'end', values=(pseudo, vote))
+            self.label_page.config(text=f"{self.pages_votes.numero + 1}/{self.pages_votes.nb_pages}")
+
+        tk.Button(self.frame_pages, text="<", font=self.police,
+                  command=lambda: afficher_page(self.pages_votes.numero - 1)).pack(side="left", padx=5)
+        self.label_page.pack(side="left", padx=5)
+        tk.Button(self.frame_pages, text=">", font=self.police,
+                  command=lambda: afficher_page(self.pages_votes.numero + 1)).pack(side="left", padx=5)
+
         # Pack initial des widgets principaux
         self.label_question.pack(pady=10)
 
@@ -983,7 +1356,7 @@ class ClientGame:
 
             try:
                 # Envoi du vote
-                self.conn.sendall(vote.encode())
+                self.envoyer(vote)
                 print("Vote envoyé :", vote)
                 
                 # Réinitialisation de l'interface
@@ -1045,47 +1418,60 @@ class ClientGame:
         # Boucle principale de jeu
         while not self.fin:
             # Réception du message du serveur
-            question = self.conn.recv(1024).decode()
+            question = self.recevoir()
             print(f"Reçu : {question}")
 
-            if question == '@@NEW@@':
+            if question == TAG_NEW:
                 # Nouvelle étape de jeu
                 self.label_info.pack_forget()
                 print('Nouvelle étape')
             
-            elif question == '@@FEEDBACK@@':
+            elif question == TAG_FEEDBACK:
                 # Traitement du feedback
-                feedback = self.conn.recv(1024).decode()
+                feedback = self.recevoir()
                 
                 # Analyse de la condition de la question
-                condition = bool(int(feedback[0]))
-                feedback = feedback[1:].split(';')
-                
-                # Préparation et affichage des votes
-                self.feedback_table.delete(*self.feedback_table.get_children())
-                for item in feedback:
-                    pseudo, vote = item.split(':')
-                    self.feedback_table.insert('', 'end', values=(pseudo, vote))
+                condition, feedback = lire_feedback(feedback)
                 
+                # Synthèse des votes (répartition par carte, écarts), puis première page du tableau
+                histogramme, ecarts, nb_ecarts = synthese_votes(feedback)
+                self.label_histogramme.config(text="Votes : " + "  ".join(f"{carte} x{nombre}" for carte, nombre in histogramme))
+                self.label_histogramme.pack(pady=5)
+                if ecarts:
+                    autres = f" et {nb_ecarts - len(ecarts)} autre(s)" if nb_ecarts > len(ecarts) else ""
+                    self.label_ecarts.config(text="Écarts : " + ", ".join(f"{pseudo} ({vote})" for pseudo, vote in ecarts) + autres)
+                    self.label_ecarts.pack(pady=5)
+
+                self.pages_votes = PagesVotes(feedback)
+                afficher_page(0)
                 self.feedback_table.pack(pady=20)
+                if self.pages_votes.nb_pages > 1:
+                    self.frame_pages.pack()
 
                 # Gestion du temps de discussion si pas de majorité
                 if not condition:
                     countdown_time = int(self.time_discussion_var)
                     self.countdown_label.config(text=f"Temps de discussion : {countdown_time}", bg="#0c5219", fg='white', font=self.police)
                     self.countdown_label.pack(pady=10)
+                    self.ready_button.pack(pady=5)
 
+                    # La discussion s'arrête aussi dès que l'hôte passe à la suite
                     while countdown_time > 0:
                         self.countdown_label.config(text=f"Temps de discussion : {countdown_time}", bg="#0c5219", fg='white', font=self.police)
                         game_window.update()
-                        time.sleep(1)
+                        if self.message_en_attente(1):
+                            break
                         countdown_time -= 1
 
+                    self.ready_button.pack_forget()
                     self.countdown_label.pack_forget()
                 
                 self.feedback_table.pack_forget()
+                self.frame_pages.pack_forget()
+                self.label_ecarts.pack_forget()
+                self.label_histogramme.pack_forget()
             
-            elif question == '@@END@@':
+            elif question == TAG_END:
                 # Fin de la partie
                 print('Fin de la partie')
                 self.fin = True
@@ -1099,14 +1485,17 @@ class ClientGame:
             # Mise à jour de la fenêtre
             game_window.update()
 
-        for widget in game_window.winfo_children():
-            widget.destroy()
+        # La connexion est gardée : la fenêtre de jeu devient le salon de la partie suivante
+        self.preparer_partie_suivante()
+        self.window = game_window
+        self.setup_waiting_interface()
         
         tk.Label(game_window, text="Fin de la partie", bg="#0c5219", fg='white', font=self.police).pack(pady=20)
         tk.Label(game_window, text="Toutes les tâches ont été enregistrées sur le server", bg="#0c5219", fg='white', font=self.police).pack(pady=20)
         tk.Label(game_window, text="Merci pour ta participation !", bg="#0c5219", fg='white', font=self.police).pack(pady=20)
 
         tk.Button(game_window, text="QUITTER", command=lambda : self.fin_partie(game_window), bg="white", fg='black', font=self.police).pack(padx=20, pady=20)
+        threading.Thread(target=self.listen_to_server, daemon=True).start()
 
         ## ATTENTION
         game_window.mainloop()
@@ -1122,9 +1511,187 @@ class ClientGame:
         """
         game_window.destroy()
         self.conn.close()
+        if self.recepteur:
+            self.recepteur.fermer()
 
         self.parent.deiconify() # On réaffiche la fenetre principale
+
+    def preparer_partie_suivante(self):
+        """
+        @brief Oublie l'état propre à la partie terminée, en gardant la connexion à l'hôte
+
+        Groupe multicast, hôte de secours, dictionnaires de compression et tâches
+        préchargées sont renvoyés par l'hôte au début de chaque partie.
+        """
+        if self.recepteur:
+            # La fin de partie envoyée par TCP termine la lecture des réparations
+            if self.thread_reparations:
+                self.thread_reparations.join(ATTENTE_REPARATIONS)
+            self.recepteur.fermer()
+            self.recepteur = None
+        self.thread_reparations = None
+        self.secours = None
+        self.decompresseur = Decompresseur()
+        self.reste = b''
         
+    def recevoir(self):
+        """
+        @brief Reçoit le prochain message de l'hôte
+
+        En multicast, les messages sont lus dans l'ordre de diffusion ; sinon directement sur la connexion TCP.
+
+        @return Le message
+        """
+        if self.recepteur:
+            message = self.recepteur.lire()
+            if message is not None:
+                return message
+            # Connexion TCP perdue (lire_reparations) : la suite vient de l'hôte de secours, par TCP
+            if not self.secours:
+                return ''
+            self.recepteur.fermer()
+            self.recepteur = None
+            self.basculer()
+            return self.recevoir()
+        if self.reste:
+            data, self.reste = self.reste, b''
+        else:
+            try:
+                data = self.conn.recv(1024)
+            except OSError:
+                data = b''
+        if not data and self.secours:
+            self.basculer()
+            return self.recevoir()
+        # Trame compressée ou texte ; une trame de dictionnaire est suivie du message attendu
+        message, self.reste = self.decompresseur.decouper(data, self.conn.recv)
+        return self.recevoir() if message is None else self.decompresseur.resoudre(message)
+
+    def message_en_attente(self, delai):
+        """
+        @brief Attend au plus delai secondes un message de l'hôte
+
+        @param delai Délai d'attente (secondes)
+        @return True si un message est arrivé
+        """
+        if self.reste:
+            return True
+        if self.recepteur:
+            time.sleep(delai)
+            return not self.recepteur.file.empty()
+        try:
+            lisibles, _, _ = select.select([self.conn], [], [], delai)
+        except (OSError, ValueError, TypeError):
+            time.sleep(delai)  # Connexion sans descripteur (transport en mémoire)
+            return False
+        return bool(lisibles)
+
+    def envoyer(self, message):
+        """
+        @brief Envoie un message à l'hôte
+
+        @param message Message texte
+        """
+        with self.verrou_envoi:
+            try:
+                self.conn.sendall(message.encode())
+            except OSError:
+                if not self.secours:
+                    raise
+                # Hôte tombé : la tâche sera reposée par l'hôte de secours
+
+    def surveiller_connexion(self):
+        """
+        @brief Active les sondes TCP keepalive pour détecter rapidement la perte de l'hôte
+        """
+        try:
+            self.conn.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            self.conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 1)
+            self.conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 1)
+            self.conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 2)
+        except (AttributeError, OSError):
+            pass  # Transport sans keepalive ou système sans ces options
+
+    def basculer(self):
+        """
+        @brief Se reconnecte à l'hôte de secours après la perte de l'hôte principal
+
+        L'hôte de secours attend quelques secondes la reconnexion des joueurs, puis renvoie
+        le signal de départ et les paramètres de jeu et reprend les tâches non estimées.
+        """
+        hote, port = self.secours.rsplit(':', 1)
+        self.secours = None  # Un seul basculement possible
+        print(f"Hôte injoignable, reconnexion à l'hôte de secours {hote}")
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+        limite = time.monotonic() + 10
+        while True:
+            try:
+                conn = self.transport.connecter(hote, int(port))
+                break
+            except OSError:
+                if time.monotonic() > limite:
+                    raise
+                time.sleep(0.5)
+        with self.verrou_envoi:
+            self.conn = conn
+            self.conn.sendall(self.pseudo.encode())
+
+        # Signal de départ puis paramètres de jeu (inchangés), éventuellement reçus ensemble
+        data = b''
+        while TAG_START.encode() not in data:
+            data += self.lire_secours()
+        data = data.split(TAG_START.encode(), 1)[1]
+        while not data:
+            data = self.lire_secours()
+        # Les messages suivants arrivés dans la même lecture sont gardés pour recevoir()
+        suite = DEBUT_MESSAGE.search(data)
+        self.reste = data[suite.start():] if suite else b''
+
+    def lire_secours(self):
+        """
+        @brief Lecture sur la connexion à l'hôte de secours
+
+        @return Données reçues (lève OSError si la connexion est fermée)
+        """
+        data = self.conn.recv(1024)
+        if not data:
+            raise OSError("Connexion à l'hôte de secours fermée")
+        return data
+
+    def demander_reparation(self, seq):
+        """
+        @brief Demande à l'hôte de renvoyer les trames multicast manquantes
+
+        @param seq Premier numéro de séquence manquant
+        """
+        self.envoyer(f"{TAG_REPAIR}{seq}\n")
+
+    def lire_reparations(self):
+        """
+        @brief Lit les trames renvoyées par l'hôte sur la connexion TCP
+
+        La fin de partie reçue par TCP est délivrée immédiatement, même si des trames manquent encore.
+        Une connexion perdue est signalée à recevoir() par None, pour basculer vers l'hôte de secours.
+        """
+        lecteur = LecteurTrames()
+        while True:
+            try:
+                data = self.conn.recv(65536)
+            except OSError:
+                data = b''
+            if not data:
+                self.recepteur.forcer(None)
+                return
+            for seq, message in lecteur.ajouter(data):
+                self.recepteur.injecter(seq, message)
+                if message == TAG_END:
+                    self.recepteur.forcer(TAG_END)
+                    return  # Dernier message de la partie : la connexion sert ensuite au salon
+
     # Reinisialiser l'interface
     def clear_window(self):
         """
@@ -1134,4 +1701,8 @@ class ClientGame:
             widget.destroy()
 
 if __name__ == "__main__":
+    # --profil (phases) ou --profil=complet (phases, cProfile et tracemalloc par tâche)
+    for argument in sys.argv[1:]:
+        if argument.startswith('--profil'):
+            PROFILEUR.activer(argument.partition('=')[2] or 'spans')
     PlanningPokerApp()
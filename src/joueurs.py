@@ -0,0 +1,251 @@
+import threading
+import time
+
+from protocole import construire_lobby
+
+
+class Joueur:
+    """
+    @brief État d'un joueur connecté à l'hôte.
+    """
+
+    __slots__ = ('id', 'pseudo', 'conn', 'compression', 'references', 'connecte', 'a_vote', 'vu', 'nb_votes')
+
+    def __init__(self, id, pseudo, conn, compression=None, references=False):
+        """
+        @brief Constructeur de Joueur.
+
+        @param id Identifiant stable attribué par le registre
+        @param pseudo Pseudo affiché (rendu unique par le registre)
+        @param conn Connexion du joueur
+        @param compression Codec négocié avec le joueur (None : messages non compressés)
+        @param references True si le joueur précharge les intitulés des tâches
+        """
+        self.id = id
+        self.pseudo = pseudo
+        self.conn = conn
+        self.compression = compression
+        self.references = references
+        self.connecte = True
+        self.a_vote = False
+        self.vu = time.monotonic()  # Dernier message reçu
+        self.nb_votes = 0
+
+    def marquer_vote(self):
+        """
+        @brief Enregistre la réception d'un vote du joueur
+        """
+        self.a_vote = True
+        self.vu = time.monotonic()
+        self.nb_votes += 1
+
+
+class RegistreJoueurs:
+    """
+    @brief Registre des joueurs de l'hôte, partagé entre threads.
+
+    Chaque joueur reçoit un identifiant stable et peut être retrouvé en temps
+    constant par identifiant, par connexion ou par pseudo. Les listes de
+    connexions et de pseudos sont des instantanés recréés à chaque modification
+    (copie sur écriture) : elles peuvent être parcourues sans verrou pendant une
+    diffusion, mais ne doivent pas être modifiées.
+    """
+
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.prochain_id = 1
+        self.par_id = {}
+        self.par_conn = {}
+        self.par_nom = {}
+        self.publier()
+
+    def publier(self):
+        """
+        @brief Recrée les instantanés (verrou tenu)
+        """
+        joueurs = list(self.par_id.values())
+        self.instantane = joueurs
+        self.instantane_connexions = [joueur.conn for joueur in joueurs]
+        self.instantane_pseudos = [joueur.pseudo for joueur in joueurs]
+
+    def ajouter(self, conn, pseudo, compression=None, references=False):
+        """
+        @brief Inscrit un joueur
+
+        Un pseudo déjà pris est complété par un numéro : 'Alice', 'Alice (2)'...
+
+        @param conn Connexion du joueur
+        @param pseudo Pseudo demandé
+        @param compression Codec négocié avec le joueur
+        @param references True si le joueur précharge les intitulés des tâches
+        @return Le Joueur créé
+        """
+        with self.verrou:
+            nom, numero = pseudo, 2
+            while nom in self.par_nom:
+                nom, numero = f"{pseudo} ({numero})", numero + 1
+            joueur = Joueur(self.prochain_id, nom, conn, compression, references)
+            self.prochain_id += 1
+            self.par_id[joueur.id] = joueur
+            self.par_conn[conn] = joueur
+            self.par_nom[nom] = joueur
+            self.publier()
+        return joueur
+
+    def retirer(self, conn):
+        """
+        @brief Retire un joueur à partir de sa connexion
+
+        @param conn Connexion du joueur
+        @return Le Joueur retiré, ou None s'il est inconnu
+        """
+        with self.verrou:
+            joueur = self.par_conn.pop(conn, None)
+            if joueur is None:
+                return None
+            del self.par_id[joueur.id]
+            del self.par_nom[joueur.pseudo]
+            joueur.connecte = False
+            self.publier()
+        return joueur
+
+    def vider(self):
+        """
+        @brief Retire tous les joueurs (les identifiants ne sont jamais réutilisés)
+        """
+        with self.verrou:
+            self.par_id, self.par_conn, self.par_nom = {}, {}, {}
+            self.publier()
+
+    def joueur(self, id):
+        """
+        @brief Joueur d'identifiant donné, ou None
+        """
+        return self.par_id.get(id)
+
+    def par_connexion(self, conn):
+        """
+        @brief Joueur associé à une connexion, ou None
+        """
+        return self.par_conn.get(conn)
+
+    def par_pseudo(self, pseudo):
+        """
+        @brief Joueur portant un pseudo, ou None
+        """
+        return self.par_nom.get(pseudo)
+
+    def connexions(self):
+        """
+        @brief Instantané des connexions, dans l'ordre d'arrivée
+        """
+        return self.instantane_connexions
+
+    def pseudos(self):
+        """
+        @brief Instantané des pseudos, dans l'ordre d'arrivée
+        """
+        return self.instantane_pseudos
+
+    def joueurs(self):
+        """
+        @brief Instantané des joueurs, dans l'ordre d'arrivée
+        """
+        return self.instantane
+
+    def debut_tour(self):
+        """
+        @brief Marque tous les joueurs comme n'ayant pas encore voté
+        """
+        for joueur in self.instantane:
+            joueur.a_vote = False
+
+    def __len__(self):
+        return len(self.instantane)
+
+
+class DiffusionSalon:
+    """
+    @brief Diffusion de la liste des joueurs du salon par un seul thread.
+
+    Une arrivée signale seulement que la liste a changé. Le thread attend
+    DELAI_REGROUPEMENT pour regrouper les arrivées proches, puis envoie la liste
+    courante à chaque joueur : un afflux de N joueurs coûte quelques diffusions
+    au lieu de N, les threads d'admission n'envoient jamais rien, et les messages
+    du salon ne s'entrelacent pas sur une connexion.
+    """
+
+    DELAI_REGROUPEMENT = 0.1  # Attente avant diffusion, pour regrouper les arrivées (secondes)
+
+    def __init__(self, registre):
+        """
+        @brief Constructeur de DiffusionSalon.
+
+        @param registre RegistreJoueurs du salon
+        """
+        self.registre = registre
+        self.condition = threading.Condition()
+        self.modifie = False
+        self.actif = False
+        self.thread = None
+        self.diffusions = 0
+
+    def demarrer(self):
+        """
+        @brief Lance le thread de diffusion (ouverture du salon)
+        """
+        with self.condition:
+            if self.actif:
+                return
+            self.actif = True
+            self.thread = threading.Thread(target=self.diffuser, daemon=True)
+            self.thread.start()
+
+    def signaler(self):
+        """
+        @brief Signale un changement de la liste des joueurs (ne bloque jamais)
+        """
+        with self.condition:
+            self.modifie = True
+            self.condition.notify()
+
+    def diffuser(self):
+        """
+        @brief Boucle du thread de diffusion
+        """
+        while True:
+            with self.condition:
+                while self.actif and not self.modifie:
+                    self.condition.wait()
+                if not self.modifie:
+                    return
+            time.sleep(self.DELAI_REGROUPEMENT)
+            with self.condition:
+                self.modifie = False
+            self.envoyer()
+
+    def envoyer(self):
+        """
+        @brief Envoie la liste courante des joueurs à chacun (thread de diffusion)
+        """
+        data = construire_lobby(self.registre.pseudos()).encode()
+        for conn in self.registre.connexions():
+            try:
+                conn.sendall(data)
+            except OSError:
+                pass  # Joueur parti : retiré au lancement de la partie
+        self.diffusions += 1
+
+    def arreter(self):
+        """
+        @brief Envoie la dernière liste en attente puis arrête le thread
+
+        Au retour, plus aucun message du salon n'est envoyé : la connexion peut servir à la partie.
+        Les changements signalés ensuite ne sont diffusés qu'au prochain demarrer().
+        """
+        with self.condition:
+            self.actif = False
+            self.condition.notify()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
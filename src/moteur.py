@@ -0,0 +1,433 @@
+import time
+
+from consensus import CARTES, calculer_verdict
+from doublons import analyser_backlog
+from multicast import encoder_trame
+from prechargement import construire_reference
+from profilage import PROFILEUR
+from protocole import TAG_NEW, TAG_FEEDBACK, TAG_END, collecter_votes, construire_feedback, lire_prets
+
+INTERVALLE_PRETS = 0.2  # Délai entre deux relevés des joueurs prêts pendant la discussion (secondes)
+
+
+def carte_estimation(estimation):
+    """
+    @brief Carte correspondant à une estimation passée
+
+    @param estimation Estimation retenue (carte, entier, ou valeur calculée en Moyenne/Médiane)
+    @return La carte, ou None si l'estimation n'en est pas une
+    """
+    if isinstance(estimation, float) and estimation.is_integer():
+        estimation = int(estimation)
+    carte = str(estimation)
+    return carte if carte in CARTES else None
+
+
+class Exit(Exception):
+    """
+    @brief Exception personnalisée pour signaler une sortie anticipée du jeu.
+
+    Cette exception est utilisée pour terminer prématurément la session de jeu Planning Poker.
+    """
+    pass
+
+
+def attendre_discussion(secondes, fin=None):
+    """
+    @brief Attend la fin du temps de discussion, ou que la condition de fin soit remplie
+
+    @param secondes Temps de discussion
+    @param fin Fonction fin() -> True pour terminer avant l'échéance (optionnelle)
+    """
+    echeance = time.monotonic() + secondes
+    while time.monotonic() < echeance:
+        if fin and fin():
+            return
+        time.sleep(max(min(INTERVALLE_PRETS, echeance - time.monotonic()), 0))
+
+
+class MoteurPartie:
+    """
+    @brief Déroulement d'une partie côté hôte, indépendant de l'interface.
+
+    Parcourt le backlog, diffuse les questions, collecte les votes, applique la
+    règle du mode de jeu et envoie les retours aux joueurs. L'affichage et les
+    temps d'attente sont délégués à des fonctions fournies par l'appelant, ce qui
+    permet de l'utiliser depuis la console Tk comme depuis une simulation.
+    """
+
+    SEUIL_RAPPEL = 0.9  # Score de similarité à partir duquel une estimation passée est soumise à confirmation
+
+    def __init__(self, clients, backlog, mode, temps_vote, temps_discussion, analyse=None, index_rappel=None,
+                 rappel_auto=False, historique=None, afficher=None, attendre=None, pause=1, diffuseur=None,
+                 replication=None, registre=None, compression=None, etat=None, spectateurs=None,
+                 export=None, prechargement=None, delai_votes=None, ingestion=None, discussion_anticipee=False,
+                 observateurs=(), asynchrone=None):
+        """
+        @brief Constructeur de MoteurPartie.
+
+        @param clients Connexions des joueurs
+        @param backlog Backlog à estimer {clé: tâche}
+        @param mode Mode de jeu
+        @param temps_vote Temps de vote en secondes
+        @param temps_discussion Temps de discussion en secondes
+        @param analyse AnalyseBacklog des doublons (calculée si absente)
+        @param index_rappel IndexSimilarite des tâches déjà estimées (optionnel)
+        @param rappel_auto Fait confirmer par un vote les estimations des tâches quasi identiques
+        @param historique HistoriqueStore où enregistrer la partie (optionnel)
+        @param afficher Fonction afficher(texte, couleur) pour la console de l'hôte
+        @param attendre Fonction attendre(secondes, fin=None) pour le temps de discussion, qui rend la main dès que fin() est vraie
+        @param pause Délai en secondes laissé aux clients entre deux étapes
+        @param diffuseur DiffuseurMulticast : diffusion unique en multicast au lieu d'un envoi par joueur (optionnel)
+        @param replication JournalReplication alimentant un hôte de secours (optionnel)
+        @param registre RegistreJoueurs de l'hôte, mis à jour à chaque vote (optionnel)
+        @param compression Compression des longs messages pour les joueurs qui l'ont négociée (optionnel)
+        @param etat EtatPartie exposé aux tableaux de bord (optionnel)
+        @param spectateurs DiffusionSpectateurs : état envoyé aux spectateurs, hors quorum (optionnel)
+        @param export ExportResultats : estimations écrites au fil des décisions (optionnel)
+        @param prechargement PrechargementTaches : questions désignées par position pour les joueurs inscrits (optionnel)
+        @param delai_votes Délai maximal de collecte des votes d'un tour en secondes (None : sans limite)
+        @param ingestion IngestionBacklog : tâches ajoutées au backlog pendant la partie (optionnel)
+        @param discussion_anticipee Termine la discussion dès que tous les joueurs se sont déclarés prêts
+        @param observateurs Autres observateurs des événements de la partie (console d'un autre processus...)
+        @param asynchrone BilanAsynchrone de la fenêtre de vote ouverte avant la partie (optionnel)
+        """
+        self.clients = clients
+        self.backlog = backlog
+        self.mode = mode
+        self.temps_vote = temps_vote
+        self.temps_discussion = temps_discussion
+        self.analyse = analyse or analyser_backlog(backlog)
+        self.index_rappel = index_rappel
+        self.rappel_auto = rappel_auto
+        self.historique = historique
+        self.afficher = afficher or (lambda texte, couleur='white': print(texte))
+        self.attendre = attendre or attendre_discussion
+        self.pause = pause
+        self.diffuseur = diffuseur
+        self.replication = replication
+        self.observateurs = [observateur for observateur in (replication, etat, spectateurs, export)
+                             if observateur is not None] + list(observateurs)
+        self.registre = registre
+        self.compression = compression
+        self.prechargement = prechargement
+        self.delai_votes = delai_votes
+        self.ingestion = ingestion
+        self.discussion_anticipee = discussion_anticipee
+        self.asynchrone = asynchrone
+
+        self.resultat = {}  # clé du backlog -> estimation
+        self.paused = False
+        self.full_list = []
+        self.votes = []
+        self.session_id = None
+        self.ordre = list(backlog)  # Clés dans l'ordre de passage, tâches ajoutées en cours de partie comprises
+        self.position = 0           # Position de la tâche en cours dans self.ordre
+        self.retirees = set()       # Tâches remplacées par leur nouvelle version avant d'être posées
+
+    def diffuser(self, message):
+        """
+        @brief Envoie un message à tous les joueurs
+
+        En multicast, le message est envoyé une seule fois au groupe.
+
+        @param message Message texte
+        """
+        with PROFILEUR.span('diffusion'):
+            if self.diffuseur:
+                self.diffuseur.envoyer(message)
+                return
+
+            data = message.encode()
+            for client in self.clients:
+                client.sendall(self.compression.encoder(client, message) if self.compression else data)
+
+    def diffuser_question(self, position, value, question):
+        """
+        @brief Envoie une question : par sa position aux joueurs qui ont préchargé les tâches, en entier aux autres
+
+        @param position Position de la tâche dans le backlog
+        @param value Intitulé de la tâche
+        @param question Question posée (intitulé, suivi d'un éventuel rappel)
+        """
+        if not self.prechargement or self.diffuseur:
+            self.diffuser(question)
+            return
+
+        reference = construire_reference(position, value, question)
+        with PROFILEUR.span('diffusion'):
+            for client in self.clients:
+                message = reference if client in self.prechargement else question
+                client.sendall(self.compression.encoder(client, message) if self.compression else message.encode())
+
+    def publier(self, type, **donnees):
+        """
+        @brief Transmet un événement de la partie aux observateurs (hôte de secours, tableau de bord)
+
+        @param type Type d'événement
+        @param donnees Contenu de l'événement
+        """
+        for observateur in self.observateurs:
+            observateur.publier(type, **donnees)
+
+    def executer(self):
+        """
+        @brief Joue la partie jusqu'à la fin du backlog ou la carte café
+
+        @return Les estimations {clé: estimation}
+        """
+        if self.historique:
+            self.session_id = self.historique.ouvrir_session(self.mode, len(self.clients))
+        self.publier('debut', mode=self.mode, joueurs=len(self.clients), total=len(self.backlog))
+
+        # On transmet à tous les utilisateurs le temps des votes (et le groupe multicast à rejoindre)
+        parametres = f"{self.temps_vote}:{self.temps_discussion}"
+        if self.diffuseur:
+            parametres += f":{self.diffuseur.groupe}:{self.diffuseur.port}"
+        if self.replication and self.replication.secours:
+            parametres += f"|{self.replication.secours}"  # Hôte à rejoindre si l'hôte principal tombe
+        for client in self.clients:
+            client.sendall(parametres.encode())
+        time.sleep(self.pause)
+        if self.compression:
+            self.compression.envoyer_dictionnaires(self.clients)
+        if self.prechargement:
+            self.prechargement.envoyer(self.clients, 0)
+
+        if self.asynchrone:
+            self.reprendre_asynchrone()
+
+        # On parcourt toutes les questions dans le backlog
+        try:
+            while True:
+                if self.ingestion:
+                    self.integrer(self.ingestion.recuperer())
+                if self.position >= len(self.ordre):
+                    break
+                position, key = self.position, self.ordre[self.position]
+                self.position += 1
+                value = self.backlog[key]
+                if self.analyse.representant[key] != key or key in self.retirees or key in self.resultat:
+                    continue  # Doublon estimé avec son représentant, ou tâche remplacée
+                with PROFILEUR.span('tache'):
+                    PROFILEUR.debut_tache(key)
+                    try:
+                        if self.prechargement:
+                            self.prechargement.envoyer(self.clients, position)
+                        self.estimer(position, key, value)
+                    finally:
+                        PROFILEUR.fin_tache()
+        except Exit:
+            self.paused = True
+
+        print('Fin de la partie')
+        self.publier('fin')
+        self.diffuser(TAG_END)
+        if self.diffuseur:
+            # La fin de partie est aussi envoyée par TCP : elle ne doit jamais être perdue
+            trame = encoder_trame(self.diffuseur.seq - 1, TAG_END)
+            for client in self.clients:
+                client.sendall(trame)
+
+        if self.historique:
+            self.historique.fermer_session(self.session_id)
+
+        return self.resultat
+
+    def reprendre_asynchrone(self):
+        """
+        @brief Enregistre les estimations décidées pendant la fenêtre asynchrone : ces tâches ne sont pas reposées
+        """
+        for position, key in enumerate(self.ordre):
+            if (key not in self.asynchrone.estimations or self.analyse.representant.get(key) != key
+                    or key in self.resultat):
+                continue
+            # Les votes de la fenêtre forment le premier tour de la tâche
+            full_list = [[pseudo, vote] for pseudo, vote in self.asynchrone.votes[key].items()]
+            estimation, message = calculer_verdict(self.mode, [vote for pseudo, vote in full_list], premier_tour=True)
+            if estimation is None:
+                continue
+            self.publier('tache', cle=key, question=self.backlog[key])
+            self.publier('tour', votes=full_list)
+            if self.historique:
+                self.historique.enregistrer_tour(self.session_id, position, 0, full_list, True)
+            self.decider(position, key, self.backlog[key], estimation, 1)
+        self.afficher(self.asynchrone.resume(), 'lightgreen')
+
+    def integrer(self, taches):
+        """
+        @brief Ajoute à la partie en cours des tâches nouvelles ou modifiées
+
+        Les tâches sont posées après celles du backlog. Une tâche identique (intitulé
+        normalisé) à une tâche déjà estimée reprend son estimation sans vote. Une tâche
+        modifiée est ajoutée sous une nouvelle clé ; son ancienne version est retirée si
+        elle n'a pas encore été posée et qu'elle est seule dans son groupe.
+
+        @param taches Dictionnaire {clé: tâche}
+        """
+        ajoutees = {}
+        for cle, texte in taches.items():
+            if self.backlog.get(cle) == texte:
+                continue
+            if cle in self.backlog:
+                ancienne = cle
+                numero = 2
+                while f"{ancienne}#{numero}" in self.backlog:
+                    numero += 1
+                cle = f"{ancienne}#{numero}"
+                if (self.ordre.index(ancienne) >= self.position and ancienne not in self.resultat
+                        and self.analyse.clusters.get(ancienne) == [ancienne]):
+                    self.retirees.add(ancienne)
+
+            self.backlog[cle] = texte
+            self.ordre.append(cle)
+            ajoutees[cle] = texte
+            if self.prechargement:
+                self.prechargement.ajouter(texte)
+            representant = self.analyse.ajouter(cle, texte)
+            if representant != cle and representant in self.resultat:
+                # Déjà estimée dans cette partie : reprise sans vote (tâche publiée sans tour)
+                self.resultat[cle] = self.resultat[representant]
+                self.publier('tache', cle=cle, question=texte)
+                self.publier('decision', cles=[cle], estimation=self.resultat[cle])
+                if self.historique:
+                    self.historique.enregistrer_tache(self.session_id, len(self.ordre) - 1, texte, self.resultat[cle], 0)
+
+        if ajoutees:
+            self.afficher(f"{len(ajoutees)} tâche(s) ajoutée(s) au backlog", 'lightgreen')
+            self.publier('ajout', taches=ajoutees, total=len(self.backlog))
+
+    def estimer(self, position, key, value):
+        """
+        @brief Fait estimer une tâche, tour après tour, jusqu'à une décision
+
+        @param position Position de la tâche dans le backlog
+        @param key Clé de la tâche
+        @param value Intitulé de la tâche
+        """
+        question = value
+        self.publier('tache', cle=key, question=value)
+
+        # Recherche des tâches similaires déjà estimées
+        similaires = self.index_rappel.rechercher(question) if self.index_rappel else []
+        confirmation = None  # Carte à confirmer par un tour oui/non
+        if similaires:
+            texte, estimation, score = similaires[0]
+            self.afficher(f"Tâche similaire ({score:.0%}) : {texte} -> {estimation}", 'grey')
+
+            # Rappel affiché aux joueurs sous la question
+            question = f"{value}\n(Similaire : « {texte} » estimée à {estimation})"
+            if self.rappel_auto and score >= self.SEUIL_RAPPEL:
+                confirmation = carte_estimation(estimation)
+            if confirmation:
+                # Tâche déjà estimée : un tour de confirmation, la carte rappelée vaut oui, toute autre carte non
+                question_confirmation = (f"{value}\n(Quasi identique à « {texte} » : votez {confirmation} pour "
+                                         f"confirmer l'estimation, une autre carte pour la réestimer)")
+                self.afficher(f"Confirmation de l'estimation {confirmation} demandée aux joueurs")
+
+        # Votes de la fenêtre asynchrone : ils tiennent lieu de premier tour
+        rappel = self.asynchrone.rappel(key) if self.asynchrone else None
+        if rappel:
+            question = f"{question}\n(Votes asynchrones : {rappel})"
+        premier_tour = not rappel
+
+        self.diffuser_question(position, value, question_confirmation if confirmation else question)
+
+        condition = False
+        nb_rounds = 0
+        while not condition:
+            self.afficher(f"Estimez la tâche suivante : {question_confirmation if confirmation else question}")
+            self.afficher("En attente des votes... ")
+            self.publier('vote', echeance=time.time() + int(self.temps_vote))
+
+            # Démarre la collecte des votes
+            if self.registre:
+                self.registre.debut_tour()
+            debut = time.monotonic()
+            with PROFILEUR.span('collecte_votes'):
+                self.full_list, self.votes = collecter_votes(self.clients, self.diffuseur.reparer if self.diffuseur else None,
+                                                             self.registre, self.delai_votes)
+            if not self.votes:
+                self.afficher("Aucun vote reçu avant l'échéance", 'red')
+                raise Exit
+            if self.historique:
+                self.historique.enregistrer_duree(self.session_id, position, nb_rounds, 'vote', time.monotonic() - debut)
+            self.afficher(f"Votes reçus : {', '.join(self.votes)}")
+            self.publier('tour', votes=self.full_list)
+
+            for vote in self.votes:
+                if "cafe" in vote:
+                    raise Exit
+
+            if confirmation:
+                # Tour oui/non : l'estimation est reprise si tous les joueurs votent la carte rappelée
+                confirmee = all(vote == confirmation for vote in self.votes)
+                estimation = int(confirmation) if confirmee else None
+                message = "Estimation confirmée" if confirmee else "Estimation non confirmée : la tâche est réestimée"
+                confirmation = None
+            else:
+                with PROFILEUR.span('consensus'):
+                    estimation, message = calculer_verdict(self.mode, self.votes, premier_tour=premier_tour)
+                premier_tour = False
+            condition = estimation is not None
+            self.afficher(message)
+
+            # Enregistrement du tour dans l'historique
+            if self.historique:
+                with PROFILEUR.span('historique'):
+                    self.historique.enregistrer_tour(self.session_id, position, nb_rounds, self.full_list, condition)
+            if condition:
+                self.decider(position, key, value, estimation, nb_rounds + 1)
+
+            # On transmet l'état de la condition de la question ainsi que la liste de tous les votes
+            self.diffuser(TAG_FEEDBACK)  ## On fait un feedback à tous les clients
+            self.diffuser(construire_feedback(condition, self.full_list))
+
+            if not condition:  # Temps de discussion
+                self.publier('discussion', echeance=time.time() + int(self.temps_discussion))
+                with PROFILEUR.span('discussion'):
+                    self.discuter(position, nb_rounds)
+
+            self.diffuser(TAG_NEW)  ## On prévient les clients qu'on passe à l'étape suivante
+            time.sleep(self.pause)
+
+            if not condition:
+                self.diffuser_question(position, value, question)
+
+            nb_rounds += 1
+
+    def discuter(self, position, numero):
+        """
+        @brief Temps de discussion, écourté lorsque tous les joueurs sont prêts (si activé)
+
+        @param position Position de la tâche dans le backlog
+        @param numero Numéro du tour
+        """
+        if not self.discussion_anticipee:
+            self.attendre(int(self.temps_discussion))
+            return
+
+        prets = set()
+        reparer = self.diffuseur.reparer if self.diffuseur else None
+        debut = time.monotonic()
+        self.attendre(int(self.temps_discussion), lambda: len(lire_prets(self.clients, prets, reparer)) >= len(self.clients))
+        if self.historique:
+            self.historique.enregistrer_duree(self.session_id, position, numero, 'discussion', time.monotonic() - debut)
+
+    def decider(self, position, key, value, estimation, nb_tours):
+        """
+        @brief Enregistre l'estimation d'une tâche et l'applique à son groupe de doublons
+
+        @param position Position de la tâche dans le backlog
+        @param key Clé de la tâche représentante
+        @param value Intitulé de la tâche
+        @param estimation Estimation retenue
+        @param nb_tours Nombre de tours joués (0 si l'estimation est reprise de l'historique)
+        """
+        for membre in self.analyse.clusters[key]:
+            self.resultat[membre] = estimation
+        self.publier('decision', cles=self.analyse.clusters[key], estimation=estimation)
+        if self.historique:
+            self.historique.enregistrer_tache(self.session_id, position, value, estimation, nb_tours)
+        if self.index_rappel is not None and nb_tours > 0:
+            self.index_rappel.ajouter(value, estimation)
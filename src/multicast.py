@@ -0,0 +1,330 @@
+import queue
+import re
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+GROUPE = '239.255.16.83'
+PORT_MULTICAST = 16384
+TAG_REPAIR = '@@REPAIR@@'
+DEMANDE = re.compile(re.escape(TAG_REPAIR) + r'(\d+)\n')  # Demande de réparation, où qu'elle soit dans le message
+
+MAGIC = b'PPMC'
+MAGIC_SUITE = b'PPMS'  # Fragment d'un message dont la suite porte le numéro de séquence suivant
+ENTETE = struct.Struct('!4sII')  # magic, numéro de séquence, longueur du message
+TAILLE_FRAGMENT = 1400  # Un datagramme par trame Ethernet : la perte d'un fragment IP ferait perdre tout le datagramme
+
+
+class Fragment(str):
+    """
+    @brief Morceau d'un message trop grand pour un datagramme, complété par les trames suivantes.
+    """
+
+
+def decouper(message, taille=TAILLE_FRAGMENT):
+    """
+    @brief Découpe un message en morceaux d'au plus taille octets, sans couper de caractère UTF-8
+
+    @param message Message texte
+    @param taille Taille maximale d'un morceau encodé
+    @return Liste des morceaux (un seul si le message tient dans un datagramme)
+    """
+    data = message.encode()
+    morceaux = []
+    debut = 0
+    while True:
+        fin = min(debut + taille, len(data))
+        while fin < len(data) and data[fin] & 0xC0 == 0x80:
+            fin -= 1  # Octet de continuation : on recule au début du caractère
+        morceaux.append(data[debut:fin].decode())
+        if fin == len(data):
+            return morceaux
+        debut = fin
+
+
+def encoder_trame(seq, message, suite=False):
+    """
+    @brief Encode un message diffusé avec son numéro de séquence
+
+    @param seq Numéro de séquence
+    @param message Message texte
+    @param suite True si le message se poursuit dans la trame suivante
+    @return Trame binaire
+    """
+    data = message.encode()
+    return ENTETE.pack(MAGIC_SUITE if suite else MAGIC, seq, len(data)) + data
+
+
+def lire_message(magic, data):
+    """
+    @brief Décode la charge d'une trame
+
+    @param magic Magic de l'entête
+    @param data Charge binaire
+    @return Message texte, ou Fragment si la suite est dans la trame suivante
+    """
+    return Fragment(data.decode()) if magic == MAGIC_SUITE else data.decode()
+
+
+def decoder_trame(trame):
+    """
+    @brief Décode une trame reçue par datagramme
+
+    @param trame Trame binaire complète
+    @return Tuple (seq, message), ou None si la trame est invalide
+    """
+    if len(trame) < ENTETE.size:
+        return None
+    magic, seq, longueur = ENTETE.unpack_from(trame)
+    if magic not in (MAGIC, MAGIC_SUITE) or len(trame) < ENTETE.size + longueur:
+        return None
+    return seq, lire_message(magic, trame[ENTETE.size:ENTETE.size + longueur])
+
+
+class LecteurTrames:
+    """
+    @brief Découpe un flux TCP en trames (réparations envoyées par l'hôte).
+    """
+
+    def __init__(self):
+        self.tampon = b''
+
+    def ajouter(self, data):
+        """
+        @brief Ajoute des octets reçus et extrait les trames complètes
+
+        @param data Octets reçus
+        @return Liste de tuples (seq, message)
+        """
+        self.tampon += data
+        trames = []
+        while len(self.tampon) >= ENTETE.size:
+            magic, seq, longueur = ENTETE.unpack_from(self.tampon)
+            fin = ENTETE.size + longueur
+            if len(self.tampon) < fin:
+                break
+            trames.append((seq, lire_message(magic, self.tampon[ENTETE.size:fin])))
+            self.tampon = self.tampon[fin:]
+        return trames
+
+
+def lire_demandes(message):
+    """
+    @brief Sépare les demandes de réparation du reste d'un message reçu
+
+    Les demandes ont la forme '@@REPAIR@@<seq>\\n' et peuvent être fusionnées entre elles ou avec un vote par TCP,
+    avant comme après le vote (sonde envoyée par le joueur après avoir voté).
+
+    @param message Message reçu d'un client
+    @return Tuple (liste des numéros demandés, reste du message)
+    """
+    demandes = [int(seq) for seq in DEMANDE.findall(message)]
+    return demandes, DEMANDE.sub('', message) if demandes else message
+
+
+class DiffuseurMulticast:
+    """
+    @brief Diffusion des messages de l'hôte en multicast UDP.
+
+    Chaque message est envoyé une seule fois au groupe, quel que soit le nombre de
+    joueurs, avec un numéro de séquence. Un message plus grand qu'un datagramme
+    (retour d'un tour d'une grande salle) est découpé en fragments de numéros
+    consécutifs. Les dernières trames sont conservées pour répondre aux demandes
+    de réparation reçues par TCP.
+    """
+
+    def __init__(self, groupe=GROUPE, port=PORT_MULTICAST, interface=None, memoire=4096):
+        """
+        @brief Constructeur de DiffuseurMulticast.
+
+        @param groupe Adresse du groupe multicast
+        @param port Port UDP du groupe
+        @param interface Adresse IP de l'interface d'émission (optionnelle)
+        @param memoire Nombre de trames conservées pour les réparations
+        """
+        self.groupe = groupe
+        self.port = port
+        self.memoire = memoire
+        self.seq = 0
+        self.trames = OrderedDict()
+        self.verrou = threading.Lock()
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)  # Reste sur le réseau local
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)  # Joueurs sur la même machine
+        if interface:
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+
+    def envoyer(self, message):
+        """
+        @brief Diffuse un message au groupe
+
+        @param message Message texte
+        @return Numéro de séquence attribué (celui du dernier fragment)
+        """
+        morceaux = decouper(message)
+        trames = []
+        with self.verrou:
+            for i, morceau in enumerate(morceaux):
+                seq = self.seq
+                trame = self.trames[seq] = encoder_trame(seq, morceau, suite=i < len(morceaux) - 1)
+                trames.append(trame)
+                self.seq += 1
+                if len(self.trames) > self.memoire:
+                    self.trames.popitem(last=False)
+
+        for trame in trames:
+            try:
+                self.sock.sendto(trame, (self.groupe, self.port))
+            except OSError as e:
+                # La trame reste disponible pour les réparations
+                print(f"Erreur de diffusion multicast : {e}")
+        return seq
+
+    def reparer(self, client, debut):
+        """
+        @brief Renvoie par TCP les trames à partir d'un numéro de séquence
+
+        @param client Connexion TCP du joueur
+        @param debut Premier numéro de séquence manquant
+        """
+        with self.verrou:
+            trames = [trame for seq, trame in self.trames.items() if seq >= debut]
+        if trames:
+            client.sendall(b''.join(trames))
+
+    def fermer(self):
+        """
+        @brief Ferme le socket de diffusion
+        """
+        self.sock.close()
+
+
+class RecepteurMulticast:
+    """
+    @brief Réception côté joueur des messages diffusés en multicast.
+
+    Remet les messages dans l'ordre des numéros de séquence et réassemble les
+    messages fragmentés. Un trou dans la séquence, ou une absence prolongée de
+    trafic, déclenche une demande de réparation auprès de l'hôte.
+    """
+
+    DELAI_REPARATION = 0.5  # Délai avant de redemander une trame manquante
+    DELAI_SONDE = 2.0  # Sans trafic, on vérifie auprès de l'hôte qu'aucune trame n'a été perdue
+
+    def __init__(self, groupe, port, demander_reparation):
+        """
+        @brief Constructeur de RecepteurMulticast.
+
+        @param groupe Adresse du groupe multicast
+        @param port Port UDP du groupe
+        @param demander_reparation Fonction demander_reparation(seq) envoyant la demande à l'hôte
+        """
+        self.groupe = groupe
+        self.port = port
+        self.demander_reparation = demander_reparation
+        self.attendu = 0
+        self.tampon = {}
+        self.morceaux = []  # Fragments délivrés du message en cours de réassemblage
+        self.file = queue.Queue()
+        self.verrou = threading.Lock()
+        self.derniere_demande = 0
+        self.dernier_message = time.monotonic()
+        self.actif = False
+        self.sock = None
+
+    def demarrer(self):
+        """
+        @brief Rejoint le groupe multicast et lance le thread de réception
+        """
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(('', self.port))
+        mreq = struct.pack('4sl', socket.inet_aton(self.groupe), socket.INADDR_ANY)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+        self.sock.settimeout(self.DELAI_REPARATION)
+        self.actif = True
+        threading.Thread(target=self.recevoir, daemon=True).start()
+
+    def recevoir(self):
+        """
+        @brief Boucle du thread de réception
+        """
+        while self.actif:
+            try:
+                trame = decoder_trame(self.sock.recv(65535))
+                if trame:
+                    self.injecter(*trame)
+            except socket.timeout:
+                self.verifier()
+            except OSError:
+                break
+
+    def injecter(self, seq, message):
+        """
+        @brief Ajoute une trame reçue (multicast ou réparation) et délivre les messages dans l'ordre
+
+        @param seq Numéro de séquence
+        @param message Message texte, ou Fragment d'un message découpé
+        """
+        with self.verrou:
+            self.dernier_message = time.monotonic()
+            if seq < self.attendu or seq in self.tampon:
+                return  # Doublon
+            self.tampon[seq] = message
+            while self.attendu in self.tampon:
+                morceau = self.tampon.pop(self.attendu)
+                self.attendu += 1
+                self.morceaux.append(morceau)
+                if not isinstance(morceau, Fragment):
+                    self.file.put(''.join(self.morceaux))
+                    self.morceaux = []
+            trou = bool(self.tampon)
+        if trou:
+            self.verifier()
+
+    def verifier(self):
+        """
+        @brief Demande une réparation en cas de trou ou d'absence prolongée de trafic
+        """
+        maintenant = time.monotonic()
+        with self.verrou:
+            trou = bool(self.tampon)
+            silence = maintenant - self.dernier_message >= self.DELAI_SONDE
+            if not (trou or silence) or maintenant - self.derniere_demande < self.DELAI_REPARATION:
+                return
+            self.derniere_demande = maintenant
+            if silence:
+                self.dernier_message = maintenant
+            attendu = self.attendu
+        try:
+            self.demander_reparation(attendu)
+        except OSError as e:
+            print(f"Erreur lors de la demande de réparation : {e}")
+
+    def forcer(self, message):
+        """
+        @brief Délivre immédiatement un message, sans tenir compte de la séquence (fin de partie)
+
+        @param message Message texte
+        """
+        self.file.put(message)
+
+    def lire(self, timeout=None):
+        """
+        @brief Prochain message dans l'ordre de diffusion
+
+        @param timeout Délai maximal d'attente en secondes
+        @return Le message
+        """
+        return self.file.get(timeout=timeout)
+
+    def fermer(self):
+        """
+        @brief Quitte le groupe et ferme le socket
+        """
+        self.actif = False
+        if self.sock:
+            self.sock.close()
@@ -0,0 +1,84 @@
+import json
+import zlib
+
+from compression import CODEC_ZLIB, GENRE_TACHES, encoder_trame
+from protocole import TAG_TACHE
+
+FENETRE = 32  # Tâches envoyées par fenêtre
+MARGE = 8     # Une nouvelle fenêtre part lorsqu'il reste moins de MARGE tâches d'avance chez les joueurs
+
+
+def construire_reference(position, texte, question):
+    """
+    @brief Question désignée par la position de sa tâche dans le backlog
+
+    Le rappel éventuellement ajouté sous l'intitulé (tâche similaire) est conservé.
+
+    @param position Position de la tâche dans le backlog
+    @param texte Intitulé de la tâche
+    @param question Question posée (intitulé, suivi d'un éventuel rappel)
+    @return Message '@@TASK@@<position>' suivi du rappel
+    """
+    return f"{TAG_TACHE}{position}{question[len(texte):]}"
+
+
+class PrechargementTaches:
+    """
+    @brief Envoi anticipé des intitulés des tâches aux joueurs qui le supportent.
+
+    Les intitulés sont envoyés par fenêtres glissantes, dans des trames compressées
+    (zlib), en avance sur la partie. Les questions ne sont ensuite désignées que par
+    la position de la tâche : un changement de tâche ou un nouveau tour ne coûte
+    que quelques octets, et le joueur connaît déjà la question suivante pendant
+    l'affichage des votes.
+    """
+
+    def __init__(self, backlog, fenetre=FENETRE, marge=MARGE):
+        """
+        @brief Constructeur de PrechargementTaches.
+
+        @param backlog Backlog de la partie {clé: tâche}
+        @param fenetre Nombre de tâches par fenêtre
+        @param marge Avance minimale, en tâches, avant l'envoi de la fenêtre suivante
+        """
+        self.textes = list(backlog.values())
+        self.fenetre = fenetre
+        self.marge = marge
+        self.abonnes = set()
+        self.envoye = 0  # Les tâches d'indice inférieur sont connues des joueurs
+
+    def inscrire(self, conn):
+        """
+        @brief Active le préchargement pour un joueur
+
+        @param conn Connexion du joueur
+        """
+        self.abonnes.add(conn)
+
+    def ajouter(self, texte):
+        """
+        @brief Ajoute une tâche en fin de backlog (ajout en cours de partie)
+
+        @param texte Intitulé de la tâche
+        """
+        self.textes.append(texte)
+
+    def __contains__(self, conn):
+        return conn in self.abonnes
+
+    def envoyer(self, clients, position):
+        """
+        @brief Envoie la fenêtre suivante si les joueurs n'ont plus assez d'avance
+
+        @param clients Connexions des joueurs
+        @param position Position de la tâche sur le point d'être posée
+        """
+        if self.envoye >= len(self.textes) or position + self.marge < self.envoye:
+            return
+        fin = min(len(self.textes), max(position, self.envoye) + self.fenetre)
+        fenetre = {indice: self.textes[indice] for indice in range(self.envoye, fin)}
+        trame = encoder_trame(CODEC_ZLIB, GENRE_TACHES, zlib.compress(json.dumps(fenetre, ensure_ascii=False).encode(), 9))
+        for client in clients:
+            if client in self.abonnes:
+                client.sendall(trame)
+        self.envoye = fin
@@ -0,0 +1,366 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+
+from compression import Compression
+from enregistrement import Enregistreur
+from export import ExportResultats
+from historique import HistoriqueStore
+from ingestion import IngestionBacklog
+from joueurs import RegistreJoueurs
+from moteur import MoteurPartie
+from multicast import DiffuseurMulticast
+from prechargement import PrechargementTaches
+from profilage import PROFILEUR
+from sauvegarde import sauvegarder_backlogs
+from spectateurs import DiffusionSpectateurs
+from tableau import EtatPartie, ServeurEtat
+
+TAILLE_FLUX = 1000         # Messages en attente vers la console au-delà desquels ils sont remplacés par un instantané
+LECTURES_MAX = 200         # Messages traités par la console à chaque relevé
+INTERVALLE_CONSOLE = 0.05  # Délai entre deux relevés de la console (secondes)
+ATTENTE_ARRET = 5          # Délai laissé au processus du moteur pour s'arrêter (secondes)
+
+
+class FluxConsole:
+    """
+    @brief Relais de l'état de la partie vers la console, côté processus du moteur.
+
+    Observateur du moteur : les événements et les lignes à afficher sont placés
+    dans une file bornée qu'un thread dédié envoie à la console. Le moteur ne
+    bloque jamais sur la console. Si la console prend du retard et que la file
+    est pleine, les messages en attente sont remplacés par un instantané de
+    l'état (EtatPartie), suivi des nouveaux événements.
+    """
+
+    def __init__(self, liaison, taille=TAILLE_FLUX):
+        """
+        @brief Constructeur de FluxConsole : démarre le thread d'envoi.
+
+        @param liaison Extrémité de la liaison (multiprocessing.Pipe) côté moteur
+        @param taille Nombre maximal de messages en attente
+        """
+        self.liaison = liaison
+        self.taille = taille
+        self.etat = EtatPartie()
+        self.file = deque()
+        self.condition = threading.Condition()
+        self.perdus = 0  # Lignes remplacées par l'instantané en attente
+        self.actif = True
+        self.thread = threading.Thread(target=self.envoyer, daemon=True)
+        self.thread.start()
+
+    def publier(self, type, **donnees):
+        """
+        @brief Événement de la partie (appelé par le moteur, ne bloque jamais)
+        """
+        with self.condition:
+            self.etat.publier(type, **donnees)
+            self.ajouter(('evenement', type, donnees))
+
+    def afficher(self, texte, couleur='white'):
+        """
+        @brief Ligne à afficher sur la console de l'hôte
+        """
+        with self.condition:
+            self.ajouter(('ligne', texte, couleur))
+
+    def ajouter(self, message):
+        """
+        @brief Place un message dans la file (verrou tenu par l'appelant)
+
+        @param message Tuple dont le premier élément est le type de message
+        """
+        if len(self.file) < self.taille:
+            self.file.append(message)
+        else:
+            # Console en retard : l'instantané contient déjà l'effet des événements remplacés
+            self.perdus += sum(1 for attente in self.file if attente[0] == 'ligne') + (message[0] == 'ligne')
+            self.file.clear()
+            self.file.append(('instantane', self.etat.instantane()[2], self.perdus))
+        self.condition.notify()
+
+    def envoyer(self):
+        """
+        @brief Boucle du thread d'envoi
+        """
+        while True:
+            with self.condition:
+                while not self.file and self.actif:
+                    self.condition.wait()
+                if not self.file:
+                    return
+                message = self.file.popleft()
+                if message[0] == 'instantane':
+                    self.perdus = 0
+            try:
+                self.liaison.send(message)
+            except OSError:
+                return  # Console fermée
+
+    def terminer(self, fin):
+        """
+        @brief Envoie le résultat de la partie, après les messages en attente
+
+        @param fin Dictionnaire {'resultat', 'paused', 'backlog', 'analyse', 'rappel'}
+        """
+        with self.condition:
+            self.file.append(('fin', fin))
+            self.actif = False
+            self.condition.notify()
+        self.thread.join()
+
+
+def executer_partie(liaison, joueurs, spectateurs, backlog, mode, temps_vote, temps_discussion, ip='127.0.0.1',
+                    analyse=None, index_rappel=None, rappel_auto=False, multicast=False, tableau=False,
+                    enregistrement=None, ingestion=None, export=None, discussion_anticipee=False, pause=1,
+                    asynchrone=None):
+    """
+    @brief Point d'entrée du processus du moteur
+
+    Reconstruit les services de la partie à partir des paramètres reçus, joue la
+    partie, enregistre les résultats puis attend que la console demande l'arrêt
+    (le tableau de bord et les spectateurs restent servis jusque-là).
+
+    @param liaison Extrémité de la liaison avec la console
+    @param joueurs Liste de (connexion, pseudo, codec de compression, préchargement) des joueurs
+    @param spectateurs Liste de (connexion, pseudo) des spectateurs
+    @param backlog Backlog à estimer {clé: tâche}
+    @param mode Mode de jeu
+    @param temps_vote Temps de vote en secondes
+    @param temps_discussion Temps de discussion en secondes
+    @param ip Adresse de l'hôte (multicast, tableau de bord)
+    @param analyse AnalyseBacklog des doublons (optionnelle)
+    @param index_rappel IndexSimilarite des tâches déjà estimées (optionnel)
+    @param rappel_auto Fait confirmer par un vote les estimations des tâches quasi identiques
+    @param multicast Diffusion multicast des messages
+    @param tableau Tableau de bord HTTP
+    @param enregistrement Tuple (chemin, paramètres) du journal de la session (optionnel)
+    @param ingestion Fichier de backlog à surveiller pendant la partie (optionnel)
+    @param export Nom des fichiers d'export des résultats (optionnel)
+    @param discussion_anticipee Termine la discussion dès que tous les joueurs se sont déclarés prêts
+    @param pause Délai en secondes laissé aux clients entre deux étapes
+    @param asynchrone BilanAsynchrone de la fenêtre de vote ouverte avant la partie (optionnel)
+    """
+    flux = FluxConsole(liaison)
+
+    registre = RegistreJoueurs()
+    for conn, pseudo, codec, references in joueurs:
+        conn.settimeout(None)
+        registre.ajouter(conn, pseudo, codec, references)
+    diffusion = DiffusionSpectateurs()
+    for conn, pseudo in spectateurs:
+        diffusion.ajouter(conn, pseudo)
+
+    historique = HistoriqueStore()
+    diffuseur = DiffuseurMulticast(interface=ip) if multicast else None
+
+    etat = None
+    serveur_etat = None
+    if tableau:
+        try:
+            etat = EtatPartie()
+            serveur_etat = ServeurEtat(etat, ip)
+        except OSError as e:
+            flux.afficher(f"Erreur du tableau de bord : {e}", 'red')
+            etat = None
+
+    compression = None
+    if any(joueur.compression for joueur in registre.joueurs()):
+        compression = Compression(backlog)
+        for joueur in registre.joueurs():
+            compression.inscrire(joueur.conn, joueur.compression)
+
+    prechargement = None
+    if not diffuseur and any(joueur.references for joueur in registre.joueurs()):
+        prechargement = PrechargementTaches(backlog)
+        for joueur in registre.joueurs():
+            if joueur.references:
+                prechargement.inscrire(joueur.conn)
+
+    clients = registre.connexions()
+    enregistreur = None
+    if enregistrement:
+        enregistreur = Enregistreur(*enregistrement)
+        clients = enregistreur.envelopper(clients)
+
+    surveillance = None
+    if ingestion:
+        surveillance = IngestionBacklog(ingestion, backlog)
+        surveillance.demarrer()
+        if enregistreur:
+            surveillance = enregistreur.envelopper_ingestion(surveillance)
+
+    moteur = MoteurPartie(clients, backlog, mode, temps_vote, temps_discussion, analyse=analyse,
+                          index_rappel=index_rappel, rappel_auto=rappel_auto, historique=historique,
+                          afficher=flux.afficher, pause=pause, diffuseur=diffuseur, registre=registre,
+                          compression=compression, etat=etat, spectateurs=diffusion,
+                          export=ExportResultats('exports', nom=export) if export else None,
+                          prechargement=prechargement, ingestion=surveillance,
+                          discussion_anticipee=discussion_anticipee, observateurs=[flux], asynchrone=asynchrone)
+    try:
+        moteur.executer()
+    finally:
+        if surveillance:
+            surveillance.arreter()
+        sauvegarder_backlogs(backlog, moteur.resultat, moteur.paused, atomique=True)
+        if enregistreur:
+            enregistreur.fermer(moteur.resultat, moteur.paused)
+        historique.fermer()
+        if diffuseur:
+            diffuseur.fermer()
+        if PROFILEUR.actif:
+            PROFILEUR.ecrire(os.path.join('profil', 'moteur'))
+        # Index de rappel et doublons mis à jour par la partie : repris par la console pour la partie suivante
+        flux.terminer({'resultat': moteur.resultat, 'paused': moteur.paused, 'backlog': backlog,
+                       'analyse': moteur.analyse, 'rappel': index_rappel.entrees() if index_rappel is not None else None})
+
+    # Tableau de bord et spectateurs servis jusqu'à la fermeture de la partie par l'hôte
+    try:
+        liaison.recv()
+    except (EOFError, OSError):
+        pass
+    if serveur_etat:
+        serveur_etat.fermer()
+    diffusion.fermer()
+
+
+class ConsoleMoteur:
+    """
+    @brief État de la partie reconstruit par la console à partir du flux du moteur.
+
+    Un instantané remplace l'état courant ; les événements suivants s'y appliquent
+    comme dans le processus du moteur.
+    """
+
+    def __init__(self, liaison):
+        """
+        @brief Constructeur de ConsoleMoteur.
+
+        @param liaison Extrémité de la liaison côté console
+        """
+        self.liaison = liaison
+        self.etat = EtatPartie()
+        self.fin = None      # Résultat de la partie, une fois reçu
+        self.ferme = False   # Liaison fermée par le processus du moteur
+        self.perdus = 0      # Lignes jamais affichées (console en retard)
+
+    def traiter(self, message, afficher):
+        """
+        @brief Applique un message du moteur
+
+        @param message Message reçu
+        @param afficher Fonction afficher(texte, couleur) de la console
+        """
+        match message:
+            case ('ligne', texte, couleur):
+                afficher(texte, couleur)
+            case ('evenement', type, donnees):
+                self.etat.publier(type, **donnees)
+            case ('instantane', corps, perdus):
+                self.etat.restaurer(json.loads(corps))
+                if perdus:
+                    self.perdus += perdus
+                    afficher(f"({perdus} message(s) non affiché(s))", 'grey')
+            case ('fin', fin):
+                self.fin = fin
+
+    def lire(self, afficher, limite=LECTURES_MAX):
+        """
+        @brief Traite sans bloquer les messages disponibles
+
+        @param afficher Fonction afficher(texte, couleur) de la console
+        @param limite Nombre maximal de messages traités
+        """
+        for _ in range(limite):
+            try:
+                if not self.liaison.poll():
+                    return
+                message = self.liaison.recv()
+            except (EOFError, OSError):
+                self.ferme = True
+                return
+            self.traiter(message, afficher)
+
+    def resume(self):
+        """
+        @brief Ligne d'état de la partie pour la console
+
+        @return Texte : avancement, phase et temps restant
+        """
+        etat = self.etat.etat
+        texte = f"{etat['estimees']}/{etat['total']} tâche(s) estimée(s) - {etat['phase']}"
+        if etat['echeance']:
+            texte += f" : {max(0, int(etat['echeance'] - time.time()))} s"
+        return texte
+
+
+class ProcessusMoteur(ConsoleMoteur):
+    """
+    @brief Partie jouée dans un processus séparé de la console.
+
+    Les connexions des joueurs et des spectateurs sont transmises au processus
+    du moteur, qui fait seul toutes les entrées-sorties réseau de la partie : les
+    ralentissements de l'interface ne retardent jamais la collecte des votes.
+    Le processus est lancé par 'spawn' : il n'hérite ni de Tk ni des threads de
+    la console.
+    """
+
+    def __init__(self, joueurs, backlog, mode, temps_vote, temps_discussion, spectateurs=(), **options):
+        """
+        @brief Constructeur de ProcessusMoteur : démarre le processus du moteur.
+
+        @param joueurs Liste de (connexion, pseudo, codec de compression, préchargement) des joueurs
+        @param backlog Backlog à estimer {clé: tâche}
+        @param mode Mode de jeu
+        @param temps_vote Temps de vote en secondes
+        @param temps_discussion Temps de discussion en secondes
+        @param spectateurs Liste de (connexion, pseudo) des spectateurs
+        @param options Autres paramètres de executer_partie
+        """
+        contexte = multiprocessing.get_context('spawn')
+        liaison, enfant = contexte.Pipe()
+        super().__init__(liaison)
+        self.spectateurs = list(spectateurs)
+        self.processus = contexte.Process(target=executer_partie, daemon=True, kwargs=options,
+                                          args=(enfant, joueurs, self.spectateurs, backlog, mode,
+                                                temps_vote, temps_discussion))
+        self.processus.start()
+        enfant.close()
+
+    def attendre(self, afficher, rafraichir=None):
+        """
+        @brief Relaie le flux du moteur jusqu'à la fin de la partie
+
+        @param afficher Fonction afficher(texte, couleur) de la console
+        @param rafraichir Fonction appelée après chaque relevé (mise à jour de l'interface, optionnelle)
+        @return Dictionnaire {'resultat', 'paused', 'backlog'}, ou None si le moteur s'est arrêté sans résultat
+        """
+        while self.fin is None and not self.ferme:
+            self.lire(afficher)
+            if rafraichir:
+                rafraichir()
+            time.sleep(INTERVALLE_CONSOLE)
+        return self.fin
+
+    def fermer(self):
+        """
+        @brief Demande l'arrêt du processus du moteur
+
+        Les connexions restent ouvertes dans ce processus : les joueurs et les spectateurs
+        peuvent être gardés pour la partie suivante.
+
+        @return Liste de (connexion, pseudo) des spectateurs
+        """
+        try:
+            self.liaison.send('fermer')
+        except OSError:
+            pass
+        self.processus.join(ATTENTE_ARRET)
+        if self.processus.is_alive():
+            self.processus.terminate()
+        self.liaison.close()
+        return self.spectateurs
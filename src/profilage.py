@@ -0,0 +1,173 @@
+import contextlib
+import cProfile
+import os
+import threading
+import time
+import tracemalloc
+
+NUL = contextlib.nullcontext()
+
+
+class Span:
+    """
+    @brief Mesure d'une phase, empilée sur la pile du thread courant.
+    """
+
+    __slots__ = ('profileur', 'nom', 'debut', 'enfants')
+
+    def __init__(self, profileur, nom):
+        self.profileur = profileur
+        self.nom = nom
+        self.enfants = 0
+
+    def __enter__(self):
+        self.profileur.pile().append(self)
+        self.debut = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        duree = time.perf_counter_ns() - self.debut
+        pile = self.profileur.pile()
+        chemin = ';'.join(span.nom for span in pile)
+        pile.pop()
+        if pile:
+            pile[-1].enfants += duree
+        self.profileur.enregistrer(chemin, self.nom, duree, duree - self.enfants)
+        return False
+
+
+class Profileur:
+    """
+    @brief Profilage des phases d'une partie.
+
+    Chaque phase est mesurée par un span. Le profil est écrit au format « folded »
+    (une ligne 'partie;tache;collecte_votes <microsecondes>' par pile), lisible par
+    flamegraph.pl ou speedscope, accompagné d'un résumé par phase. En mode
+    complet, chaque tâche est aussi profilée avec cProfile et tracemalloc.
+    Désactivé, span() renvoie un contexte vide partagé.
+    """
+
+    def __init__(self, mode=''):
+        """
+        @brief Constructeur de Profileur.
+
+        @param mode '' (désactivé), 'spans' ou 'complet' (cProfile et tracemalloc par tâche)
+        """
+        self.actif = False
+        self.complet = False
+        self.trace = False  # tracemalloc démarré par ce profileur
+        self.activer(mode)
+
+    def activer(self, mode):
+        """
+        @brief Active ou désactive le profilage
+
+        @param mode '' (désactivé), 'spans' ou 'complet'
+        """
+        self.actif = mode in ('spans', 'complet', '1')
+        self.complet = mode == 'complet'
+        self.verrou = threading.Lock()
+        self.local = threading.local()
+        self.piles = {}    # pile 'a;b;c' -> temps propre (ns)
+        self.phases = {}   # phase -> [nombre, total (ns), max (ns)]
+        self.taches = []   # (tâche, cProfile.Profile, différences mémoire)
+        self.tache = None
+        if self.complet and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.trace = True
+        elif not self.complet and self.trace:
+            tracemalloc.stop()
+            self.trace = False
+
+    def pile(self):
+        """
+        @brief Pile des spans ouverts du thread courant
+        """
+        pile = getattr(self.local, 'pile', None)
+        if pile is None:
+            pile = self.local.pile = []
+        return pile
+
+    def span(self, nom):
+        """
+        @brief Contexte mesurant une phase
+
+        @param nom Nom de la phase
+        @return Contexte à utiliser avec with
+        """
+        if not self.actif:
+            return NUL
+        return Span(self, nom)
+
+    def enregistrer(self, chemin, nom, duree, propre):
+        """
+        @brief Cumule la mesure d'un span terminé
+        """
+        with self.verrou:
+            self.piles[chemin] = self.piles.get(chemin, 0) + propre
+            phase = self.phases.setdefault(nom, [0, 0, 0])
+            phase[0] += 1
+            phase[1] += duree
+            phase[2] = max(phase[2], duree)
+
+    def debut_tache(self, cle):
+        """
+        @brief Début d'une tâche : lance cProfile et prend un instantané mémoire (mode complet)
+
+        @param cle Clé de la tâche
+        """
+        if not self.complet:
+            return
+        profil = cProfile.Profile()
+        self.tache = (cle, profil, tracemalloc.take_snapshot())
+        profil.enable()
+
+    def fin_tache(self):
+        """
+        @brief Fin d'une tâche : arrête cProfile et compare la mémoire allouée (mode complet)
+        """
+        if not self.complet or self.tache is None:
+            return
+        cle, profil, avant = self.tache
+        profil.disable()
+        differences = tracemalloc.take_snapshot().compare_to(avant, 'lineno')[:10]
+        self.taches.append((cle, profil, differences))
+        self.tache = None
+
+    def resume(self):
+        """
+        @brief Résumé par phase, de la plus coûteuse à la moins coûteuse
+
+        @return Texte du résumé
+        """
+        lignes = [f"{'Phase':<24}{'Appels':>8}{'Total (ms)':>14}{'Moyenne (ms)':>14}{'Max (ms)':>12}"]
+        for nom, (nombre, total, maximum) in sorted(self.phases.items(), key=lambda item: -item[1][1]):
+            lignes.append(f"{nom:<24}{nombre:>8}{total / 1e6:>14.2f}{total / nombre / 1e6:>14.3f}{maximum / 1e6:>12.2f}")
+        return '\n'.join(lignes)
+
+    def ecrire(self, dossier='profil'):
+        """
+        @brief Écrit le profil folded, le résumé et les profils par tâche
+
+        @param dossier Dossier de sortie
+        @return Texte du résumé
+        """
+        os.makedirs(dossier, exist_ok=True)
+        with open(os.path.join(dossier, 'profil.folded'), 'w', encoding='utf-8') as f:
+            for chemin, propre in self.piles.items():
+                f.write(f"{chemin} {propre // 1000}\n")
+
+        resume = self.resume()
+        with open(os.path.join(dossier, 'resume.txt'), 'w', encoding='utf-8') as f:
+            f.write(resume + '\n')
+            for numero, (cle, profil, differences) in enumerate(self.taches, 1):
+                f.write(f"\nMémoire allouée pendant la tâche {cle} (profil tache_{numero}.prof) :\n")
+                f.writelines(f"  {difference}\n" for difference in differences)
+
+        for numero, (cle, profil, differences) in enumerate(self.taches, 1):
+            profil.dump_stats(os.path.join(dossier, f"tache_{numero}.prof"))
+        return resume
+
+
+# Profileur partagé par l'application, configuré par la variable PLANNING_POKER_PROFIL ('spans' ou 'complet')
+PROFILEUR = Profileur(os.environ.get('PLANNING_POKER_PROFIL', ''))
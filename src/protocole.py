@@ -0,0 +1,170 @@
+import socket
+import time
+
+from multicast import lire_demandes
+
+TAG_START = '@@START@@'
+TAG_NEW = '@@NEW@@'
+TAG_FEEDBACK = '@@FEEDBACK@@'
+TAG_END = '@@END@@'
+TAG_TACHE = '@@TASK@@'  # Question désignée par la position de la tâche (voir prechargement.py)
+TAG_PRET = '@@READY@@'  # Joueur prêt à passer à la suite pendant la discussion (suivi d'un saut de ligne)
+
+
+def lire_vote(message):
+    """
+    @brief Décode un vote envoyé par un client
+
+    @param message Message 'pseudo;vote'
+    @return Liste [pseudo, vote]
+    """
+    return message.split(';')
+
+
+def collecter_votes(clients, reparer=None, registre=None, delai=None):
+    """
+    @brief Attend un vote de chaque client
+
+    Interroge les clients à tour de rôle jusqu'à avoir reçu autant de votes que de clients,
+    ou jusqu'à l'échéance.
+
+    @param clients Liste des connexions des joueurs
+    @param reparer Fonction reparer(client, seq) traitant les demandes de réparation multicast (optionnelle)
+    @param registre RegistreJoueurs : le pseudo du vote est celui du joueur inscrit sur la connexion (optionnel)
+    @param delai Délai maximal de la collecte en secondes (None : attente sans limite)
+    @return Tuple (full_list, votes) : les [pseudo, vote] reçus et les votes seuls
+    """
+    full_list = []
+    votes = []
+    echeance = None if delai is None else time.monotonic() + delai
+
+    while len(votes) < len(clients):
+        if echeance is not None and time.monotonic() >= echeance:
+            break  # Votes manquants : joueurs injoignables
+        # On essaie de recevoir les votes de chaque client
+        for client in clients:
+            try:
+                if echeance is not None:
+                    client.settimeout(max(echeance - time.monotonic(), 0.001))
+                message = client.recv(1024).decode()  # Recevoir un vote
+                message = message.replace(TAG_PRET + '\n', '')  # Signal envoyé à la fin d'une discussion
+                if not message:
+                    continue
+                if reparer is not None:
+                    demandes, message = lire_demandes(message)
+                    for seq in demandes:
+                        reparer(client, seq)
+                    if not message:
+                        continue
+                info = lire_vote(message)
+                if registre is not None:
+                    joueur = registre.par_connexion(client)
+                    if joueur:
+                        info[0] = joueur.pseudo  # Distingue les pseudos identiques
+                        joueur.marquer_vote()
+                full_list.append(info)  # Stocke le pseudo + le vote
+                votes.append(info[1])  # Stocke uniquement le vote pour les traitements
+            except:
+                continue
+
+    if echeance is not None:
+        for client in clients:
+            try:
+                client.settimeout(None)
+            except OSError:
+                pass  # Connexion déjà fermée
+    return full_list, votes
+
+
+def lire_prets(clients, prets, reparer=None):
+    """
+    @brief Relève sans attendre les joueurs qui se sont déclarés prêts pendant la discussion
+
+    Un joueur déconnecté est compté comme prêt : il ne retient pas la salle.
+
+    @param clients Liste des connexions des joueurs
+    @param prets Ensemble des connexions déjà prêtes (complété sur place)
+    @param reparer Fonction reparer(client, seq) traitant les demandes de réparation multicast (optionnelle)
+    @return L'ensemble prets
+    """
+    for client in clients:
+        if client in prets:
+            continue
+        try:
+            client.settimeout(0)
+            data = client.recv(1024)
+            client.settimeout(None)
+        except (socket.timeout, BlockingIOError):
+            client.settimeout(None)
+            continue
+        except OSError:
+            data = b''
+        message = data.decode(errors='replace')
+        if not data or TAG_PRET in message:
+            prets.add(client)
+        if reparer is not None:
+            demandes, message = lire_demandes(message.replace(TAG_PRET + '\n', ''))
+            for seq in demandes:
+                reparer(client, seq)
+    return prets
+
+
+def purger_connexions(clients):
+    """
+    @brief Vide sans attendre les messages restés en attente sur les connexions entre deux parties
+
+    Un vote ou un signal « prêt » arrivé après la fin d'une partie ne doit pas être lu
+    pendant la suivante.
+
+    @param clients Liste des connexions des joueurs
+    @return Liste des connexions fermées par les joueurs
+    """
+    fermees = []
+    for client in clients:
+        try:
+            client.settimeout(0)
+            while client.recv(1024):
+                pass
+            fermees.append(client)
+        except (socket.timeout, BlockingIOError):
+            pass
+        except OSError:
+            fermees.append(client)
+        try:
+            client.settimeout(None)
+        except OSError:
+            pass
+    return fermees
+
+
+def construire_feedback(condition, full_list):
+    """
+    @brief Construit le message de retour envoyé après un tour
+
+    @param condition True si le tour a abouti à une estimation
+    @param full_list Liste des [pseudo, vote] reçus
+    @return Message : état de la condition suivi des votes 'pseudo:vote' séparés par des ';'
+    """
+    return str(int(condition)) + ';'.join(':'.join(el) for el in full_list)
+
+
+def lire_feedback(message):
+    """
+    @brief Décode le message de retour d'un tour
+
+    @param message Message construit par construire_feedback
+    @return Tuple (condition, liste de (pseudo, vote))
+    """
+    condition = bool(int(message[0]))
+    votes = [tuple(item.split(':')) for item in message[1:].split(';')]
+    return condition, votes
+
+
+def construire_lobby(pseudos):
+    """
+    @brief Construit la liste des joueurs envoyée en salle d'attente
+
+    @param pseudos Liste des pseudos connectés
+    @return Message des pseudos séparés par des ';'
+    """
+    return ';'.join(pseudos)
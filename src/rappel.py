@@ -0,0 +1,200 @@
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+
+from historique import lire_taches_estimees
+
+ACCENTS = re.compile('[\u0300-\u036f]')  # Diacritiques combinants après décomposition NFKD
+MOTS = re.compile(r"\w+")
+
+def normaliser(texte):
+    """
+    @brief Normalise un intitulé de tâche
+
+    Passage en minuscules, suppression des accents et de la ponctuation.
+
+    @param texte Intitulé brut
+    @return Intitulé normalisé
+    """
+    texte = texte.lower()
+    if not texte.isascii():
+        texte = ACCENTS.sub('', unicodedata.normalize('NFKD', texte))
+    return ' '.join(MOTS.findall(texte))
+
+
+def tokeniser(texte):
+    """
+    @brief Découpe un intitulé normalisé en mots
+
+    @param texte Intitulé brut
+    @return Liste des mots significatifs (au moins 2 caractères)
+    """
+    return [mot for mot in normaliser(texte).split() if len(mot) > 1]
+
+
+class IndexSimilarite:
+    """
+    @brief Index TF-IDF des tâches déjà estimées.
+
+    Index inversé mot -> tâches, mis à jour de façon incrémentale. Une recherche
+    ne parcourt que les listes des mots de la requête, en ignorant les mots trop
+    fréquents lorsque des mots plus discriminants sont présents. Le parcours d'une
+    liste est borné à ses MAX_POSTINGS entrées les plus récentes.
+
+    L'IDF est figé entre deux reconstructions : requêtes et normes utilisent les mêmes
+    poids, et la norme de chaque tâche est calculée une seule fois. Les normes sont
+    recalculées en bloc lorsque l'index a grandi de plus de DERIVE_IDF depuis.
+    """
+
+    MAX_POSTINGS = 1000
+    DERIVE_IDF = 0.1  # Croissance relative de l'index au-delà de laquelle l'IDF et les normes sont recalculés
+
+    def __init__(self):
+        """
+        @brief Constructeur de IndexSimilarite.
+        """
+        self.textes = []        # id -> intitulé d'origine
+        self.estimations = []   # id -> dernière estimation connue
+        self.termes = []        # id -> Counter des mots
+        self.par_texte = {}     # intitulé normalisé -> id
+        self.postings = {}      # mot -> liste d'ids
+        self.normes = []        # id -> norme du vecteur TF-IDF (IDF figé)
+        self.taille_idf = 0     # Nombre de tâches lors du dernier calcul de l'IDF
+        self.frequences = {}    # mot -> nombre de tâches le contenant, lors du dernier calcul de l'IDF
+
+    def __len__(self):
+        return len(self.textes)
+
+    def entrees(self):
+        """
+        @brief Tâches de l'index dans l'ordre d'ajout, pour le reconstruire à l'identique
+
+        @return Liste de [intitulé, estimation]
+        """
+        return [[texte, estimation] for texte, estimation in zip(self.textes, self.estimations)]
+
+    def idf(self, mot):
+        """
+        @brief Fréquence inverse d'un mot dans l'index, figée au dernier calcul
+
+        @param mot Mot recherché
+        @return Poids IDF lissé
+        """
+        return math.log((1 + self.taille_idf) / (1 + self.frequences.get(mot, 0))) + 1
+
+    def recalculer_idf(self):
+        """
+        @brief Fige l'IDF courant et recalcule en bloc les normes de toutes les tâches
+        """
+        self.taille_idf = len(self.textes)
+        self.frequences = {mot: len(ids) for mot, ids in self.postings.items()}
+        self.normes = [self.norme(doc_id) for doc_id in range(len(self.textes))]
+
+    def ajouter(self, texte, estimation):
+        """
+        @brief Ajoute ou met à jour une tâche estimée
+
+        Une tâche déjà présente (même intitulé normalisé) prend la nouvelle estimation.
+
+        @param texte Intitulé de la tâche
+        @param estimation Estimation retenue
+        """
+        cle = normaliser(texte)
+        if cle in self.par_texte:
+            self.estimations[self.par_texte[cle]] = estimation
+            return
+
+        termes = Counter(tokeniser(texte))
+        if not termes:
+            return
+
+        doc_id = len(self.textes)
+        self.par_texte[cle] = doc_id
+        self.textes.append(texte)
+        self.estimations.append(estimation)
+        self.termes.append(termes)
+        for mot in termes:
+            self.postings.setdefault(mot, []).append(doc_id)
+        self.normes.append(self.norme(doc_id))
+
+    def norme(self, doc_id):
+        """
+        @brief Norme du vecteur TF-IDF d'une tâche, avec l'IDF figé de l'index
+
+        @param doc_id Identifiant de la tâche
+        @return La norme
+        """
+        return math.sqrt(sum((tf * self.idf(mot)) ** 2 for mot, tf in self.termes[doc_id].items()))
+
+    def rechercher(self, texte, k=3, seuil=0.3):
+        """
+        @brief Recherche les tâches estimées les plus proches
+
+        @param texte Intitulé de la tâche à estimer
+        @param k Nombre maximal de résultats
+        @param seuil Score minimal (similarité cosinus)
+        @return Liste de tuples (intitulé, estimation, score) triée par score décroissant
+        """
+        cle = normaliser(texte)
+        if cle in self.par_texte:
+            doc_id = self.par_texte[cle]
+            return [(self.textes[doc_id], self.estimations[doc_id], 1.0)]
+
+        requete = Counter(tokeniser(texte))
+        if not requete:
+            return []
+        if len(self.textes) > self.taille_idf * (1 + self.DERIVE_IDF):
+            self.recalculer_idf()
+
+        poids = {mot: tf * self.idf(mot) for mot, tf in requete.items()}
+        norme_requete = math.sqrt(sum(p * p for p in poids.values()))
+
+        # Les mots les plus discriminants d'abord, les mots trop fréquents sont ignorés s'il y a mieux
+        mots = sorted((mot for mot in requete if mot in self.postings), key=lambda mot: len(self.postings[mot]))
+        if not mots:
+            return []
+        mots_utiles = [mot for mot in mots if len(self.postings[mot]) <= self.MAX_POSTINGS] or mots[:1]
+
+        scores = {}
+        for mot in mots_utiles:
+            p = poids[mot] * self.idf(mot)
+            for doc_id in self.postings[mot][-self.MAX_POSTINGS:]:
+                scores[doc_id] = scores.get(doc_id, 0) + p * self.termes[doc_id][mot]
+
+        resultats = []
+        for doc_id, score in scores.items():
+            score /= norme_requete * self.normes[doc_id]
+            if score >= seuil:
+                resultats.append((self.textes[doc_id], self.estimations[doc_id], score))
+
+        resultats.sort(key=lambda r: r[2], reverse=True)
+        return resultats[:k]
+
+
+def construire_index(chemin_historique='./historique.db', chemin_output='./backlog_output.json'):
+    """
+    @brief Construit l'index à partir des estimations passées
+
+    Charge l'historique SQLite puis le dernier backlog_output.json, les plus récents écrasant les plus anciens.
+
+    @param chemin_historique Chemin de la base d'historique
+    @param chemin_output Chemin du backlog estimé de la dernière partie
+    @return Un IndexSimilarite
+    """
+    index = IndexSimilarite()
+
+    for texte, estimation in lire_taches_estimees(chemin_historique):
+        index.ajouter(texte, estimation)
+
+    if os.path.exists(chemin_output):
+        try:
+            with open(chemin_output, 'r', encoding='utf-8') as f:
+                for texte, estimation in json.load(f).items():
+                    index.ajouter(texte, estimation)
+        except (OSError, ValueError) as e:
+            print(f"Impossible de lire {chemin_output} : {e}")
+
+    return index
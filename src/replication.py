@@ -0,0 +1,293 @@
+import argparse
+import json
+import socket
+import threading
+import time
+
+from compression import lire_connexion
+from moteur import MoteurPartie
+from protocole import TAG_START
+from sauvegarde import sauvegarder_backlogs
+from transport import transport_par_defaut
+
+PORT_REPLICATION = 16385
+INTERVALLE_BATTEMENT = 0.5  # L'hôte principal signale qu'il est en vie deux fois par seconde
+DELAI_BASCULE = 2.0  # Sans battement pendant ce délai, l'hôte de secours prend le relais
+
+
+def etat_initial():
+    """
+    @brief État répliqué d'une partie avant son lancement
+
+    @return Dictionnaire d'état
+    """
+    return {'pseudos': [], 'backlog': {}, 'mode': None, 'temps_vote': None, 'temps_discussion': None,
+            'resultat': {}, 'tache': None, 'tours': 0, 'termine': False}
+
+
+def appliquer(etat, evenement):
+    """
+    @brief Applique un événement de la partie à un état répliqué
+
+    Utilisé à l'identique par l'hôte principal et par l'hôte de secours.
+
+    @param etat Dictionnaire d'état (modifié en place)
+    @param evenement Dictionnaire {'type': ..., ...}
+    """
+    match evenement['type']:
+        case 'etat':
+            etat.update(evenement['etat'])
+        case 'joueurs':
+            etat['pseudos'] = evenement['pseudos']
+        case 'partie':
+            etat.update(backlog=evenement['backlog'], mode=evenement['mode'],
+                        temps_vote=evenement['temps_vote'], temps_discussion=evenement['temps_discussion'])
+        case 'ajout':
+            etat['backlog'].update(evenement['taches'])
+        case 'tache':
+            etat['tache'], etat['tours'] = evenement['cle'], 0
+        case 'tour':
+            etat['tours'] += 1
+        case 'decision':
+            for cle in evenement['cles']:
+                etat['resultat'][cle] = evenement['estimation']
+            etat['tache'] = None
+        case 'fin':
+            etat['termine'] = True
+
+
+class LecteurLignes:
+    """
+    @brief Découpe un flux en lignes JSON.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.tampon = b''
+
+    def lire(self):
+        """
+        @brief Prochain message JSON du flux
+
+        @return Dictionnaire, ou None si la connexion est fermée
+        """
+        while b'\n' not in self.tampon:
+            data = self.conn.recv(65536)
+            if not data:
+                return None
+            self.tampon += data
+        ligne, self.tampon = self.tampon.split(b'\n', 1)
+        return json.loads(ligne)
+
+
+def envoyer_ligne(conn, message):
+    """
+    @brief Envoie un message JSON terminé par un saut de ligne
+    """
+    conn.sendall(json.dumps(message).encode() + b'\n')
+
+
+class JournalReplication:
+    """
+    @brief Flux d'événements de la partie publié par l'hôte principal.
+
+    Un hôte de secours s'y abonne : il reçoit d'abord l'état complet, puis chaque
+    événement (joueurs, lancement, tâches, tours, décisions) et un battement régulier.
+    """
+
+    def __init__(self, hote, port=PORT_REPLICATION, transport=None):
+        """
+        @brief Constructeur de JournalReplication.
+
+        @param hote Adresse IP d'écoute
+        @param port Port de réplication
+        @param transport Transport utilisé (TCP par défaut)
+        """
+        self.transport = transport or transport_par_defaut()
+        self.etat = etat_initial()
+        self.abonnes = []
+        self.secours = None  # Adresse 'ip:port' de l'hôte de secours, communiquée aux joueurs
+        self.verrou = threading.Lock()
+        self.actif = True
+
+        self.ecoute = self.transport.ecouter(hote, port)
+        self.ecoute.settimeout(1.0)
+        threading.Thread(target=self.accepter, daemon=True).start()
+        threading.Thread(target=self.battre, daemon=True).start()
+
+    def accepter(self):
+        """
+        @brief Accepte les abonnements des hôtes de secours
+        """
+        while self.actif:
+            try:
+                conn, addr = self.ecoute.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                bonjour = LecteurLignes(conn).lire()
+                with self.verrou:
+                    envoyer_ligne(conn, {'type': 'etat', 'etat': self.etat})
+                    self.abonnes.append(conn)
+                    self.secours = bonjour['secours']
+                print(f"Hôte de secours abonné : {self.secours}")
+            except (OSError, TypeError, KeyError, ValueError):
+                conn.close()
+
+    def publier(self, type, **donnees):
+        """
+        @brief Applique un événement à l'état local et le transmet aux abonnés
+
+        @param type Type d'événement
+        @param donnees Contenu de l'événement
+        """
+        evenement = dict(donnees, type=type)
+        with self.verrou:
+            appliquer(self.etat, evenement)
+            self.diffuser(evenement)
+
+    def diffuser(self, evenement):
+        """
+        @brief Envoie un événement aux abonnés ; un abonné injoignable est retiré (verrou tenu)
+        """
+        for conn in list(self.abonnes):
+            try:
+                envoyer_ligne(conn, evenement)
+            except OSError:
+                self.abonnes.remove(conn)
+                self.secours = None
+
+    def battre(self):
+        """
+        @brief Envoie un battement régulier aux abonnés
+        """
+        while self.actif:
+            with self.verrou:
+                self.diffuser({'type': 'battement'})
+            time.sleep(INTERVALLE_BATTEMENT)
+
+    def fermer(self):
+        """
+        @brief Arrête la publication et ferme les connexions
+        """
+        self.actif = False
+        self.ecoute.close()
+        with self.verrou:
+            for conn in self.abonnes:
+                conn.close()
+            self.abonnes = []
+
+
+class HoteSecours:
+    """
+    @brief Hôte de secours : réplique la partie de l'hôte principal et la reprend s'il tombe.
+    """
+
+    def __init__(self, primaire, hote, port=16383, port_replication=PORT_REPLICATION, transport=None):
+        """
+        @brief Constructeur de HoteSecours.
+
+        @param primaire Adresse IP de l'hôte principal
+        @param hote Adresse IP de cet hôte, communiquée aux joueurs
+        @param port Port de jeu sur lequel les joueurs se reconnectent
+        @param port_replication Port de réplication de l'hôte principal
+        @param transport Transport utilisé (TCP par défaut)
+        """
+        self.primaire = primaire
+        self.hote = hote
+        self.port = port
+        self.port_replication = port_replication
+        self.transport = transport or transport_par_defaut()
+        self.etat = etat_initial()
+
+    def suivre(self):
+        """
+        @brief Suit le flux de l'hôte principal
+
+        @return True si la partie s'est terminée normalement, False si l'hôte principal est tombé
+        """
+        conn = self.transport.connecter(self.primaire, self.port_replication)
+        envoyer_ligne(conn, {'secours': f"{self.hote}:{self.port}"})
+        conn.settimeout(DELAI_BASCULE)
+        lecteur = LecteurLignes(conn)
+        try:
+            while not self.etat['termine']:
+                evenement = lecteur.lire()
+                if evenement is None:
+                    break
+                appliquer(self.etat, evenement)
+        except OSError:
+            pass  # Plus de battement : l'hôte principal est considéré comme tombé
+        finally:
+            conn.close()
+        return self.etat['termine']
+
+    def reprendre(self, attente=10, afficher=None, attendre=None, pause=1):
+        """
+        @brief Reprend la partie : attend la reconnexion des joueurs puis estime les tâches restantes
+
+        La tâche en cours au moment de la panne est rejouée depuis son premier tour.
+
+        @param attente Délai maximal d'attente des joueurs (secondes)
+        @param afficher Fonction afficher(texte, couleur)
+        @param attendre Fonction attendre(secondes)
+        @param pause Délai laissé aux clients entre deux étapes
+        @return Le moteur de la reprise
+        """
+        ecoute = self.transport.ecouter(self.hote, self.port)
+        ecoute.settimeout(0.5)
+        clients, pseudos = [], []
+        limite = time.monotonic() + attente
+        try:
+            while len(clients) < len(self.etat['pseudos']) and time.monotonic() < limite:
+                try:
+                    conn, addr = ecoute.accept()
+                except socket.timeout:
+                    continue
+                clients.append(conn)
+                pseudos.append(lire_connexion(conn.recv(1024).decode())[0])  # Reprise sans compression
+        finally:
+            ecoute.close()
+        print(f"Reprise de la partie avec {len(clients)} joueur(s) : {', '.join(pseudos)}")
+
+        # Même enchaînement qu'un lancement de partie : signal de départ puis paramètres de jeu
+        for client in clients:
+            client.sendall(TAG_START.encode())
+        time.sleep(pause)
+
+        restant = {cle: tache for cle, tache in self.etat['backlog'].items() if cle not in self.etat['resultat']}
+        moteur = MoteurPartie(clients, restant, self.etat['mode'], self.etat['temps_vote'], self.etat['temps_discussion'],
+                              afficher=afficher, attendre=attendre, pause=pause)
+        moteur.executer()
+        moteur.resultat = dict(self.etat['resultat'], **moteur.resultat)
+        for client in clients:
+            client.close()
+        return moteur
+
+
+def main():
+    """
+    @brief Lance un hôte de secours sans interface
+    """
+    parser = argparse.ArgumentParser(description="Hôte de secours Planning Poker")
+    parser.add_argument('primaire', help="adresse IP de l'hôte principal")
+    parser.add_argument('--ip', default=socket.gethostbyname(socket.gethostname()), help="adresse IP de cet hôte")
+    parser.add_argument('--attente', type=int, default=10, help="délai de reconnexion des joueurs (secondes)")
+    args = parser.parse_args()
+
+    secours = HoteSecours(args.primaire, args.ip)
+    print(f"Réplication de la partie de {args.primaire}")
+    if secours.suivre():
+        print("Partie terminée par l'hôte principal")
+        return
+
+    print("Hôte principal injoignable : reprise de la partie")
+    moteur = secours.reprendre(args.attente)
+    sauvegarder_backlogs(secours.etat['backlog'], moteur.resultat, moteur.paused, atomique=True)
+    print('Fichier sauvegardé')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+
+
+def ecrire_atomique(chemin, donnees):
+    """
+    @brief Écrit un fichier JSON de façon atomique : fichier temporaire puis renommage
+
+    En cas d'interruption, l'ancien fichier reste intact : il n'est jamais tronqué.
+
+    @param chemin Fichier de destination
+    @param donnees Contenu JSON
+    """
+    descripteur, temporaire = tempfile.mkstemp(dir=os.path.dirname(chemin) or '.', prefix='.' + os.path.basename(chemin))
+    try:
+        with os.fdopen(descripteur, 'w', encoding='utf-8') as f:
+            json.dump(donnees, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporaire, chemin)
+    except BaseException:
+        os.unlink(temporaire)
+        raise
+
+
+def sauvegarder_backlogs(backlog, resultat, partiel, dossier='.', atomique=False):
+    """
+    @brief Enregistre les résultats d'une partie
+
+    - backlog_output.json : {tâche: estimation} pour les tâches estimées
+    - backlog.json : tâches restantes renumérotées, uniquement si la partie a été interrompue
+
+    @param backlog Backlog joué {clé: tâche}
+    @param resultat Estimations {clé: estimation}
+    @param partiel True si la partie s'est arrêtée avant la fin (carte café)
+    @param dossier Dossier de destination
+    @param atomique True pour écrire backlog.json par fichier temporaire et renommage
+    """
+    new_backlog = {backlog[key]: estimation for key, estimation in resultat.items()}
+
+    with open(os.path.join(dossier, 'backlog_output.json'), 'w', encoding='utf-8') as f:
+        json.dump(new_backlog, f, ensure_ascii=False, indent=4)
+
+    if partiel:
+        # Créer un sous-backlog des tâches non estimées
+        sub_backlog = [value for key, value in backlog.items() if key not in resultat]
+        sub_backlog_indice = {i + 1: value for i, value in enumerate(sub_backlog)}
+
+        if atomique:
+            # Le backlog d'origine n'est remplacé qu'une fois le nouveau entièrement écrit
+            ecrire_atomique(os.path.join(dossier, 'backlog.json'), sub_backlog_indice)
+            return
+        with open(os.path.join(dossier, 'backlog.json'), 'w', encoding='utf-8') as f:
+            json.dump(sub_backlog_indice, f, ensure_ascii=False, indent=4)
@@ -0,0 +1,168 @@
+import selectors
+import threading
+
+from tableau import EtatPartie
+
+
+class Spectateur:
+    """
+    @brief Connexion d'un spectateur et données en attente d'envoi.
+    """
+
+    __slots__ = ('conn', 'pseudo', 'en_cours', 'suivant')
+
+    def __init__(self, conn, pseudo):
+        self.conn = conn
+        self.pseudo = pseudo
+        self.en_cours = b''   # Instantané en cours d'envoi (doit être terminé pour garder le découpage en lignes)
+        self.suivant = None   # Dernier instantané en attente : remplacé si le spectateur est en retard
+
+
+class DiffusionSpectateurs:
+    """
+    @brief Diffusion de l'état de la partie aux spectateurs, séparée de celle des joueurs.
+
+    Reçoit les mêmes événements que le tableau de bord. Un thread dédié envoie à
+    chaque spectateur, sans jamais bloquer, l'état courant sous forme d'une ligne
+    JSON. Un spectateur en retard ne reçoit que le dernier état : les versions
+    intermédiaires sont ignorées. Les spectateurs ne votent pas et ne sont pas
+    comptés parmi les joueurs.
+    """
+
+    INTERVALLE = 0.05  # Attente maximale d'un changement d'état ou d'un socket prêt (secondes)
+
+    def __init__(self):
+        self.etat = EtatPartie()
+        self.spectateurs = []
+        self.verrou = threading.Lock()
+        self.actif = False
+        self.thread = None
+        self.envois = 0  # Instantanés envoyés en entier
+
+    def publier(self, type, **donnees):
+        """
+        @brief Événement de la partie (appelé par le moteur, ne bloque jamais)
+        """
+        self.etat.publier(type, **donnees)
+
+    def ajouter(self, conn, pseudo=''):
+        """
+        @brief Inscrit un spectateur ; il reçoit immédiatement l'état courant
+
+        @param conn Connexion du spectateur (socket)
+        @param pseudo Nom du spectateur
+        """
+        conn.setblocking(False)
+        spectateur = Spectateur(conn, pseudo)
+        spectateur.suivant = self.etat.instantane()[2] + b'\n'
+        with self.verrou:
+            self.spectateurs.append(spectateur)
+            if not self.actif:
+                self.actif = True
+                self.thread = threading.Thread(target=self.diffuser, daemon=True)
+                self.thread.start()
+
+    def retirer(self, spectateur):
+        """
+        @brief Retire un spectateur dont la connexion est fermée
+        """
+        with self.verrou:
+            if spectateur in self.spectateurs:
+                self.spectateurs.remove(spectateur)
+        try:
+            spectateur.conn.close()
+        except OSError:
+            pass
+
+    def __len__(self):
+        return len(self.spectateurs)
+
+    def diffuser(self):
+        """
+        @brief Boucle du thread de diffusion
+        """
+        selecteur = selectors.DefaultSelector()
+        etag = None
+        while self.actif:
+            # Nouvel état : il remplace celui qui attendait encore chez les spectateurs en retard
+            version, etag_courant, corps = self.etat.instantane()
+            if etag_courant != etag:
+                etag = etag_courant
+                ligne = corps + b'\n'
+                with self.verrou:
+                    for spectateur in self.spectateurs:
+                        spectateur.suivant = ligne
+
+            with self.verrou:
+                spectateurs = list(self.spectateurs)
+            en_attente = [spectateur for spectateur in spectateurs if self.envoyer(spectateur)]
+
+            if en_attente:
+                # Attend qu'un socket puisse recevoir la suite, ou un nouvel état
+                for spectateur in en_attente:
+                    selecteur.register(spectateur.conn, selectors.EVENT_WRITE)
+                selecteur.select(self.INTERVALLE)
+                for spectateur in en_attente:
+                    selecteur.unregister(spectateur.conn)
+            else:
+                self.etat.attendre(etag, self.INTERVALLE)
+        selecteur.close()
+
+    def envoyer(self, spectateur):
+        """
+        @brief Envoie sans bloquer ce que le socket du spectateur peut accepter
+
+        @param spectateur Spectateur
+        @return True s'il reste des données à envoyer
+        """
+        try:
+            while True:
+                if not spectateur.en_cours:
+                    if spectateur.suivant is None:
+                        return False
+                    spectateur.en_cours, spectateur.suivant = spectateur.suivant, None
+                envoye = spectateur.conn.send(spectateur.en_cours)
+                spectateur.en_cours = spectateur.en_cours[envoye:]
+                if not spectateur.en_cours:
+                    self.envois += 1
+        except BlockingIOError:
+            return True
+        except OSError:
+            self.retirer(spectateur)
+            return False
+
+    def detacher(self):
+        """
+        @brief Arrête la diffusion sans fermer les connexions, reprises par un autre diffuseur
+
+        Un état en cours d'envoi est terminé pour ne pas couper une ligne JSON.
+
+        @return Liste de (connexion, pseudo) des spectateurs
+        """
+        self.actif = False
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        with self.verrou:
+            spectateurs, self.spectateurs = self.spectateurs, []
+        for spectateur in spectateurs:
+            if spectateur.en_cours:
+                try:
+                    spectateur.conn.setblocking(True)
+                    spectateur.conn.sendall(spectateur.en_cours)
+                except OSError:
+                    pass
+        return [(spectateur.conn, spectateur.pseudo) for spectateur in spectateurs]
+
+    def fermer(self):
+        """
+        @brief Arrête la diffusion et ferme les connexions des spectateurs
+        """
+        self.actif = False
+        with self.verrou:
+            spectateurs, self.spectateurs = self.spectateurs, []
+        for spectateur in spectateurs:
+            try:
+                spectateur.conn.close()
+            except OSError:
+                pass
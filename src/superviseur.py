@@ -0,0 +1,408 @@
+import argparse
+import bisect
+import json
+import multiprocessing
+import os
+import re
+import selectors
+import socket
+import threading
+import time
+import zlib
+
+from compression import lire_connexion
+from joueurs import RegistreJoueurs
+from moteur import MoteurPartie
+from protocole import TAG_START, construire_lobby
+from sauvegarde import sauvegarder_backlogs
+
+SALLE_DEFAUT = 'defaut'
+SEPARATEUR_SALLE = '/'  # Le joueur saisit 'salle/pseudo' pour rejoindre une salle précise
+NOM_SALLE = re.compile(r'[A-Za-z0-9_-]{1,64}')  # Le nom de la salle sert de nom de dossier des résultats
+
+
+class AnneauCoherent:
+    """
+    @brief Hachage cohérent des salles vers les workers.
+
+    Chaque worker occupe plusieurs points virtuels sur l'anneau ; une salle est
+    attribuée au premier point qui suit son hash. Ajouter ou retirer un worker ne
+    déplace qu'une petite partie des salles.
+    """
+
+    def __init__(self, nb_workers, points_virtuels=100):
+        """
+        @brief Constructeur de AnneauCoherent.
+
+        @param nb_workers Nombre de workers
+        @param points_virtuels Nombre de points par worker
+        """
+        self.points = sorted((zlib.crc32(f"worker-{w}-{v}".encode()), w)
+                             for w in range(nb_workers) for v in range(points_virtuels))
+        self.hashes = [h for h, w in self.points]
+
+    def worker(self, salle):
+        """
+        @brief Worker responsable d'une salle
+
+        @param salle Identifiant de la salle
+        @return Indice du worker
+        """
+        i = bisect.bisect(self.hashes, zlib.crc32(salle.encode())) % len(self.points)
+        return self.points[i][1]
+
+
+def lire_identite(message):
+    """
+    @brief Sépare la salle et le pseudo envoyés à la connexion
+
+    Un nom de salle vide ou contenant d'autres caractères que lettres, chiffres, '-' et '_'
+    ('..', chemin...) conduit à la salle par défaut.
+
+    @param message Pseudo saisi par le joueur, éventuellement préfixé par 'salle/'
+    @return Tuple (salle, pseudo)
+    """
+    if SEPARATEUR_SALLE in message:
+        salle, pseudo = message.split(SEPARATEUR_SALLE, 1)
+        return salle if NOM_SALLE.fullmatch(salle) else SALLE_DEFAUT, pseudo
+    return SALLE_DEFAUT, message
+
+
+class Salle:
+    """
+    @brief Salle de jeu sans interface, hébergée par un worker.
+
+    La partie démarre automatiquement lorsque le nombre de joueurs attendu est atteint.
+    """
+
+    PAUSE = 1
+
+    def __init__(self, nom, config):
+        """
+        @brief Constructeur de Salle.
+
+        @param nom Identifiant de la salle
+        @param config Dictionnaire : backlog, mode, joueurs, vote, discussion, dossier
+        """
+        self.nom = nom
+        self.config = config
+        self.joueurs = RegistreJoueurs()
+        self.verrou = threading.Lock()
+        self.started = False
+        self.terminee = False
+        self.taches_estimees = 0
+
+    def ajouter(self, conn, pseudo):
+        """
+        @brief Inscrit un joueur et lance la partie si la salle est complète
+
+        @param conn Connexion du joueur
+        @param pseudo Pseudo du joueur
+        """
+        with self.verrou:
+            if self.started:
+                conn.close()  # Partie déjà commencée
+                return
+            self.joueurs.ajouter(conn, pseudo)
+            data = construire_lobby(self.joueurs.pseudos()).encode()
+            for client in self.joueurs.connexions():
+                client.sendall(data)
+            complete = len(self.joueurs) >= self.config['joueurs']
+            if complete:
+                self.started = True
+
+        if complete:
+            threading.Thread(target=self.jouer, daemon=True).start()
+
+    def jouer(self):
+        """
+        @brief Joue la partie de la salle et enregistre ses résultats
+
+        Quelle que soit l'issue de la partie, les joueurs sont déconnectés et la salle
+        est terminée : elle peut être recréée.
+        """
+        try:
+            with open(self.config['backlog'], 'r', encoding='utf-8') as f:
+                backlog = json.load(f)
+
+            # Pauses laissées aux joueurs pour lire la salle d'attente puis le lancement (messages non délimités)
+            time.sleep(self.PAUSE)
+            clients = self.joueurs.connexions()
+            for client in clients:
+                client.sendall(TAG_START.encode())
+            time.sleep(self.PAUSE)
+
+            moteur = MoteurPartie(clients, backlog, self.config['mode'], self.config['vote'], self.config['discussion'],
+                                  afficher=lambda texte, couleur='white': print(f"[{self.nom}] {texte}"), registre=self.joueurs)
+            self.moteur = moteur
+            moteur.executer()
+
+            dossier = os.path.join(self.config['dossier'], self.nom)
+            os.makedirs(dossier, exist_ok=True)
+            sauvegarder_backlogs(backlog, moteur.resultat, moteur.paused, dossier, atomique=True)
+        except Exception as e:
+            print(f"[{self.nom}] Erreur de la partie : {e!r}")
+        finally:
+            for client in self.joueurs.connexions():
+                try:
+                    client.close()
+                except OSError:
+                    pass
+            self.terminee = True
+
+    def statistiques(self):
+        """
+        @brief État de la salle pour le superviseur
+
+        @return Dictionnaire de statistiques
+        """
+        moteur = getattr(self, 'moteur', None)
+        return {
+            'joueurs': len(self.joueurs),
+            'en_cours': self.started and not self.terminee,
+            'taches_estimees': len(moteur.resultat) if moteur else 0,
+        }
+
+
+class Worker:
+    """
+    @brief Processus worker : écoute le port partagé et héberge une partie des salles.
+    """
+
+    INTERVALLE_STATS = 5
+
+    def __init__(self, indice, nb_workers, controle, args, salles_config):
+        """
+        @brief Constructeur de Worker.
+
+        @param indice Indice du worker
+        @param nb_workers Nombre total de workers
+        @param controle Extrémité worker du canal de contrôle (SOCK_SEQPACKET)
+        @param args Paramètres de la ligne de commande
+        @param salles_config Configuration spécifique par salle {salle: config}
+        """
+        self.indice = indice
+        self.anneau = AnneauCoherent(nb_workers)
+        self.controle = controle
+        self.args = args
+        self.salles_config = salles_config
+        self.salles = {}
+        self.verrou = threading.Lock()
+        self.connexions = 0
+
+    def config_salle(self, salle):
+        """
+        @brief Configuration d'une salle, complétée par les valeurs par défaut
+
+        @param salle Identifiant de la salle
+        @return Dictionnaire de configuration
+        """
+        config = {'backlog': self.args.backlog, 'mode': self.args.mode, 'joueurs': self.args.joueurs,
+                  'vote': self.args.vote, 'discussion': self.args.discussion, 'dossier': self.args.dossier}
+        config.update(self.salles_config.get(salle, {}))
+        return config
+
+    def executer(self):
+        """
+        @brief Boucle principale du worker
+        """
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)  # Le noyau répartit les connexions entre workers
+        server.bind((self.args.ip, self.args.port))
+        server.listen(self.args.backlog_ecoute)
+
+        threading.Thread(target=self.lire_controle, daemon=True).start()
+        threading.Thread(target=self.envoyer_statistiques, daemon=True).start()
+
+        while True:
+            conn, addr = server.accept()
+            threading.Thread(target=self.accueillir, args=(conn,), daemon=True).start()
+
+    def accueillir(self, conn):
+        """
+        @brief Lit l'identité d'un joueur et l'oriente vers le worker de sa salle
+
+        @param conn Connexion acceptée par ce worker
+        """
+        try:
+            conn.settimeout(self.args.delai_poignee)
+            salle, pseudo = lire_identite(lire_connexion(conn.recv(1024).decode())[0])  # Salles sans compression
+            conn.settimeout(None)
+        except (OSError, UnicodeDecodeError):
+            conn.close()
+            return
+
+        destination = self.anneau.worker(salle)
+        if destination == self.indice:
+            self.ajouter(salle, conn, pseudo)
+        else:
+            # Transfert du descripteur au worker responsable, via le superviseur
+            message = json.dumps({'type': 'route', 'vers': destination, 'salle': salle, 'pseudo': pseudo}).encode()
+            socket.send_fds(self.controle, [message], [conn.fileno()])
+            conn.close()
+
+    def ajouter(self, salle, conn, pseudo):
+        """
+        @brief Ajoute un joueur à une salle hébergée par ce worker
+
+        @param salle Identifiant de la salle
+        @param conn Connexion du joueur
+        @param pseudo Pseudo du joueur
+        """
+        with self.verrou:
+            self.connexions += 1
+            if salle not in self.salles or self.salles[salle].terminee:
+                self.salles[salle] = Salle(salle, self.config_salle(salle))
+            instance = self.salles[salle]
+        instance.ajouter(conn, pseudo)
+
+    def lire_controle(self):
+        """
+        @brief Reçoit les connexions transférées par le superviseur
+        """
+        while True:
+            message, fds, flags, addr = socket.recv_fds(self.controle, 4096, 1)
+            if not message:
+                break
+            route = json.loads(message)
+            if fds:
+                self.ajouter(route['salle'], socket.socket(fileno=fds[0]), route['pseudo'])
+
+    def envoyer_statistiques(self):
+        """
+        @brief Envoie périodiquement les statistiques du worker au superviseur
+        """
+        while True:
+            time.sleep(self.INTERVALLE_STATS)
+            with self.verrou:
+                salles = {nom: salle.statistiques() for nom, salle in self.salles.items()}
+            message = {'type': 'stats', 'worker': self.indice, 'pid': os.getpid(),
+                       'connexions': self.connexions, 'salles': salles}
+            self.controle.send(json.dumps(message).encode())
+
+
+def lancer_worker(indice, nb_workers, controle, args, salles_config):
+    """
+    @brief Point d'entrée d'un processus worker
+    """
+    Worker(indice, nb_workers, controle, args, salles_config).executer()
+
+
+class Superviseur:
+    """
+    @brief Lance les workers, relaie les transferts de connexions et agrège les statistiques.
+    """
+
+    def __init__(self, args, salles_config):
+        """
+        @brief Constructeur de Superviseur.
+
+        @param args Paramètres de la ligne de commande
+        @param salles_config Configuration spécifique par salle
+        """
+        self.args = args
+        self.salles_config = salles_config
+        self.canaux = []
+        self.processus = []
+        self.stats = {}
+
+    def demarrer(self):
+        """
+        @brief Crée les canaux de contrôle et démarre un processus par worker
+        """
+        contexte = multiprocessing.get_context('fork')
+        for indice in range(self.args.workers):
+            superviseur, worker = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+            processus = contexte.Process(target=lancer_worker, daemon=True,
+                                         args=(indice, self.args.workers, worker, self.args, self.salles_config))
+            processus.start()
+            worker.close()
+            self.canaux.append(superviseur)
+            self.processus.append(processus)
+
+    def executer(self):
+        """
+        @brief Boucle du canal de contrôle
+        """
+        selecteur = selectors.DefaultSelector()
+        for indice, canal in enumerate(self.canaux):
+            selecteur.register(canal, selectors.EVENT_READ, indice)
+
+        dernier_affichage = time.monotonic()
+        while True:
+            for cle, _ in selecteur.select(timeout=1):
+                message, fds, flags, addr = socket.recv_fds(cle.fileobj, 65536, 1)
+                if not message:
+                    selecteur.unregister(cle.fileobj)
+                    continue
+                contenu = json.loads(message)
+                if contenu['type'] == 'route':
+                    socket.send_fds(self.canaux[contenu['vers']], [message], fds)
+                    for fd in fds:
+                        os.close(fd)
+                elif contenu['type'] == 'stats':
+                    self.stats[contenu['worker']] = contenu
+
+            if time.monotonic() - dernier_affichage >= Worker.INTERVALLE_STATS:
+                dernier_affichage = time.monotonic()
+                print(self.resume())
+
+    def arreter(self):
+        """
+        @brief Arrête tous les workers
+        """
+        for processus in self.processus:
+            processus.terminate()
+            processus.join()
+        for canal in self.canaux:
+            canal.close()
+
+    def resume(self):
+        """
+        @brief Statistiques agrégées de tous les workers
+
+        @return Texte récapitulatif
+        """
+        salles = [salle for stats in self.stats.values() for salle in stats['salles'].values()]
+        return (f"{len(self.processus)} workers, {sum(s['connexions'] for s in self.stats.values())} connexions, "
+                f"{len(salles)} salles ({sum(s['en_cours'] for s in salles)} en cours), "
+                f"{sum(s['joueurs'] for s in salles)} joueurs, {sum(s['taches_estimees'] for s in salles)} tâches estimées")
+
+
+def main():
+    """
+    @brief Lance un hôte multi-processus sans interface
+    """
+    parser = argparse.ArgumentParser(description="Hôte Planning Poker multi-processus (Linux, SO_REUSEPORT)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="nombre de processus workers")
+    parser.add_argument('--ip', default='0.0.0.0', help="adresse d'écoute")
+    parser.add_argument('--port', type=int, default=16383)
+    parser.add_argument('--backlog', default='backlog.json', help="backlog par défaut des salles")
+    parser.add_argument('--mode', default='Majorité absolue')
+    parser.add_argument('--joueurs', type=int, default=2, help="nombre de joueurs qui déclenche le début d'une partie")
+    parser.add_argument('--vote', type=int, default=30, help="temps de vote (secondes)")
+    parser.add_argument('--discussion', type=int, default=60, help="temps de discussion (secondes)")
+    parser.add_argument('--salles', default=None, help="fichier JSON de configuration par salle")
+    parser.add_argument('--dossier', default='resultats', help="dossier des résultats, un sous-dossier par salle")
+    parser.add_argument('--backlog-ecoute', type=int, default=1024, help="taille de la file d'attente de listen()")
+    parser.add_argument('--delai-poignee', type=float, default=10.0, help="délai maximal d'envoi du pseudo (secondes)")
+    args = parser.parse_args()
+
+    salles_config = {}
+    if args.salles:
+        with open(args.salles, 'r', encoding='utf-8') as f:
+            salles_config = json.load(f)
+
+    superviseur = Superviseur(args, salles_config)
+    superviseur.demarrer()
+    print(f"Superviseur : {args.workers} workers en écoute sur {args.ip}:{args.port}")
+    try:
+        superviseur.executer()
+    except KeyboardInterrupt:
+        print(superviseur.resume())
+        superviseur.arreter()
+
+
+if __name__ == "__main__":
+    main()
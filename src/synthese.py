@@ -0,0 +1,78 @@
+from collections import Counter
+
+ORDRE_CARTES = ['0', '1', '2', '3', '5', '8', '13', '20', '40', '100', '-1', 'cafe']  # Ordre d'affichage des cartes
+ECART_CARTES = 2   # Un vote à au moins 2 cartes de la médiane est un écart
+MAX_ECARTS = 10    # Joueurs cités au plus dans la liste des écarts
+TAILLE_PAGE = 10   # Lignes du tableau des votes affichées à la fois
+
+
+def synthese_votes(votes, max_ecarts=MAX_ECARTS):
+    """
+    @brief Répartition des votes par carte et joueurs les plus éloignés de la médiane
+
+    Calculée en temps linéaire (hors tri des écarts) : c'est ce qui est affiché en
+    premier, quel que soit le nombre de joueurs.
+
+    @param votes Liste de (pseudo, vote)
+    @param max_ecarts Nombre maximal de joueurs cités dans les écarts
+    @return Tuple (histogramme, ecarts, nb_ecarts) : [(carte, nombre)] dans l'ordre des cartes,
+            [(pseudo, vote)] des joueurs cités (les plus éloignés d'abord) et nombre total d'écarts
+    """
+    rangs = {carte: rang for rang, carte in enumerate(ORDRE_CARTES)}
+    compteur = Counter(vote for pseudo, vote in votes)
+    histogramme = sorted(compteur.items(), key=lambda item: rangs.get(item[0], len(rangs)))
+
+    # Médiane des cartes numériques, en rang dans le jeu
+    numeriques = [(rangs[carte], nombre) for carte, nombre in histogramme if rangs.get(carte, len(rangs)) < rangs['-1']]
+    total = sum(nombre for rang, nombre in numeriques)
+    if not total:
+        return histogramme, [], 0
+    cumul = 0
+    for mediane, nombre in numeriques:
+        cumul += nombre
+        if cumul * 2 >= total:
+            break
+
+    ecarts = [(abs(rangs[vote] - mediane), pseudo, vote) for pseudo, vote in votes
+              if vote in rangs and rangs[vote] < rangs['-1'] and abs(rangs[vote] - mediane) >= ECART_CARTES]
+    ecarts.sort(key=lambda ecart: -ecart[0])
+    return histogramme, [(pseudo, vote) for distance, pseudo, vote in ecarts[:max_ecarts]], len(ecarts)
+
+
+class PagesVotes:
+    """
+    @brief Découpage du tableau des votes en pages de taille fixe.
+
+    Seule la page affichée est insérée dans le tableau : le coût d'affichage ne
+    dépend pas du nombre de joueurs.
+    """
+
+    def __init__(self, votes, taille=TAILLE_PAGE):
+        """
+        @brief Constructeur de PagesVotes.
+
+        @param votes Liste de (pseudo, vote)
+        @param taille Nombre de lignes par page
+        """
+        self.votes = votes
+        self.taille = taille
+        self.numero = 0
+
+    @property
+    def nb_pages(self):
+        """
+        @brief Nombre de pages (au moins une)
+        """
+        return max(1, -(-len(self.votes) // self.taille))
+
+    def page(self, numero=None):
+        """
+        @brief Lignes d'une page
+
+        @param numero Numéro de la page, à partir de 0 (page courante par défaut) ; ramené dans les bornes
+        @return Liste de (pseudo, vote)
+        """
+        if numero is not None:
+            self.numero = min(max(numero, 0), self.nb_pages - 1)
+        debut = self.numero * self.taille
+        return self.votes[debut:debut + self.taille]
@@ -0,0 +1,178 @@
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+PORT_TABLEAU = 16386
+ATTENTE_MAX = 60  # Durée maximale d'un long-poll (secondes)
+
+
+class EtatPartie:
+    """
+    @brief État de la partie exposé aux tableaux de bord.
+
+    Alimenté par les événements du moteur (comme le journal de réplication).
+    Chaque modification incrémente la version ; la réponse JSON n'est construite
+    qu'une fois par version, quel que soit le nombre de spectateurs. L'ETag associe
+    la version à l'identifiant de l'état : la version d'une autre partie ne lui
+    correspond jamais.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.id = uuid.uuid4().hex[:12]
+        self.version = 0
+        self.etat = {'phase': 'attente', 'mode': None, 'joueurs': 0, 'tache': None, 'question': None,
+                     'echeance': None, 'votes': {}, 'feedback': [], 'estimees': 0, 'total': 0, 'tours': 0}
+        self.cache = None  # (version, etag, corps)
+
+    def publier(self, type, **donnees):
+        """
+        @brief Applique un événement de la partie
+
+        @param type Type d'événement
+        @param donnees Contenu de l'événement
+        """
+        with self.condition:
+            etat = self.etat
+            match type:
+                case 'debut':
+                    etat.update(phase='debut', mode=donnees['mode'], joueurs=donnees['joueurs'], total=donnees['total'])
+                case 'ajout':
+                    etat['total'] = donnees['total']
+                case 'tache':
+                    etat.update(tache=donnees['cle'], question=donnees.get('question'), tours=0, votes={}, feedback=[])
+                case 'vote':
+                    etat.update(phase='vote', echeance=donnees['echeance'], votes={})
+                case 'tour':
+                    etat.update(phase='resultat', echeance=None, tours=etat['tours'] + 1,
+                                votes=dict(Counter(vote for pseudo, vote in donnees['votes'])),
+                                feedback=donnees['votes'])
+                case 'discussion':
+                    etat.update(phase='discussion', echeance=donnees['echeance'])
+                case 'decision':
+                    etat['estimees'] += len(donnees['cles'])
+                case 'fin':
+                    etat.update(phase='fin', echeance=None, tache=None, question=None)
+                case _:
+                    return
+            self.version += 1
+            self.condition.notify_all()
+
+    def restaurer(self, instantane):
+        """
+        @brief Remplace l'état par un instantané (état reçu d'un autre processus)
+
+        @param instantane État décodé de la réponse JSON, identifiant et version compris
+        """
+        with self.condition:
+            self.id = instantane.pop('id', self.id)
+            self.version = instantane.pop('version')
+            self.etat = instantane
+            self.condition.notify_all()
+
+    def instantane(self):
+        """
+        @brief Réponse correspondant à la version courante, construite une seule fois par version
+
+        @return Tuple (version, etag, corps JSON)
+        """
+        with self.condition:
+            if self.cache is None or self.cache[1] != self.etag():
+                corps = json.dumps(dict(self.etat, id=self.id, version=self.version)).encode()
+                self.cache = (self.version, self.etag(), corps)
+            return self.cache
+
+    def etag(self):
+        """
+        @brief ETag de la version courante
+
+        @return ETag '"identifiant-version"'
+        """
+        return f'"{self.id}-{self.version}"'
+
+    def attendre(self, etag, delai):
+        """
+        @brief Attend que l'état change par rapport à la version connue du client (long-poll)
+
+        @param etag ETag connu du client
+        @param delai Délai maximal d'attente (secondes)
+        @return L'instantané courant
+        """
+        limite = time.monotonic() + delai
+        with self.condition:
+            while self.etag() == etag:
+                restant = limite - time.monotonic()
+                if restant <= 0:
+                    break
+                self.condition.wait(restant)
+        return self.instantane()
+
+
+class GestionnaireEtat(BaseHTTPRequestHandler):
+    """
+    @brief Requêtes HTTP GET /etat, en lecture seule.
+
+    - If-None-Match : 304 si la version n'a pas changé
+    - ?attendre=N : avec If-None-Match, attend jusqu'à N secondes un changement avant de répondre
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path not in ('/', '/etat'):
+            self.send_error(404)
+            return
+
+        etag = self.headers.get('If-None-Match')
+        try:
+            delai = min(float(parse_qs(url.query).get('attendre', ['0'])[0]), ATTENTE_MAX)
+        except ValueError:
+            delai = 0
+        version, etag_courant, corps = self.server.etat.attendre(etag, delai) if etag and delai > 0 \
+            else self.server.etat.instantane()
+
+        if etag == etag_courant:
+            self.send_response(304)
+            self.send_header('ETag', etag_courant)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corps)))
+        self.send_header('ETag', etag_courant)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')  # Tableaux de bord servis depuis une autre origine
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, format, *args):
+        pass  # Pas de trace par requête
+
+
+class ServeurEtat:
+    """
+    @brief Serveur HTTP de l'état de la partie, dans un thread dédié.
+    """
+
+    def __init__(self, etat, hote='0.0.0.0', port=PORT_TABLEAU):
+        """
+        @brief Constructeur de ServeurEtat : démarre l'écoute.
+
+        @param etat EtatPartie à exposer
+        @param hote Adresse d'écoute
+        @param port Port HTTP
+        """
+        self.serveur = ThreadingHTTPServer((hote, port), GestionnaireEtat)
+        self.serveur.daemon_threads = True
+        self.serveur.etat = etat
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+
+    def fermer(self):
+        """
+        @brief Arrête le serveur
+        """
+        self.serveur.shutdown()
+        self.serveur.server_close()
@@ -1,10 +1,15 @@
 import pytest
+import argparse
+import csv
 import json
 import socket
 import threading
 import time
 import os
+import sqlite3
 import sys
+import urllib.request
+import urllib.error
 from unittest.mock import MagicMock, patch
 
 # Désactiver l'initialisation Tkinter avant l'import
@@ -13,6 +18,36 @@ sys.modules['tkinter'] = MagicMock()
 
 # Import des classes du script original
 from interfacev6 import PlanningPokerApp, HostGame, ClientGame
+from historique import HistoriqueStore
+from rappel import IndexSimilarite
+from doublons import analyser_backlog
+from consensus import calculer_verdict
+from protocole import (TAG_START, TAG_NEW, TAG_PRET, TAG_TACHE, collecter_votes, construire_feedback, construire_lobby,
+                       lire_feedback, lire_prets, purger_connexions)
+from bots import simuler_partie, JoueurBot, accepter_joueurs
+from transport import TransportMemoire, TransportTCP
+from multicast import DiffuseurMulticast, RecepteurMulticast, LecteurTrames
+from superviseur import AnneauCoherent, Salle, Superviseur, lire_identite
+from replication import JournalReplication, HoteSecours
+from joueurs import DiffusionSalon, RegistreJoueurs
+from profilage import Profileur
+from enregistrement import ConnexionRejouee, lire_enregistrement, rejouer, rejouer_bots, TYPE_ENTRANT
+from compression import (MARQUEUR, ROLE_SPECTATEUR, Compression, Decompresseur, construire_connexion, lire_connexion,
+                         lire_references, lire_role, negocier)
+from client_terminal import SessionTerminal, ClientTerminal, lire_touche
+from moteur import MoteurPartie
+from tableau import EtatPartie, ServeurEtat
+from spectateurs import DiffusionSpectateurs
+from export import ExportResultats, exporter_historique
+from sauvegarde import ecrire_atomique
+from admission import Admission, LimiteurDebit
+from prechargement import PrechargementTaches
+from degradation import ProfilReseau, ProxyDegrade
+from ingestion import IngestionBacklog
+from budgets import proposer_budgets, proposer_temps
+from synthese import PagesVotes, synthese_votes
+from processus import ConsoleMoteur, FluxConsole, ProcessusMoteur
+from asynchrone import FenetreAsynchrone, VotantAsynchrone, VotesTaches
 
 
 def test_get_ip_address():
@@ -140,5 +175,1252 @@ def test_server_initialization():
     assert len(host_game.clients) == 0, "La liste des clients doit être initialement vide"
 
 
+def test_historique_store(tmp_path):
+    """
+    Tester l'enregistrement et les requêtes de l'historique
+    """
+    historique = HistoriqueStore(str(tmp_path / "historique.db"))
+    session_id = historique.ouvrir_session('Majorité absolue', 2)
+
+    historique.enregistrer_tour(session_id, 0, 0, [["Alice", "3"], ["Bob", "8"]], False)
+    historique.enregistrer_tour(session_id, 0, 1, [["Alice", "5"], ["Bob", "5"]], True)
+    historique.enregistrer_tache(session_id, 0, "Créer une interface", 5, 2)
+    historique.enregistrer_tour(session_id, 1, 0, [["Alice", "cafe"], ["Bob", "2"]], False)
+    historique.flush()
+
+    biais = historique.biais_par_joueur()
+    assert biais["Alice"] == (-1.0, 2), "Le biais d'Alice doit être calculé sur ses votes numériques"
+    assert biais["Bob"] == (1.5, 2), "Le biais de Bob doit être calculé sur ses votes numériques"
+    assert historique.tours_avant_consensus() == {2: 1}
+    assert historique.distribution_estimations("Créer une interface") == {5.0: 1}
+
+    historique.fermer()
+
+
+def test_rappel_similarite():
+    """
+    Tester la recherche de tâches similaires déjà estimées
+    """
+    index = IndexSimilarite()
+    index.ajouter("Ajouter un bouton", 2)
+    index.ajouter("Créer la base de données", 8)
+    index.ajouter("Déployer sur serveur de production", 5)
+
+    texte, estimation, score = index.rechercher("ajouter un Bouton !")[0]
+    assert (texte, estimation, score) == ("Ajouter un bouton", 2, 1.0), "Un intitulé identique après normalisation doit être retrouvé"
+
+    resultats = index.rechercher("Ajouter un bouton de validation")
+    assert resultats and resultats[0][0] == "Ajouter un bouton", "La tâche la plus proche doit être proposée"
+    assert index.rechercher("Rédiger la documentation") == [], "Aucune tâche ne doit être proposée sans mot commun"
+
+    # Mise à jour incrémentale de l'estimation
+    index.ajouter("Ajouter un bouton", 3)
+    assert index.rechercher("Ajouter un bouton")[0][1] == 3
+
+    # Les normes suivent l'IDF courant : une tâche différente ne devient pas identique quand l'index grandit
+    index = IndexSimilarite()
+    index.ajouter("Ajouter un bouton de connexion", 3)
+    for i in range(40):
+        index.ajouter(f"Corriger le module numero{i}", 5)
+    texte, estimation, score = index.rechercher("Ajouter un champ de recherche")[0]
+    assert texte == "Ajouter un bouton de connexion" and score < 0.9
+
+    # Normes calculées une fois : une petite croissance de l'index garde l'IDF figé, sans score au-delà de 1
+    taille_idf = index.taille_idf
+    index.ajouter("Ajouter un champ de connexion", 2)
+    assert index.rechercher("Ajouter un champ de connexion")[0][2] == 1.0
+    assert index.taille_idf == taille_idf and len(index.normes) == len(index)
+    assert all(score <= 1.0 + 1e-9 for _, _, score in index.rechercher("Ajouter un bouton de champ connexion", k=10))
+
+    def jouer(estimation, vote):
+        # Une tâche quasi identique à « Ajouter un bouton de connexion », estimée à estimation
+        index.ajouter("Ajouter un bouton de connexion", estimation)
+        transport = TransportMemoire()
+        ecoute = transport.ecouter('127.0.0.1', 20018)
+        bots = [JoueurBot(pseudo, transport, port=20018, strategie=lambda question, tour: vote) for pseudo in ("Alice", "Bob")]
+        threads = [bot.demarrer() for bot in bots]
+        clients, pseudos = accepter_joueurs(ecoute, len(bots))
+        ecoute.close()
+        for client in clients:
+            client.sendall(TAG_START.encode())
+        moteur = MoteurPartie(clients, {"1": "ajouter un bouton de connexion"}, 'Moyenne', 30, 60,
+                              index_rappel=index, rappel_auto=True, pause=0, delai_votes=5,
+                              afficher=lambda texte, couleur='white': None, attendre=lambda secondes: None)
+        resultat = moteur.executer()
+        for thread in threads:
+            thread.join(timeout=5)
+        return resultat, bots[0].questions
+
+    # Reprise d'une estimation : jamais sans vote, les joueurs la confirment par un tour oui/non
+    confirmation = ("ajouter un bouton de connexion\n(Quasi identique à « Ajouter un bouton de connexion » : "
+                    "votez 3 pour confirmer l'estimation, une autre carte pour la réestimer)")
+    rappel = "ajouter un bouton de connexion\n(Similaire : « Ajouter un bouton de connexion » estimée à {})"
+    assert jouer(3, "3") == ({"1": 3}, [confirmation])
+    # Refusée : la tâche est réestimée, premier tour à l'unanimité
+    assert jouer(3, "5") == ({"1": 5}, [confirmation, rappel.format(3)])
+    # Une estimation qui n'est pas une carte n'est que rappelée
+    assert jouer(6.5, "8") == ({"1": 8}, [rappel.format(6.5)])
+
+
+def test_doublons_backlog():
+    """
+    Tester le regroupement des doublons du backlog
+    """
+    backlog = {
+        "1": "Créer la base de données des utilisateurs",
+        "2": "Ajouter un bouton",
+        "3": "creer la base de donnees des utilisateurs.",
+        "4": "Créer la base de données des utilisateurs (v2)",
+        "5": "Ajouter un bouton rouge",
+    }
+    analyse = analyser_backlog(backlog)
+
+    assert analyse.representant["3"] == "1", "Un doublon exact doit rejoindre le groupe de la première occurrence"
+    assert analyse.representant["4"] == "1", "Un quasi-doublon doit rejoindre le groupe le plus proche"
+    assert analyse.representant["5"] == "5", "Les intitulés courts ne sont regroupés que s'ils sont identiques"
+    assert analyse.clusters["1"] == ["1", "3", "4"]
+    assert analyse.tours_economises() == 2
+
+    # Copie exacte d'un quasi-doublon : rattachée au représentant du groupe
+    analyse = analyser_backlog({"1": backlog["1"], "2": backlog["4"], "3": backlog["4"]})
+    assert analyse.clusters == {"1": ["1", "2", "3"]}
+
+
+def test_calculer_verdict():
+    """
+    Tester les règles de décision de chaque mode de jeu
+    """
+    votes = ["5", "8", "5"]
+
+    assert calculer_verdict('Moyenne', votes, premier_tour=True)[0] is None, "Le premier tour est jugé à la majorité absolue"
+    assert calculer_verdict('Majorité absolue', ["3", "3"])[0] == 3
+    assert calculer_verdict('Majorité absolue', votes)[0] is None
+    assert calculer_verdict('Majorité relative', votes)[0] == 5
+    assert calculer_verdict('Majorité relative', ["1", "2", "3"]) == (None, "Pas de majorité relative..")
+    assert calculer_verdict('Moyenne', ["-1", "6"])[0] == 3, "La carte '?' compte pour 0 dans la moyenne"
+    assert calculer_verdict('Médiane', ["1", "8", "3", "5"])[0] == 4
+
+
+def test_protocole_feedback():
+    """
+    Tester l'encodage et le décodage du retour d'un tour
+    """
+    message = construire_feedback(True, [["Alice", "5"], ["Bob", "8"]])
+    assert message == "1Alice:5;Bob:8"
+    assert lire_feedback(message) == (True, [("Alice", "5"), ("Bob", "8")])
+
+
+def test_transport_memoire():
+    """
+    Tester l'échange de messages par le transport en mémoire
+    """
+    transport = TransportMemoire()
+    ecoute = transport.ecouter('127.0.0.1', 20001)
+    client = transport.connecter('127.0.0.1', 20001)
+    serveur, addr = ecoute.accept()
+
+    client.sendall("Alice".encode())
+    client.sendall("Alice;5".encode())
+    assert serveur.recv(1024) == b"Alice", "Les frontières des messages doivent être préservées"
+    assert serveur.recv(3) == b"Ali" and serveur.recv(1024) == b"ce;5"
+
+    client.close()
+    assert serveur.recv(1024) == b"", "Une connexion fermée doit renvoyer b''"
+    ecoute.close()
+
+
+def test_partie_simulee():
+    """
+    Tester une partie complète en mémoire avec des joueurs automatiques
+    """
+    backlog = {"1": "Créer une interface", "2": "Ajouter un bouton", "3": "ajouter un bouton"}
+    strategies = {
+        "Alice": lambda question, tour: "5",
+        "Bob": lambda question, tour: "8" if tour == 0 else "5",
+    }
+    moteur, bots = simuler_partie(backlog, strategies, port=20002)
+
+    assert moteur.resultat == {"1": 5, "2": 5, "3": 5}, "Le doublon doit reprendre l'estimation de son groupe"
+    assert not moteur.paused
+    assert bots[0].questions == ["Créer une interface"] * 2 + ["Ajouter un bouton"] * 2
+    assert all(bot.fin.is_set() for bot in bots), "Les joueurs doivent recevoir la fin de partie"
+
+    # Carte café : la partie s'arrête prématurément
+    moteur, bots = simuler_partie(backlog, {"Alice": lambda question, tour: "cafe"}, port=20002)
+    assert moteur.paused and moteur.resultat == {}
+
+
+def test_multicast_reparation():
+    """
+    Tester la détection des trames perdues et leur réparation par TCP
+    """
+    diffuseur = DiffuseurMulticast(port=20003)
+    for message in ["Question", "@@FEEDBACK@@", "1Alice:5"]:
+        diffuseur.envoyer(message)
+
+    demandes = []
+    recepteur = RecepteurMulticast(diffuseur.groupe, diffuseur.port, demandes.append)
+    recepteur.injecter(0, "Question")
+    recepteur.injecter(2, "1Alice:5")  # La trame 1 a été perdue
+    assert demandes == [1], "Un trou dans la séquence doit déclencher une demande de réparation"
+    assert recepteur.lire(timeout=1) == "Question"
+
+    # L'hôte traite la demande pendant la collecte des votes, sans la compter comme un vote
+    client = MagicMock()
+    client.recv.side_effect = [b"@@REPAIR@@1\nAlice;5"]
+    full_list, votes = collecter_votes([client], diffuseur.reparer)
+    assert votes == ["5"]
+
+    # Sonde envoyée après le vote, dans le même paquet : elle ne fait pas partie du vote
+    sonde = MagicMock()
+    sonde.recv.side_effect = [b"@@REPAIR@@1\nAlice;5@@REPAIR@@1\n"]
+    full_list, votes = collecter_votes([sonde], diffuseur.reparer)
+    assert votes == ["5"] and sonde.sendall.call_count == 2
+    assert calculer_verdict('Moyenne', votes) == (5.0, "Moyenne : 5.0")
+
+    lecteur = LecteurTrames()
+    for seq, message in lecteur.ajouter(client.sendall.call_args[0][0]):
+        recepteur.injecter(seq, message)
+    assert [recepteur.lire(timeout=1), recepteur.lire(timeout=1)] == ["@@FEEDBACK@@", "1Alice:5"]
+    diffuseur.fermer()
+
+
+def test_multicast_fragmentation():
+    """
+    Tester la diffusion d'un retour de 1000 joueurs, plus grand qu'un datagramme UDP
+    """
+    feedback = construire_feedback(False, [[f"equipe/Joueur-{i}-{'é' * 30}", "5"] for i in range(1000)])
+    assert len(feedback.encode()) > 65507
+
+    diffuseur = DiffuseurMulticast(port=20023)
+    demandes = []
+    recepteur = RecepteurMulticast(diffuseur.groupe, diffuseur.port, demandes.append)
+    recepteur.demarrer()
+    try:
+        diffuseur.envoyer("Question")
+        derniere = diffuseur.envoyer(feedback)
+        assert derniere > 1, "Le retour doit être découpé en plusieurs datagrammes"
+        assert recepteur.lire(timeout=5) == "Question"
+        assert recepteur.lire(timeout=5) == feedback, "Le retour doit être réassemblé sans passer par TCP"
+        assert demandes == []
+    finally:
+        recepteur.fermer()
+
+    # Réparation par TCP de tous les fragments, dans le désordre et avec des doublons
+    repare = RecepteurMulticast(diffuseur.groupe, diffuseur.port, demandes.append)
+    client = MagicMock()
+    diffuseur.reparer(client, 0)
+    trames = LecteurTrames().ajouter(client.sendall.call_args[0][0])
+    assert len(trames) == derniere + 1
+    for seq, message in trames[1:] + trames[:3]:
+        repare.injecter(seq, message)
+    assert [repare.lire(timeout=1), repare.lire(timeout=1)] == ["Question", feedback]
+    diffuseur.fermer()
+
+
+def test_superviseur_salles(tmp_path):
+    """
+    Tester la répartition des salles entre workers et une partie jouée par le superviseur
+    """
+    anneau = AnneauCoherent(4)
+    salles = [f"salle-{i}" for i in range(1000)]
+    repartition = [anneau.worker(salle) for salle in salles]
+    assert set(repartition) == {0, 1, 2, 3}
+    assert repartition == [anneau.worker(salle) for salle in salles], "Une salle reste toujours sur le même worker"
+    assert lire_identite("equipe/Alice") == ("equipe", "Alice")
+    assert lire_identite("Alice") == ("defaut", "Alice")
+    assert lire_identite("../Alice") == ("defaut", "Alice") and lire_identite("a\\b/Alice") == ("defaut", "Alice")
+
+    backlog_path = tmp_path / "backlog.json"
+    backlog_path.write_text(json.dumps({"1": "Créer une interface"}), encoding="utf-8")
+    args = argparse.Namespace(workers=2, ip='127.0.0.1', port=20004, backlog=str(backlog_path), mode='Majorité absolue',
+                              joueurs=2, vote=30, discussion=60, dossier=str(tmp_path / "resultats"),
+                              backlog_ecoute=128, delai_poignee=5.0)
+    superviseur = Superviseur(args, {})
+    superviseur.demarrer()
+    threading.Thread(target=superviseur.executer, daemon=True).start()
+    try:
+        time.sleep(0.5)
+        bots = [JoueurBot(f"equipe/{pseudo}", TransportTCP(), port=20004) for pseudo in ("Alice", "Bob")]
+        for bot in bots:
+            bot.demarrer()
+        assert all(bot.fin.wait(timeout=15) for bot in bots), "La partie de la salle doit aller jusqu'au bout"
+        assert bots[0].questions == ["Créer une interface"]
+    finally:
+        superviseur.arreter()
+
+    # Backlog illisible : la salle se termine quand même, joueurs déconnectés
+    salle = Salle("equipe", dict(vars(args), backlog=str(tmp_path / "absent.json")))
+    joueur, distant = socket.socketpair()
+    salle.joueurs.ajouter(joueur, "Alice")
+    salle.started = True
+    salle.jouer()
+    assert salle.terminee and not salle.statistiques()['en_cours'] and distant.recv(1024) == b""
+    distant.close()
+
+
+def test_replication_bascule():
+    """
+    Tester la réplication de la partie vers l'hôte de secours et la reprise des tâches restantes
+    """
+    transport = TransportMemoire()
+    backlog = {"1": "Créer une interface", "2": "Ajouter un bouton"}
+    journal = JournalReplication('127.0.0.1', port=20005, transport=transport)
+    secours = HoteSecours('127.0.0.1', '127.0.0.1', port=20006, port_replication=20005, transport=transport)
+    resultat = []
+    thread = threading.Thread(target=lambda: resultat.append(secours.suivre()), daemon=True)
+    thread.start()
+
+    while not journal.secours:
+        time.sleep(0.01)
+    assert journal.secours == "127.0.0.1:20006"
+    journal.publier('joueurs', pseudos=["Alice", "Bob"])
+    journal.publier('partie', backlog=backlog, mode='Majorité absolue', temps_vote=30, temps_discussion=60)
+    journal.publier('tache', cle="1")
+    journal.publier('decision', cles=["1"], estimation=8)
+    journal.publier('tache', cle="2")
+    journal.fermer()  # L'hôte principal tombe pendant la deuxième tâche
+
+    thread.join(timeout=5)
+    assert resultat == [False], "La perte de l'hôte principal doit déclencher la bascule"
+    assert secours.etat['resultat'] == {"1": 8} and secours.etat['tache'] == "2"
+
+    # Les joueurs se reconnectent à l'hôte de secours, qui rejoue la tâche interrompue
+    bots = [JoueurBot(pseudo, transport, port=20006) for pseudo in ("Alice", "Bob")]
+    threading.Timer(0.2, lambda: [bot.connecter() or threading.Thread(target=bot.jouer, daemon=True).start()
+                                  for bot in bots]).start()
+    moteur = secours.reprendre(attente=5, afficher=lambda texte, couleur='white': None, attendre=lambda secondes: None, pause=0)
+    assert moteur.resultat == {"1": 8, "2": 5}
+
+
+def test_bascule_client():
+    """
+    Tester la reconnexion d'un client à l'hôte de secours lorsque le départ et les paramètres arrivent ensemble
+    """
+    transport = TransportMemoire()
+    ecoute = transport.ecouter('127.0.0.1', 20021)
+    client = ClientGame.__new__(ClientGame)
+    client.secours, client.transport, client.pseudo = "127.0.0.1:20021", transport, "Alice"
+    client.conn, client.verrou_envoi, client.reste = MagicMock(), threading.Lock(), b''
+
+    def hote_secours():
+        conn, addr = ecoute.accept()
+        conn.recv(1024)
+        conn.sendall(f"{TAG_START}30:60{TAG_NEW}".encode())
+
+    thread = threading.Thread(target=hote_secours, daemon=True)
+    thread.start()
+    client.basculer()
+    thread.join(timeout=5)
+    ecoute.close()
+    assert client.secours is None and client.reste == TAG_NEW.encode(), "Le message suivant les paramètres est conservé"
+
+    # En multicast, la perte de la connexion TCP de l'hôte principal déclenche aussi le basculement
+    ecoute = transport.ecouter('127.0.0.1', 20021)
+    principal, client.conn = socket.socketpair()
+    client.secours, client.reste = "127.0.0.1:20021", b''
+    client.decompresseur = Decompresseur()
+    client.recepteur = RecepteurMulticast("239.0.0.1", 20022, client.demander_reparation)
+    thread = threading.Thread(target=hote_secours, daemon=True)
+    thread.start()
+    threading.Thread(target=client.lire_reparations, daemon=True).start()
+    principal.close()
+    assert client.recevoir() == TAG_NEW and client.recepteur is None and client.secours is None
+    thread.join(timeout=5)
+    ecoute.close()
+
+
+def test_registre_joueurs():
+    """
+    Tester le registre des joueurs : identifiants stables, pseudos en double et attribution des votes
+    """
+    registre = RegistreJoueurs()
+    connexions = [MagicMock(), MagicMock(), MagicMock()]
+    alice = registre.ajouter(connexions[0], "Alice")
+    double = registre.ajouter(connexions[1], "Alice")
+    bob = registre.ajouter(connexions[2], "Bob")
+    assert double.pseudo == "Alice (2)", "Deux joueurs ne peuvent pas porter le même pseudo"
+    assert registre.par_connexion(connexions[1]) is double and registre.joueur(bob.id) is bob
+    assert registre.par_pseudo("Alice") is alice
+
+    instantane = registre.connexions()
+    registre.retirer(connexions[0])
+    assert instantane == connexions, "Un instantané n'est pas modifié par les inscriptions suivantes"
+    assert registre.pseudos() == ["Alice (2)", "Bob"] and registre.joueur(alice.id) is None
+    assert registre.ajouter(MagicMock(), "Carol").id == 4, "Les identifiants ne sont jamais réutilisés"
+
+    # Le vote est attribué au joueur inscrit sur la connexion, pas au pseudo envoyé
+    connexions[1].recv.return_value = b"Alice;8"
+    full_list, votes = collecter_votes([connexions[1]], registre=registre)
+    assert full_list == [["Alice (2)", "8"]] and double.a_vote and double.nb_votes == 1
+
+    # Afflux de joueurs : la liste du salon est diffusée par un seul thread, en quelques envois regroupés
+    registre = RegistreJoueurs()
+    salon = DiffusionSalon(registre)
+    salon.demarrer()
+    paires = [socket.socketpair() for _ in range(100)]
+
+    def arriver(numero):
+        registre.ajouter(paires[numero][0], f"Joueur{numero}")
+        salon.signaler()
+
+    arrivees = [threading.Thread(target=arriver, args=(numero,)) for numero in range(100)]
+    for thread in arrivees:
+        thread.start()
+    for thread in arrivees:
+        thread.join()
+    salon.arreter()
+    assert 1 <= salon.diffusions <= 5, "Les arrivées proches sont regroupées"
+    dernier = construire_lobby(registre.pseudos()).encode()
+    for hote, joueur in paires:
+        joueur.setblocking(False)
+        assert joueur.recv(1 << 20).endswith(dernier), "Chaque joueur reçoit la liste complète"
+        hote.close()
+        joueur.close()
+
+
+def test_profilage(tmp_path):
+    """
+    Tester le profilage des phases et le format folded du profil
+    """
+    inactif = Profileur()
+    assert inactif.span('tache') is inactif.span('consensus'), "Désactivé, le profilage ne crée aucun objet"
+
+    profileur = Profileur('complet')
+    for cle in ("1", "2"):
+        with profileur.span('tache'):
+            profileur.debut_tache(cle)
+            with profileur.span('collecte_votes'):
+                time.sleep(0.01)
+            with profileur.span('consensus'):
+                pass
+            profileur.fin_tache()
+
+    resume = profileur.ecrire(str(tmp_path))
+    assert resume.splitlines()[1].startswith('tache'), "La phase la plus coûteuse est en tête du résumé"
+    piles = dict(ligne.rsplit(' ', 1) for ligne in (tmp_path / 'profil.folded').read_text().splitlines())
+    assert set(piles) == {'tache', 'tache;collecte_votes', 'tache;consensus'}
+    assert int(piles['tache;collecte_votes']) >= 20000, "Temps propre en microsecondes"
+    assert (tmp_path / 'tache_2.prof').exists()
+    profileur.activer('')
+
+
+def test_enregistrement_rejeu(tmp_path):
+    """
+    Tester l'enregistrement d'une partie et son rejeu accéléré, dans le moteur et avec des bots
+    """
+    chemin = str(tmp_path / "session.ppr")
+    backlog = {"1": "Créer une interface", "2": "Ajouter un bouton"}
+    strategies = {
+        "Alice": lambda question, tour: "5",
+        "Bob": lambda question, tour: "8" if tour == 0 and "interface" in question else "5",
+    }
+    moteur, bots = simuler_partie(backlog, strategies, port=20007, enregistrement=chemin)
+
+    meta, messages, fin = lire_enregistrement(chemin)
+    assert meta['pseudos'] == ["Alice", "Bob"] and fin['resultat'] == moteur.resultat
+    assert sum(type == TYPE_ENTRANT for type, joueur, instant, data in messages) == 6, "3 tours de 2 votes"
+    assert [instant for type, joueur, instant, data in messages] == sorted(instant for type, joueur, instant, data in messages)
+
+    rejeu, divergences = rejouer(chemin)
+    assert divergences == [] and rejeu.resultat == moteur.resultat
+    rejeu, divergences = rejouer_bots(chemin, port=20008)
+    assert divergences == []
+
+    # Rappels de tâches similaires et tâches décidées pendant la fenêtre asynchrone : rejoués comme enregistrés
+    index = IndexSimilarite()
+    index.ajouter("Créer une interface web", 8)
+    bilan = VotesTaches(["1", "2"])
+    for pseudo in ("Alice", "Bob", "Carol"):
+        bilan.voter(pseudo, "2", "3")
+    bilan = bilan.bilan('Majorité absolue')
+    chemin_rappel = str(tmp_path / "rappel.ppr")
+    moteur, bots = simuler_partie(backlog, strategies, port=20019, enregistrement=chemin_rappel, index_rappel=index,
+                                  asynchrone=bilan)
+    assert "(Similaire" in bots[0].questions[0] and moteur.resultat == {"1": 5, "2": 3}
+    rejeu, divergences = rejouer(chemin_rappel)
+    assert divergences == [] and rejeu.resultat == moteur.resultat
+    rejeu, divergences = rejouer_bots(chemin_rappel, port=20020)
+    assert divergences == []
+
+    # Tâches ajoutées au backlog pendant la partie : rejouées sans relire la source, qui a changé depuis
+    source = tmp_path / "backlog.json"
+    source.write_text(json.dumps(backlog), encoding='utf-8')
+    ingestion = IngestionBacklog(str(source), backlog)
+    source.write_text(json.dumps(dict(backlog, **{"3": "Exporter les résultats"})), encoding='utf-8')
+    os.utime(source, ns=(0, 0))  # Date de modification forcément différente
+    ingestion.verifier()
+    chemin_ingestion = str(tmp_path / "ingestion.ppr")
+    moteur, bots = simuler_partie(backlog, strategies, port=20024, enregistrement=chemin_ingestion, ingestion=ingestion,
+                                  delai_votes=20)
+    assert moteur.resultat == {"1": 5, "2": 5, "3": 5}
+    meta, messages, fin = lire_enregistrement(chemin_ingestion)
+    assert meta['ingestion'] == str(source) and meta['delai_votes'] == 20
+    source.unlink()
+    rejeu, divergences = rejouer(chemin_ingestion)
+    assert divergences == [] and rejeu.resultat == moteur.resultat and rejeu.delai_votes == 20
+    rejeu, divergences = rejouer_bots(chemin_ingestion, port=20025)
+    assert divergences == [] and rejeu.resultat == moteur.resultat
+
+    # Partie arrêtée sur une erreur : le journal est tout de même terminé
+    chemin_erreur = str(tmp_path / "erreur.ppr")
+    with patch('bots.MoteurPartie.executer', side_effect=RuntimeError("panne")):
+        with pytest.raises(RuntimeError):
+            simuler_partie(backlog, strategies, port=20026, enregistrement=chemin_erreur)
+    meta, messages, fin = lire_enregistrement(chemin_erreur)
+    assert fin == {'resultat': {}, 'paused': False}
+
+    # Un vote modifié dans l'enregistrement fait diverger le rejeu
+    with open(chemin, 'rb') as f:
+        contenu = f.read()
+    with open(chemin, 'wb') as f:
+        f.write(contenu.replace(b"Bob;8", b"Bob;5"))
+    rejeu, divergences = rejouer(chemin)
+    assert divergences and divergences[0].startswith("Joueur Alice, message")
+
+
+def test_compression_trames():
+    """
+    Tester la négociation de la compression et le décodage des trames par le joueur
+    """
+    pseudo, codecs = lire_connexion(construire_connexion("Alice", ['zlib']))
+    assert (pseudo, negocier(codecs)) == ("Alice", 'zlib')
+    assert lire_connexion("Bob") == ("Bob", []) and negocier([]) is None, "Un ancien client reçoit des messages bruts"
+
+    histoire = ("En tant qu'utilisateur connecté, je veux exporter mes estimations au format CSV "
+                "afin de les importer dans l'outil de suivi de l'équipe. ") * 8
+    backlog = {"1": histoire, "2": "Ajouter un bouton"}
+    compression = Compression(backlog)
+    alice, bob = MagicMock(), MagicMock()
+    compression.inscrire(alice, 'zlib')
+
+    assert compression.encoder(bob, histoire) == histoire.encode()
+    assert compression.encoder(alice, "@@NEW@@") == b"@@NEW@@", "Les messages courts ne sont pas compressés"
+    trame = compression.encoder(alice, histoire)
+    assert len(trame) < len(histoire.encode()) / 10, "Le dictionnaire amorcé par le backlog réduit fortement la trame"
+
+    compression.envoyer_dictionnaires([alice, bob])
+    assert not bob.sendall.called
+    dictionnaire = alice.sendall.call_args[0][0]
+
+    # Trame de dictionnaire, trame compressée et message brut reçus en un seul bloc
+    decompresseur = Decompresseur()
+    flux = dictionnaire + trame + b"@@NEW@@"
+    message, reste = decompresseur.lire(flux[:10], lambda taille: flux[10:])
+    assert message is None
+    message, reste = decompresseur.lire(reste, lambda taille: b"")
+    assert message == histoire and reste == b"@@NEW@@"
+
+    # Tag texte suivi d'une trame compressée dans la même lecture
+    message, reste = decompresseur.decouper(b"@@FEEDBACK@@" + trame, lambda taille: b"")
+    assert message == "@@FEEDBACK@@" and reste == trame
+    assert decompresseur.decouper(reste, lambda taille: b"") == (histoire, b"")
+
+    # Connexion fermée au milieu de l'entête ou de la charge : erreur au lieu d'une attente sans fin
+    for coupure in (len(MARQUEUR) + 2, len(trame) - 1):
+        with pytest.raises(ConnectionError):
+            decompresseur.lire(trame[:coupure], lambda taille: b"")
+
+
+def test_client_terminal():
+    """
+    Tester le client terminal face au moteur de l'hôte, avec compression négociée
+    """
+    assert lire_touche(ord('a')) == '13' and lire_touche(ord('k')) == 'cafe' and lire_touche(ord('x')) is None
+
+    transport = TransportMemoire()
+    ecoute = transport.ecouter('127.0.0.1', 20010)
+    session = SessionTerminal('127.0.0.1', 'Alice', 20010, transport)
+    session.demarrer()
+    conn, addr = ecoute.accept()
+    pseudo, codecs = lire_connexion(conn.recv(1024).decode())
+    conn.sendall(construire_lobby([pseudo]).encode())
+    conn.sendall(TAG_START.encode())
+
+    # Le joueur choisit la carte 5 par son raccourci à chaque question
+    terminal = ClientTerminal(session)
+    questions = []
+
+    def jouer():
+        while terminal.phase not in ('fin', 'erreur'):
+            terminal.traiter_evenements()
+            if terminal.phase == 'vote':
+                questions.append(terminal.question)
+                terminal.choisir(ord('5'))
+            time.sleep(0.01)
+
+    joueur = threading.Thread(target=jouer, daemon=True)
+    joueur.start()
+
+    histoire = "En tant que responsable d'équipe, je veux suivre l'avancement du sprint. " * 10
+    backlog = {"1": histoire, "2": "Ajouter un bouton"}
+    compression = Compression(backlog)
+    compression.inscrire(conn, negocier(codecs))
+    moteur = MoteurPartie([conn], backlog, 'Majorité absolue', 30, 60, afficher=lambda texte, couleur='white': None,
+                          attendre=lambda secondes: None, pause=0, compression=compression)
+    moteur.executer()
+
+    joueur.join(timeout=5)
+    assert terminal.phase == 'fin' and terminal.pseudos == ["Alice"]
+    assert questions == [histoire, "Ajouter un bouton"], "Les questions compressées sont décodées"
+    assert moteur.resultat == {"1": 5, "2": 5}
+
+    # Tâche désignée par une position jamais préchargée : erreur affichée au joueur
+    session = SessionTerminal('127.0.0.1', 'Bob', 20010, transport)
+    session.conn, hote = transport.creer_paire()
+    for message in (TAG_START, "30:60", f"{TAG_TACHE}7"):
+        hote.sendall(message.encode())
+    session.ecouter()
+    evenements = list(session.evenements.queue)
+    assert evenements[-1] == ('erreur', "Intitulé de la tâche 7 non reçu de l'hôte")
+
+    # Un spectateur suit les parties successives jusqu'à la fermeture de la connexion
+    session = SessionTerminal('127.0.0.1', 'Chef', 20010, transport, spectateur=True)
+    session.conn, hote = transport.creer_paire()
+    hote.sendall(b'{"phase": "tache"}\n{"phase": "fin"}\n{"pha')
+    hote.sendall(b'se": "debut"}\n')
+    hote.close()
+    session.observer()
+    assert list(session.evenements.queue) == [('etat', {'phase': 'tache'}), ('etat', {'phase': 'fin'}),
+                                              ('etat', {'phase': 'debut'}), ('fin',)]
+
+
+def test_tableau_etat():
+    """
+    Tester l'état HTTP de la partie : ETag, 304 et long-poll
+    """
+    etat = EtatPartie()
+    serveur = ServeurEtat(etat, '127.0.0.1', 20011)
+    url = "http://127.0.0.1:20011/etat"
+    try:
+        etat.publier('debut', mode='Majorité absolue', joueurs=2, total=3)
+        etat.publier('tache', cle="1", question="Créer une interface")
+        reponse = urllib.request.urlopen(url, timeout=5)
+        etag = reponse.headers['ETag']
+        contenu = json.loads(reponse.read())
+        assert contenu['question'] == "Créer une interface" and contenu['total'] == 3 and contenu['version'] == 2
+        assert etat.instantane() is etat.instantane(), "La réponse n'est construite qu'une fois par version"
+
+        # Version inchangée : 304 sans corps
+        with pytest.raises(urllib.error.HTTPError) as erreur:
+            urllib.request.urlopen(urllib.request.Request(url, headers={'If-None-Match': etag}), timeout=5)
+        assert erreur.value.code == 304
+
+        # Long-poll : la réponse arrive dès que l'état change
+        threading.Timer(0.2, lambda: etat.publier('tour', votes=[["Alice", "5"], ["Bob", "5"]])).start()
+        debut = time.monotonic()
+        reponse = urllib.request.urlopen(urllib.request.Request(url + "?attendre=10", headers={'If-None-Match': etag}), timeout=15)
+        assert time.monotonic() - debut < 5
+        contenu = json.loads(reponse.read())
+        assert contenu['phase'] == 'resultat' and contenu['votes'] == {"5": 2}
+        etag = reponse.headers['ETag']
+    finally:
+        serveur.fermer()
+
+    # Partie suivante : même numéro de version, mais l'ETag de la partie précédente ne correspond plus
+    suivante = EtatPartie()
+    for _ in range(3):
+        suivante.publier('decision', cles=["1"])
+    assert suivante.version == etat.version and suivante.instantane()[1] != etag
+    debut = time.monotonic()
+    assert suivante.attendre(etag, 5)[1] == suivante.etag() and time.monotonic() - debut < 1
+
+
+def test_spectateurs():
+    """
+    Tester la diffusion aux spectateurs : hors quorum, sans blocage, avec regroupement des états
+    """
+    message = construire_connexion("Chef", role=ROLE_SPECTATEUR)
+    assert lire_connexion(message)[0] == "Chef" and lire_role(message) == ROLE_SPECTATEUR
+    assert lire_role(construire_connexion("Alice")) is None
+
+    diffusion = DiffusionSpectateurs()
+    lent, lent_distant = socket.socketpair()     # Spectateur qui ne lit jamais
+    rapide, rapide_distant = socket.socketpair()
+    try:
+        diffusion.ajouter(lent, "Lent")
+        diffusion.ajouter(rapide, "Rapide")
+        diffusion.publier('debut', mode='Majorité absolue', joueurs=2, total=2000)
+
+        # Le moteur n'attend jamais les spectateurs, même quand le tampon du spectateur lent est plein
+        debut = time.monotonic()
+        for numero in range(2000):
+            diffusion.publier('tache', cle=str(numero), question="Créer une interface " * 50)
+        assert time.monotonic() - debut < 2
+        diffusion.publier('fin')
+
+        # Le spectateur qui lit reçoit toujours le dernier état, sans toutes les versions intermédiaires
+        lignes = rapide_distant.makefile('rb')
+        recus = 0
+        while True:
+            etat = json.loads(lignes.readline())
+            recus += 1
+            if etat['phase'] == 'fin':
+                break
+        assert etat['version'] == 2002 and etat['tache'] is None
+        assert recus < 2000
+        assert len(diffusion) == 2
+    finally:
+        diffusion.fermer()
+        for conn in (lent_distant, rapide_distant):
+            conn.close()
+
+    # Spectateur d'une partie en mémoire (bots, simulations)
+    diffusion = DiffusionSpectateurs()
+    memoire, memoire_distant = TransportMemoire().creer_paire()
+    try:
+        diffusion.ajouter(memoire, "Memoire")
+        diffusion.publier('fin')
+        memoire_distant.settimeout(5)
+        lignes = b''
+        while b'"fin"' not in lignes:
+            lignes += memoire_distant.recv(65536)
+        assert json.loads(lignes.splitlines()[-1])['phase'] == 'fin'
+    finally:
+        diffusion.fermer()
+
+
+def test_export_resultats(tmp_path):
+    """
+    Tester l'export en continu (CSV, JSONL, tracker), l'export de l'historique et l'écriture atomique
+    """
+    export = ExportResultats(str(tmp_path), nom="partie")
+    export.publier('tache', cle="1", question="Créer une interface")
+    export.publier('tour', votes=[("Alice", "3"), ("Bob", "8")])
+    export.publier('tour', votes=[("Alice", "5"), ("Bob", "5")])
+    export.publier('decision', cles=["1", "3"], estimation=5)
+    export.publier('tache', cle="2", question="Se connecter")
+    export.publier('decision', cles=["2"], estimation=2)
+    assert not (tmp_path / "partie.csv").exists(), "Le fichier final n'apparaît qu'une fois complet"
+    export.publier('fin')
+
+    with open(tmp_path / "partie.csv", encoding='utf-8') as f:
+        lignes = list(csv.reader(f))
+    assert lignes[0] == ['cle', 'tache', 'estimation', 'tour', 'pseudo', 'vote']
+    assert lignes[1:5] == [["1", "Créer une interface", "5", "1", "Alice", "3"], ["1", "Créer une interface", "5", "1", "Bob", "8"],
+                           ["1", "Créer une interface", "5", "2", "Alice", "5"], ["1", "Créer une interface", "5", "2", "Bob", "5"]]
+    assert len(lignes) == 10 and lignes[-1] == ["2", "Se connecter", "2", "", "", ""]
+    with open(tmp_path / "partie.jsonl", encoding='utf-8') as f:
+        taches = [json.loads(ligne) for ligne in f]
+    assert [tache['cle'] for tache in taches] == ["1", "3", "2"] and taches[0]['tours'][1] == [["Alice", "5"], ["Bob", "5"]]
+    with open(tmp_path / "partie.tracker.json", encoding='utf-8') as f:
+        tickets = json.load(f)['issueUpdates']
+    assert tickets[2]['fields'] == {'summary': "Se connecter", 'story_points': 2}
+
+    # Historique : une tâche votée en deux tours, une tâche non estimée ignorée
+    historique = HistoriqueStore(str(tmp_path / "historique.db"))
+    session_id = historique.ouvrir_session('Majorité absolue', 2)
+    historique.enregistrer_tour(session_id, 0, 0, [["Alice", "3"], ["Bob", "8"]], False)
+    historique.enregistrer_tour(session_id, 0, 1, [["Alice", "5"], ["Bob", "5"]], True)
+    historique.enregistrer_tache(session_id, 0, "Créer une interface", 5, 2)
+    historique.enregistrer_tour(session_id, 1, 0, [["Alice", "cafe"], ["Bob", "2"]], False)
+    historique.fermer()
+    assert exporter_historique(str(tmp_path / "historique.db"), str(tmp_path), ['jsonl']) == 1
+    with open(tmp_path / "historique.jsonl", encoding='utf-8') as f:
+        tache = json.loads(f.readline())
+    assert tache['tours'] == [[["Alice", "3"], ["Bob", "8"]], [["Alice", "5"], ["Bob", "5"]]]
+
+    # Un historique illisible ne laisse aucun fichier .part ouvert
+    (tmp_path / "vide").mkdir()
+    sqlite3.connect(str(tmp_path / "vide.db")).close()
+    with pytest.raises(sqlite3.OperationalError):
+        exporter_historique(str(tmp_path / "vide.db"), str(tmp_path / "vide"))
+    assert os.listdir(tmp_path / "vide") == []
+
+    # Une écriture atomique interrompue laisse l'ancien fichier intact
+    chemin = str(tmp_path / "backlog.json")
+    ecrire_atomique(chemin, {1: "Créer une interface"})
+    with pytest.raises(TypeError):
+        ecrire_atomique(chemin, {1: object()})
+    with open(chemin, encoding='utf-8') as f:
+        assert json.load(f) == {"1": "Créer une interface"}
+    assert not [nom for nom in os.listdir(tmp_path) if nom.startswith('.backlog')]
+
+
+def test_admission_afflux():
+    """
+    Tester l'admission d'un afflux de joueurs : lots, échéance des connexions muettes, débit par adresse
+    """
+    pseudos = []
+    admission = Admission(lambda conn, message: pseudos.append(lire_connexion(message)[0]), delai=0.5, nb_threads=4)
+    admission.demarrer()
+    server = TransportTCP().ecouter('127.0.0.1', 20012, 1024)
+    server.settimeout(0.2)
+    arret = threading.Event()
+
+    def ecouter():
+        while not arret.is_set():
+            try:
+                admission.accepter(server)
+            except socket.timeout:
+                pass
+
+    thread = threading.Thread(target=ecouter, daemon=True)
+    thread.start()
+    connexions = []
+    try:
+        muettes = [socket.create_connection(('127.0.0.1', 20012)) for _ in range(6)]  # Ne disent jamais rien
+        debut = time.monotonic()
+        for numero in range(90):
+            conn = socket.create_connection(('127.0.0.1', 20012))
+            conn.sendall(construire_connexion(f"Joueur {numero}").encode())
+            connexions.append(conn)
+        while len(pseudos) < 90 and time.monotonic() - debut < 10:
+            time.sleep(0.05)
+        assert len(pseudos) == 90, "Les connexions muettes ne doivent pas bloquer l'accueil des autres"
+        time.sleep(0.6)
+        stats = admission.statistiques()
+        assert stats['admises'] == 90 and stats['expirees'] == 6 and stats['en_attente'] == 0
+        assert stats['poignee_p95'] < 1.5
+    finally:
+        arret.set()
+        thread.join()
+        server.close()
+        admission.arreter()
+        for conn in connexions + muettes:
+            conn.close()
+
+    # Débit par adresse : rafale de 3 puis un jeton par seconde
+    horloge = [0.0]
+    limiteur = LimiteurDebit(debit=1.0, rafale=3, horloge=lambda: horloge[0])
+    assert [limiteur.autoriser('10.0.0.1') for _ in range(4)] == [True, True, True, False]
+    assert limiteur.autoriser('10.0.0.2'), "Chaque adresse a son propre seau"
+    horloge[0] = 1.0
+    assert limiteur.autoriser('10.0.0.1') and not limiteur.autoriser('10.0.0.1')
+
+
+def test_prechargement_taches():
+    """
+    Tester les questions désignées par position : mêmes questions reconstruites, quelques octets par tour
+    """
+    taches = ["Se connecter avec un compte d'entreprise", "Payer une commande par carte bancaire",
+              "Rechercher un produit dans le catalogue", "Modifier sa photo de profil", "Exporter ses factures en PDF",
+              "Recevoir une notification par courriel", "Afficher les ventes du mois sur un graphique",
+              "Vider le panier en un clic", "Envoyer un message privé à un collègue", "Planifier une réunion d'équipe",
+              "Importer un fichier de contacts", "Restaurer une sauvegarde de la base"]
+    backlog = {str(i + 1): tache for i, tache in enumerate(taches)}
+    assert lire_references(construire_connexion("Alice", references=True))
+    assert not lire_references(construire_connexion("Bob"))
+
+    # Alice précharge les tâches, Bob reçoit les questions en entier ; la tâche 2 demande deux tours
+    votes_alice = [b"Alice;5", b"Alice;3", b"Alice;5"] + [b"Alice;5"] * 10
+    votes_bob = [b"Bob;5", b"Bob;8", b"Bob;5"] + [b"Bob;5"] * 10
+    alice, bob = ConnexionRejouee("Alice", votes_alice), ConnexionRejouee("Bob", votes_bob)
+    prechargement = PrechargementTaches(backlog, fenetre=4, marge=2)
+    prechargement.inscrire(alice)
+    moteur = MoteurPartie([alice, bob], backlog, 'Majorité absolue', 30, 60, afficher=lambda texte, couleur='white': None,
+                          attendre=lambda secondes: None, pause=0, prechargement=prechargement)
+    moteur.executer()
+    assert len(moteur.resultat) == 12
+
+    decompresseur = Decompresseur()
+    recus = []
+    for data in alice.sortants:
+        if data.startswith(MARQUEUR):
+            assert decompresseur.lire(data, None) == (None, b'')
+        else:
+            recus.append(decompresseur.resoudre(data.decode()))
+    assert recus == [data.decode() for data in bob.sortants]
+
+    # 13 questions (dont un second tour) : quelques octets chacune, intitulés envoyés par fenêtres
+    questions_alice = [data for data in alice.sortants if data.startswith(b'@@TASK@@')]
+    assert len(questions_alice) == 13 and max(len(data) for data in questions_alice) <= 10
+    assert sum(data.startswith(MARQUEUR) for data in alice.sortants) == 3  # Positions 0-3, 4-7, 8-11
+    assert sum(map(len, questions_alice)) < sum(len(data) for data in bob.sortants if data.decode() in taches) / 3
+
+
+@pytest.fixture
+def reseau_degrade():
+    """
+    Proxys de réseau dégradé, fermés à la fin du test : reseau_degrade(port_hote, latence=..., debit=...)
+    """
+    proxys = []
+
+    def creer(cible_port, **profil):
+        proxy = ProxyDegrade(cible_port, profil=ProfilReseau(**profil))
+        proxys.append(proxy)
+        return proxy
+
+    yield creer
+    for proxy in proxys:
+        proxy.fermer()
+
+
+def test_reseau_degrade(reseau_degrade):
+    """
+    Tester le proxy de réseau dégradé : latence, débit, coupure, et une partie de bots à travers le proxy
+    """
+    with pytest.raises(ValueError):
+        simuler_partie({"1": "Tâche"}, {"Alice": None}, transport=TransportMemoire(), reseau=ProfilReseau())
+
+    # Serveur d'écho
+    serveur = socket.create_server(('127.0.0.1', 0))
+    port_echo = serveur.getsockname()[1]
+
+    def echo():
+        while True:
+            try:
+                conn, addr = serveur.accept()
+            except OSError:
+                return
+            threading.Thread(target=lambda: [conn.sendall(data) for data in iter(lambda: conn.recv(65536), b'')],
+                             daemon=True).start()
+
+    threading.Thread(target=echo, daemon=True).start()
+    try:
+        # Latence : 2 x 0,1 s pour un aller-retour
+        proxy = reseau_degrade(port_echo, latence=0.1)
+        conn = socket.create_connection(('127.0.0.1', proxy.port))
+        debut = time.monotonic()
+        conn.sendall(b"ping")
+        assert conn.recv(1024) == b"ping" and 0.2 <= time.monotonic() - debut < 1
+        conn.close()
+
+        # Débit : 60 Ko à 200 Ko/s, au moins 0,3 s (aller et retour se recouvrent segment par segment)
+        proxy = reseau_degrade(port_echo, debit=200_000)
+        conn = socket.create_connection(('127.0.0.1', proxy.port))
+        debut = time.monotonic()
+        conn.sendall(b"x" * 60_000)
+        recu = 0
+        while recu < 60_000:
+            recu += len(conn.recv(65536))
+        assert time.monotonic() - debut >= 0.29
+        conn.close()
+
+        # Coupure programmée
+        proxy = reseau_degrade(port_echo, deconnexion=0.2)
+        conn = socket.create_connection(('127.0.0.1', proxy.port))
+        conn.settimeout(5)
+        assert conn.recv(1024) == b"" and proxy.statistiques()[0]['coupee']
+        conn.close()
+    finally:
+        serveur.close()
+
+    # Contre-pression : le lien plein freine l'envoi de l'hôte (tampon d'envoi réduit, loopback l'agrandit à plusieurs Mo)
+    serveur = socket.create_server(('127.0.0.1', 0))
+    try:
+        proxy = reseau_degrade(serveur.getsockname()[1], debit=300_000)
+        conn = socket.create_connection(('127.0.0.1', proxy.port))
+        hote, addr = serveur.accept()
+        hote.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 32768)
+
+        def joueur_lent():
+            recu = 0
+            while recu < 300_000:
+                recu += len(conn.recv(65536))
+
+        lecture = threading.Thread(target=joueur_lent, daemon=True)
+        lecture.start()
+        debut = time.monotonic()
+        hote.sendall(b"x" * 300_000)
+        assert 0.6 <= time.monotonic() - debut < 2, "300 Ko à 300 Ko/s : l'envoi de l'hôte dure environ une seconde"
+        lecture.join(timeout=5)
+        hote.close()
+        conn.close()
+    finally:
+        serveur.close()
+
+    # Partie de bots à travers le proxy : même résultat qu'en mémoire
+    backlog = {"1": "Créer une interface", "2": "Ajouter un bouton"}
+    strategies = {"Alice": lambda question, tour: "5", "Bob": lambda question, tour: "8" if tour == 0 else "5"}
+    debut = time.monotonic()
+    partie = []
+    thread = threading.Thread(target=lambda: partie.append(
+        simuler_partie(backlog, strategies, port=0, reseau=ProfilReseau(latence=0.02, gigue=0.01))), daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert partie, "La partie à travers le proxy ne doit pas rester bloquée"
+    moteur, bots = partie[0]
+    assert moteur.resultat == {"1": 5, "2": 5} and all(bot.fin.is_set() for bot in bots)
+    assert bots[0].questions == ["Créer une interface"] * 2 + ["Ajouter un bouton"] * 2
+    assert time.monotonic() - debut >= 4 * 2 * 0.02, "Chaque tour coûte au moins un aller-retour"
+
+    # Un joueur qui ne vote jamais n'immobilise pas la collecte au-delà du délai
+    hote, joueur = TransportMemoire().creer_paire()
+    debut = time.monotonic()
+    assert collecter_votes([hote], delai=0.2) == ([], []) and time.monotonic() - debut < 1
+
+
+def test_ingestion_backlog(tmp_path):
+    """
+    Tester l'ajout de tâches pendant la partie : surveillance du fichier, dossier de dépôt et intégration au moteur
+    """
+    backlog = {"1": "Créer une interface", "2": "Ajouter un bouton"}
+    chemin = tmp_path / "backlog.json"
+    chemin.write_text(json.dumps(backlog), encoding='utf-8')
+    ingestion = IngestionBacklog(str(chemin), backlog)
+    assert ingestion.verifier() == 0, "Les tâches déjà chargées ne sont pas renvoyées"
+
+    chemin.write_text(json.dumps(dict(backlog, **{"2": "Ajouter un bouton rouge", "3": "Créer une interface !",
+                                                  "4": "Exporter les résultats"})), encoding='utf-8')
+    os.utime(chemin, ns=(0, 0))  # Date de modification forcément différente
+    assert ingestion.verifier() == 3 and ingestion.verifier() == 0
+    taches = ingestion.recuperer()
+    assert list(taches) == ["2", "3", "4"] and ingestion.recuperer() == {}
+
+    # Dossier de dépôt : un backlog par fichier, clés préfixées du nom du fichier
+    depot = tmp_path / "depot"
+    depot.mkdir()
+    (depot / "sprint.json").write_text(json.dumps(["Ajouter un filtre"]), encoding='utf-8')
+    (depot / ".sprint.json.tmp").write_text("{", encoding='utf-8')
+    depot_ingestion = IngestionBacklog(str(depot))
+    depot_ingestion.verifier()
+    assert depot_ingestion.recuperer() == {"sprint:1": "Ajouter un filtre"}
+
+    # Tâche 1 estimée, tâche 2 pas encore posée
+    export = ExportResultats(str(tmp_path / "exports"), formats=('csv',))
+    export.publier('tache', cle="1", question="Créer une interface")
+    export.publier('tour', votes=[["Alice", "5"]])
+    moteur = MoteurPartie([], dict(backlog), 'Majorité absolue', 30, 60, afficher=lambda texte, couleur='white': None,
+                          export=export)
+    moteur.resultat["1"] = 5
+    moteur.position = 1
+    moteur.integrer(taches)
+    assert moteur.ordre == ["1", "2", "2#2", "3", "4"]
+    assert "2" in moteur.retirees and moteur.backlog["2#2"] == "Ajouter un bouton rouge"
+    assert moteur.resultat["3"] == 5, "Une tâche déjà estimée n'est pas revotée"
+    assert "4" not in moteur.resultat and moteur.analyse.representant["4"] == "4"
+    export.fermer()
+    with open(tmp_path / "exports" / "resultats.csv", encoding='utf-8') as f:
+        assert list(csv.reader(f))[1:] == [["3", "Créer une interface !", "5", "", "", ""]], \
+            "La tâche reprise est exportée avec son intitulé, sans les votes de la tâche précédente"
+
+
+def test_budgets_adaptatifs(tmp_path):
+    """
+    Tester les temps proposés d'après les durées observées et la fin de discussion lorsque tous sont prêts
+    """
+    assert proposer_temps([3.0] * 10, 30) is None, "Pas de proposition sans assez de tours observés"
+    assert proposer_temps([i / 10 for i in range(1, 101)], 30) == 12, "Quantile 95 % (9,6 s) plus 20 % de marge"
+    assert proposer_temps([100.0] * 30, 30) == 30, "Le budget n'est jamais allongé"
+    assert proposer_temps([0.5] * 30, 30) == 5
+
+    chemin = str(tmp_path / "historique.db")
+    store = HistoriqueStore(chemin)
+    session = store.ouvrir_session('Majorité absolue', 2)
+    for numero in range(25):
+        store.enregistrer_duree(session, 0, numero, 'vote', 4.0)
+    store.fermer()
+    assert proposer_budgets(30, 60, chemin) == (5, None)
+
+    # Signal « prêt » : relevé sans attendre, ignoré s'il arrive avec un vote
+    hote, joueur = TransportMemoire().creer_paire()
+    prets = set()
+    assert lire_prets([joueur], prets) == set()
+    hote.sendall(f"{TAG_PRET}\n".encode())
+    assert lire_prets([joueur], prets) == {joueur}
+    hote.sendall(f"{TAG_PRET}\nAlice;5".encode())
+    assert collecter_votes([joueur]) == ([["Alice", "5"]], ["5"])
+
+    # Discussion de 60 s écourtée : les bots se déclarent prêts
+    backlog = {"1": "Créer une interface"}
+    strategies = {"Alice": lambda question, tour: "5", "Bob": lambda question, tour: "8" if tour == 0 else "5"}
+    debut = time.monotonic()
+    moteur, bots = simuler_partie(backlog, strategies, port=20015, discussion_anticipee=True)
+    assert moteur.resultat == {"1": 5} and len(bots[0].feedbacks) == 2
+    assert time.monotonic() - debut < 10
+
+
+def test_synthese_votes():
+    """
+    Tester la synthèse des votes (répartition, écarts) et le tableau des votes paginé
+    """
+    votes = [("Alice", "5"), ("Bob", "5"), ("Carol", "8"), ("Dave", "40"), ("Eve", "1"), ("Fred", "-1"), ("Gus", "5")]
+    histogramme, ecarts, nb_ecarts = synthese_votes(votes)
+    assert histogramme == [("1", 1), ("5", 3), ("8", 1), ("40", 1), ("-1", 1)], "Cartes dans l'ordre du jeu"
+    assert ecarts == [("Dave", "40"), ("Eve", "1")] and nb_ecarts == 2, "Les plus éloignés de la médiane d'abord"
+    assert synthese_votes([("Alice", "cafe")]) == ([("cafe", 1)], [], 0)
+
+    # Grande salle : seuls les premiers écarts sont cités, une page du tableau à la fois
+    salle = [(f"Joueur{i}", "100" if i % 50 == 0 else "3") for i in range(1000)]
+    histogramme, ecarts, nb_ecarts = synthese_votes(salle)
+    assert histogramme == [("3", 980), ("100", 20)] and len(ecarts) == 10 and nb_ecarts == 20
+    pages = PagesVotes(salle)
+    assert pages.nb_pages == 100 and pages.page(0) == salle[:10]
+    assert pages.page(150) == salle[-10:] and pages.numero == 99, "Numéro de page ramené dans les bornes"
+    assert PagesVotes([]).nb_pages == 1 and PagesVotes([]).page(0) == []
+
+
+def test_moteur_processus(tmp_path, monkeypatch):
+    """
+    Tester la partie jouée dans un processus séparé et l'état transmis à la console (instantané et deltas)
+    """
+    class LiaisonBloquee:
+        def __init__(self):
+            self.messages = []
+            self.debloquer = threading.Event()
+
+        def send(self, message):
+            self.debloquer.wait()
+            self.messages.append(message)
+
+    # Console bloquée : le moteur continue, la file est remplacée par un instantané
+    liaison = LiaisonBloquee()
+    flux = FluxConsole(liaison, taille=5)
+    flux.publier('debut', mode='Moyenne', joueurs=2, total=30)
+    for i in range(30):
+        flux.afficher(f"Tâche {i}")
+        flux.publier('decision', cles=[str(i)], estimation=3)
+    liaison.debloquer.set()
+    flux.terminer({'resultat': {}, 'paused': False, 'backlog': {}})
+
+    console = ConsoleMoteur(None)
+    lignes = []
+    for message in liaison.messages:
+        console.traiter(message, lambda texte, couleur='white': lignes.append(texte))
+    assert len(liaison.messages) < 10 and any(message[0] == 'instantane' for message in liaison.messages)
+    assert console.etat.etat['estimees'] == 30 and console.etat.etat['total'] == 30
+    assert len([ligne for ligne in lignes if ligne.startswith("Tâche")]) + console.perdus == 30
+    assert console.fin == {'resultat': {}, 'paused': False, 'backlog': {}}
+
+    # Partie complète : les connexions TCP des bots sont transmises au processus du moteur
+    monkeypatch.chdir(tmp_path)
+    transport = TransportTCP()
+    ecoute = transport.ecouter('127.0.0.1', 0)
+    port = ecoute.getsockname()[1]
+    bots = [JoueurBot(pseudo, transport, port=port) for pseudo in ("Alice", "Bob")]
+    threads = [bot.demarrer() for bot in bots]
+    clients, pseudos = accepter_joueurs(ecoute, len(bots))
+    ecoute.close()
+    for client in clients:
+        client.sendall(TAG_START.encode())
+
+    backlog = {"1": "Créer une interface", "2": "Ajouter un bouton"}
+    index = IndexSimilarite()
+    index.ajouter("Déployer en production", 8)
+    moteur = ProcessusMoteur([(client, pseudo, None, False) for client, pseudo in zip(clients, pseudos)],
+                             backlog, 'Moyenne', 30, 60, pause=0.2, index_rappel=index)
+    lignes = []
+    fin = moteur.attendre(lambda texte, couleur='white': lignes.append(texte))
+    moteur.fermer()
+    for thread in threads:
+        thread.join(timeout=5)
+    for client in clients:
+        client.close()
+
+    assert fin['resultat'] == {"1": 5, "2": 5} and not fin['paused']
+    assert fin['rappel'] == [["Déployer en production", 8], ["Créer une interface", 5], ["Ajouter un bouton", 5]], \
+        "Les tâches estimées dans le processus du moteur sont renvoyées à la console"
+    assert fin['analyse'].representant == {"1": "1", "2": "2"}
+    assert moteur.etat.etat['phase'] == 'fin' and moteur.etat.etat['estimees'] == 2
+    assert any("Votes reçus" in ligne for ligne in lignes)
+    assert json.loads((tmp_path / 'backlog_output.json').read_text(encoding='utf-8')) == {
+        "Créer une interface": 5, "Ajouter un bouton": 5}, "Résultats enregistrés par le processus du moteur"
+    assert not moteur.processus.is_alive()
+
+
+def test_parties_consecutives():
+    """
+    Tester plusieurs parties sur les mêmes connexions : joueurs gardés, joueurs partis retirés, messages en retard ignorés
+    """
+    # Messages restés en attente entre deux parties, connexion fermée par le joueur
+    hote, joueur = TransportMemoire().creer_paire()
+    hote.sendall(f"Alice;5{TAG_PRET}\n".encode())
+    assert purger_connexions([joueur]) == []
+    joueur.settimeout(0)
+    with pytest.raises(socket.timeout):
+        joueur.recv(1024)
+    hote.close()
+    assert purger_connexions([joueur]) == [joueur]
+
+    transport = TransportMemoire()
+    ecoute = transport.ecouter('127.0.0.1', 20016)
+    bots = [JoueurBot("Alice", transport, port=20016, parties=2), JoueurBot("Bob", transport, port=20016, parties=2),
+            JoueurBot("Carol", transport, port=20016)]
+    threads = [bot.demarrer() for bot in bots]
+    clients, pseudos = accepter_joueurs(ecoute, len(bots))
+    ecoute.close()
+    registre = RegistreJoueurs()
+    for conn, pseudo in zip(clients, pseudos):
+        registre.ajouter(conn, pseudo)
+
+    resultats = []
+    for backlog in ({"1": "Créer une interface"}, {"1": "Ajouter un bouton", "2": "Écrire la documentation"}):
+        if resultats:
+            assert bots[2].fin.wait(5), "Carol quitte après la première partie"
+        for conn in purger_connexions(registre.connexions()):
+            registre.retirer(conn)
+        for client in registre.connexions():
+            client.sendall(TAG_START.encode())
+        moteur = MoteurPartie(registre.connexions(), backlog, 'Moyenne', 30, 60, registre=registre, pause=0,
+                              afficher=lambda texte, couleur='white': None, attendre=lambda secondes: None)
+        resultats.append(moteur.executer())
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert resultats == [{"1": 5}, {"1": 5, "2": 5}]
+    assert registre.pseudos() == ["Alice", "Bob"], "Les joueurs restés sont gardés, sans se reconnecter"
+    assert bots[0].questions == ["Créer une interface", "Ajouter un bouton", "Écrire la documentation"]
+    assert all(bot.fin.is_set() for bot in bots)
+
+
+def test_fenetre_asynchrone(tmp_path):
+    """
+    Tester la fenêtre asynchrone : votes partiels, reconnexion, quorum, puis partie synchrone sur les tâches sans accord
+    """
+    # Décompte indexé : un vote remplacé met à jour l'accord de sa tâche
+    etat = VotesTaches(["1", "2"])
+    assert etat.voter("Alice", "1", "5") and etat.voter("Bob", "1", "8")
+    assert "1" not in etat.unanimes
+    etat.voter("Bob", "1", "5")
+    assert etat.unanimes == {"1"} and etat.total == 2 and etat.en_accord(quorum=2) == 1
+    assert not etat.voter("Alice", "9", "5"), "Tâche inconnue"
+    assert etat.restantes("Alice") == ["2"]
+
+    backlog = {"1": "Créer une interface", "2": "Ajouter un bouton", "3": "ajouter un bouton", "4": "Écrire la doc"}
+    fenetre = FenetreAsynchrone(backlog, 30, hote='127.0.0.1', port=0)
+    alice = VotantAsynchrone("Alice", port=fenetre.port)
+    assert [cle for cle, tache in alice.taches] == ["1", "2", "4"], "Le doublon n'est pas soumis au vote"
+    assert alice.voter("1", "5") and alice.voter("2", "8")
+    assert not alice.voter("4", "cafe"), "Pas de pause café en asynchrone"
+    assert not alice.voter("4", "7") and not alice.voter("4", "-5"), "Seules les cartes du jeu sont acceptées"
+    alice.fermer()
+
+    for pseudo, votes in (("Bob", {"1": "5", "2": "3"}), ("Carol", {"1": "5", "2": "8"})):
+        votant = VotantAsynchrone(pseudo, port=fenetre.port)
+        for cle, vote in votes.items():
+            assert votant.voter(cle, vote)
+        votant.fermer()
+
+    # Reconnexion : les votes sont conservés, seules les tâches non votées sont proposées
+    alice = VotantAsynchrone("Alice", port=fenetre.port)
+    assert alice.votes == {"1": "5", "2": "8"} and [cle for cle, tache in alice.taches] == ["4"]
+    assert "1/3 tâches en accord" in fenetre.progression()
+
+    # Votant qui ne lit plus ses réponses : la fermeture ne l'attend pas
+    muet = socket.socket()
+    muet.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    muet.connect(('127.0.0.1', fenetre.port))
+    muet.sendall(b"Muet\n" + b"9;5\n" * 300000)
+    time.sleep(1)
+
+    debut = time.monotonic()
+    bilan = fenetre.fermer()
+    assert time.monotonic() - debut < 5
+    muet.close()
+    assert alice.recevoir() == {"fin": True}
+    alice.fermer()
+    assert bilan.estimations == {"1": 5} and bilan.total == 6
+    assert bilan.a_discuter == ["2", "4"], "Désaccord ou quorum non atteint"
+    assert bilan.rappel("2") == "8 ×2, 3 ×1"
+
+    # Tâches décidées pendant la fenêtre : exportées avec leur intitulé et les votes de la fenêtre comme premier tour
+    export = ExportResultats(str(tmp_path), formats=('csv',))
+    moteur = MoteurPartie([], backlog, 'Moyenne', 30, 60, afficher=lambda texte, couleur='white': None, pause=0,
+                          export=export, asynchrone=bilan)
+    moteur.executer()
+    assert moteur.resultat == {"1": 5} and type(moteur.resultat["1"]) is int
+    with open(tmp_path / 'resultats.csv', encoding='utf-8') as f:
+        lignes = list(csv.reader(f))[1:]
+    assert sorted(lignes) == [["1", "Créer une interface", "5", "1", pseudo, "5"] for pseudo in ("Alice", "Bob", "Carol")]
+
+    # Partie synchrone : seules les tâches sans accord sont posées, les votes asynchrones comptent comme premier tour
+    moteur, bots = simuler_partie(backlog, {"Alice": lambda question, tour: "5", "Bob": lambda question, tour: "8"},
+                                  mode='Moyenne', port=20017, asynchrone=bilan)
+    assert moteur.resultat == {"1": 5, "2": 6.5, "3": 6.5, "4": 6.5}
+    assert bots[0].questions[0] == "Ajouter un bouton\n(Votes asynchrones : 8 ×2, 3 ×1)"
+    assert len(bots[0].questions) == 3, "Tâche 2 décidée au premier tour synchrone, tâche 4 sans vote asynchrone jugée d'abord à la majorité absolue"
+
+
 if __name__ == '__main__':
     pytest.main()
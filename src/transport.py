@@ -0,0 +1,273 @@
+import os
+import queue
+import socket
+import tempfile
+import threading
+
+
+class TransportTCP:
+    """
+    @brief Transport réseau par défaut : TCP/IPv4.
+    """
+
+    nom = 'tcp'
+
+    def ecouter(self, hote, port, backlog=None):
+        """
+        @brief Ouvre un socket d'écoute
+
+        @param hote Adresse IP d'écoute
+        @param port Port d'écoute
+        @param backlog Taille de la file des connexions en attente d'accept (valeur du système par défaut)
+        @return Socket d'écoute (accept, settimeout, close)
+        """
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Activation de SO_REUSEADDR
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((hote, port))
+        server.listen(*([backlog] if backlog else []))
+        return server
+
+    def connecter(self, hote, port):
+        """
+        @brief Se connecte à un hôte
+
+        @param hote Adresse IP de l'hôte
+        @param port Port de l'hôte
+        @return Connexion (sendall, recv, settimeout, close)
+        """
+        conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        conn.connect((hote, port))
+        return conn
+
+
+class TransportUnix:
+    """
+    @brief Transport local par socket de domaine Unix.
+
+    Évite la pile TCP lorsque l'hôte et les joueurs sont sur la même machine.
+    L'adresse IP est ignorée : seul le port détermine le fichier du socket.
+    """
+
+    nom = 'unix'
+
+    def __init__(self, dossier=None):
+        """
+        @brief Constructeur de TransportUnix.
+
+        @param dossier Dossier des fichiers de socket (dossier temporaire par défaut)
+        """
+        self.dossier = dossier or tempfile.gettempdir()
+
+    def chemin(self, port):
+        """
+        @brief Chemin du fichier de socket associé à un port
+
+        @param port Port de la partie
+        @return Chemin du fichier
+        """
+        return os.path.join(self.dossier, f"planning_poker_{port}.sock")
+
+    def ecouter(self, hote, port, backlog=None):
+        """
+        @brief Ouvre le socket Unix d'écoute associé au port
+        """
+        chemin = self.chemin(port)
+        if os.path.exists(chemin):
+            os.remove(chemin)  # Socket laissé par une partie précédente
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(chemin)
+        server.listen(*([backlog] if backlog else []))
+        return server
+
+    def connecter(self, hote, port):
+        """
+        @brief Se connecte au socket Unix associé au port
+        """
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.connect(self.chemin(port))
+        return conn
+
+
+class ConnexionMemoire:
+    """
+    @brief Extrémité d'une connexion en mémoire.
+
+    Chaque sendall dépose un message dans la file de l'extrémité opposée ; recv
+    renvoie le message suivant (tronqué à la taille demandée, le reste étant
+    conservé pour l'appel suivant). Les frontières de messages sont donc préservées.
+    """
+
+    def __init__(self):
+        self.file = queue.Queue()
+        self.pair = None
+        self.timeout = None
+        self.reste = b''
+        self.fermee = False
+
+    def sendall(self, data):
+        """
+        @brief Dépose un message dans la file de l'extrémité opposée
+        """
+        if self.fermee or self.pair.fermee:
+            raise BrokenPipeError("Connexion fermée")
+        self.pair.file.put(bytes(data))
+
+    def send(self, data):
+        """
+        @brief Envoi non bloquant : la file n'étant pas bornée, tout est toujours envoyé
+
+        @return Nombre d'octets envoyés
+        """
+        self.sendall(data)
+        return len(data)
+
+    def recv(self, taille):
+        """
+        @brief Lit au plus taille octets du message suivant
+
+        @return Les octets lus, b'' si la connexion est fermée
+        """
+        if not self.reste:
+            if self.fermee:
+                return b''
+            try:
+                self.reste = self.file.get(timeout=self.timeout)
+            except queue.Empty:
+                raise socket.timeout("timed out")
+            if self.reste is None:  # Fermeture de l'extrémité opposée
+                self.fermee = True
+                self.reste = b''
+                return b''
+        data, self.reste = self.reste[:taille], self.reste[taille:]
+        return data
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def setblocking(self, bloquant):
+        self.timeout = None if bloquant else 0.0
+
+    def close(self):
+        """
+        @brief Ferme la connexion et prévient l'extrémité opposée
+        """
+        if not self.fermee:
+            self.fermee = True
+            self.pair.file.put(None)
+
+
+class EcouteMemoire:
+    """
+    @brief Point d'écoute en mémoire, équivalent d'un socket serveur.
+    """
+
+    def __init__(self, transport, port):
+        self.transport = transport
+        self.port = port
+        self.attente = queue.Queue()
+        self.timeout = None
+
+    def accept(self):
+        """
+        @brief Attend une connexion entrante
+
+        @return Tuple (connexion, adresse)
+        """
+        try:
+            return self.attente.get(timeout=self.timeout), ('memoire', self.port)
+        except queue.Empty:
+            raise socket.timeout("timed out")
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def gettimeout(self):
+        return self.timeout
+
+    def close(self):
+        self.transport.fermer_ecoute(self)
+
+
+class TransportMemoire:
+    """
+    @brief Transport en mémoire, au sein d'un même processus.
+
+    Permet de simuler des parties entières (hôte et joueurs dans le même processus)
+    sans passer par le réseau. Les points d'écoute sont partagés par toutes les
+    instances du processus.
+    """
+
+    nom = 'memoire'
+    ecoutes = {}
+    verrou = threading.Lock()
+
+    def ecouter(self, hote, port, backlog=None):
+        """
+        @brief Déclare un point d'écoute en mémoire sur le port (file non bornée)
+        """
+        with self.verrou:
+            ecoute = self.ecoutes[port] = EcouteMemoire(self, port)
+        return ecoute
+
+    def fermer_ecoute(self, ecoute):
+        """
+        @brief Retire un point d'écoute
+        """
+        with self.verrou:
+            if self.ecoutes.get(ecoute.port) is ecoute:
+                del self.ecoutes[ecoute.port]
+
+    def creer_paire(self):
+        """
+        @brief Crée deux extrémités reliées
+
+        @return Tuple (extrémité cliente, extrémité serveur)
+        """
+        client, serveur = ConnexionMemoire(), ConnexionMemoire()
+        client.pair, serveur.pair = serveur, client
+        return client, serveur
+
+    def connecter(self, hote, port):
+        """
+        @brief Crée une connexion vers le point d'écoute du port
+        """
+        with self.verrou:
+            ecoute = self.ecoutes.get(port)
+        if ecoute is None:
+            raise ConnectionRefusedError(f"Aucune partie en écoute sur le port {port}")
+        client, serveur = self.creer_paire()
+        ecoute.attente.put(serveur)
+        return client
+
+
+class TransportSocketpair(TransportMemoire):
+    """
+    @brief Transport en processus utilisant de vrais sockets (socket.socketpair).
+
+    Même fonctionnement que TransportMemoire, mais les connexions sont des sockets
+    du noyau : utile pour tester le comportement flux (messages fusionnés ou découpés).
+    """
+
+    nom = 'socketpair'
+
+    def creer_paire(self):
+        return socket.socketpair()
+
+
+TRANSPORTS = {
+    'tcp': TransportTCP,
+    'unix': TransportUnix,
+    'memoire': TransportMemoire,
+    'socketpair': TransportSocketpair,
+}
+
+
+def transport_par_defaut():
+    """
+    @brief Transport choisi par la variable d'environnement PLANNING_POKER_TRANSPORT
+
+    @return Une instance de transport (TCP si la variable est absente ou inconnue)
+    """
+    nom = os.environ.get('PLANNING_POKER_TRANSPORT', 'tcp')
+    return TRANSPORTS.get(nom, TransportTCP)()